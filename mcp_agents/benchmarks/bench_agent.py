@@ -0,0 +1,126 @@
+"""Throughput of sync Agent vs AsyncAgent vs micro-batched AsyncAgent.
+
+Runs against the local mock completion server, so no Groq key or network is
+needed:
+
+    python benchmarks/bench_agent.py --latency-ms 200 --requests-per-user 5
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from groq import AsyncGroq, Groq
+
+from agent import Agent, AsyncAgent
+from batching import MicroBatcher
+from mock_llm_server import MockCompletionServer
+
+QUERIES = [
+    "is my flight delayed",
+    "what is the status of flight 22",
+    "has the plane landed",
+    "when does my flight board",
+    "is flight AA100 on time",
+]
+
+
+def _summary(mode: str, users: int, latencies: list, elapsed: float, llm_calls: int) -> dict:
+    ordered = sorted(latencies)
+    return {
+        "mode": mode,
+        "users": users,
+        "requests": len(latencies),
+        "llm_calls": llm_calls,
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(statistics.median(ordered) * 1000, 1),
+        # Nearest rank; flooring 0.95 * (n - 1) put small-sample p95s below the median
+        "p95_ms": round(ordered[math.ceil(0.95 * len(ordered)) - 1] * 1000, 1),
+    }
+
+
+def run_sync(server: MockCompletionServer, users: int, per_user: int) -> dict:
+    client = Groq(api_key="mock", base_url=server.base_url, max_retries=0)
+    agent = Agent(client, "system", memory="stateless")
+    before = server.requests
+
+    def user(uid: int):
+        latencies = []
+        for i in range(per_user):
+            start = time.perf_counter()
+            agent(QUERIES[(uid + i) % len(QUERIES)], conversation_id=str(uid))
+            latencies.append(time.perf_counter() - start)
+        return latencies
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=users) as pool:
+        latencies = [lat for result in pool.map(user, range(users)) for lat in result]
+    return _summary("sync", users, latencies, time.perf_counter() - start, server.requests - before)
+
+
+async def run_async(server: MockCompletionServer, users: int, per_user: int, batched: bool, max_concurrency: int) -> dict:
+    client = AsyncGroq(api_key="mock", base_url=server.base_url, max_retries=0)
+    agent = AsyncAgent(client, "system", memory="stateless")
+    batcher = MicroBatcher(agent, max_wait_ms=5, max_concurrency=max_concurrency) if batched else None
+    before = server.requests
+
+    async def user(uid: int):
+        latencies = []
+        for i in range(per_user):
+            query = QUERIES[(uid + i) % len(QUERIES)]
+            start = time.perf_counter()
+            if batcher:
+                await batcher.submit(query)
+            else:
+                await agent(query, conversation_id=str(uid))
+            latencies.append(time.perf_counter() - start)
+        return latencies
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(user(uid) for uid in range(users)))
+    elapsed = time.perf_counter() - start
+    if batcher:
+        await batcher.close()
+    await client.close()
+    latencies = [lat for result in results for lat in result]
+    return _summary("batched" if batched else "async", users, latencies, elapsed, server.requests - before)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    parser.add_argument("--requests-per-user", type=int, default=5)
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--max-concurrency", type=int, default=8)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    server = MockCompletionServer(latency_ms=args.latency_ms).start_in_thread()
+    results = []
+    try:
+        for users in args.users:
+            results.append(run_sync(server, users, args.requests_per_user))
+            results.append(asyncio.run(run_async(server, users, args.requests_per_user, False, args.max_concurrency)))
+            results.append(asyncio.run(run_async(server, users, args.requests_per_user, True, args.max_concurrency)))
+    finally:
+        server.stop_thread()
+
+    print(f"{'mode':<8} {'users':>5} {'reqs':>6} {'llm':>6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8}")
+    for r in results:
+        print(f"{r['mode']:<8} {r['users']:>5} {r['requests']:>6} {r['llm_calls']:>6} "
+              f"{r['throughput_rps']:>8} {r['p50_ms']:>8} {r['p95_ms']:>8}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Latency of confirm_flight: two sequential selects vs one embedded select vs cached.
+
+Runs app_server against the in-memory PostgREST stand-in with an injected
+per-request latency, so the number of round trips dominates:
+
+    python benchmarks/bench_confirm_flight.py --latency-ms 20 --requests 200
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import statistics
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(os.path.dirname(BENCH_DIR), "src"))
+sys.path.append(BENCH_DIR)
+
+from mock_postgrest import MockPostgrestServer, PostgrestStore, seed_ticket_data
+
+DUMMY_KEY = "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoiYW5vbiJ9.bW9jaw"
+
+
+async def legacy_confirm(app_server, ticket_id: int, user_id: int):
+    """The original two-round-trip lookup, kept here as the baseline"""
+    tickets = await app_server.get_repository().request("GET", "/tickets", params={
+        "select": "*", "ticket_id": f"eq.{ticket_id}", "user_id": f"eq.{user_id}",
+    })
+    flights = await app_server.get_repository().request("GET", "/flights", params={
+        "select": "*", "flight_id": f"eq.{tickets[0]['flight_id']}",
+    })
+    return app_server._flight_details(flights[0])
+
+
+async def measure(name: str, server: MockPostgrestServer, pairs, call) -> dict:
+    before = server.requests
+    latencies = []
+    for ticket_id, user_id in pairs:
+        start = time.perf_counter()
+        await call(ticket_id, user_id)
+        latencies.append(time.perf_counter() - start)
+    ordered = sorted(latencies)
+    return {
+        "variant": name,
+        "requests": len(pairs),
+        "round_trips_per_request": round((server.requests - before) / len(pairs), 2),
+        "mean_ms": round(statistics.mean(latencies) * 1000, 2),
+        "p50_ms": round(statistics.median(ordered) * 1000, 2),
+        "p95_ms": round(ordered[math.ceil(0.95 * len(ordered)) - 1] * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--tickets", type=int, default=1000)
+    parser.add_argument("--distinct", type=int, default=50, help="Distinct tickets looked up (controls cache reuse)")
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    store = seed_ticket_data(PostgrestStore(), tickets=args.tickets)
+    server = MockPostgrestServer(store, latency_ms=args.latency_ms).start()
+    os.environ["SUPABASE_URL"] = server.url
+    os.environ["SUPABASE_KEY"] = DUMMY_KEY
+
+    import app_server
+    from app_server import ConfirmationRequest
+
+    rng = random.Random(42)
+    tickets = {row["ticket_id"]: row["user_id"] for row in store.tables["tickets"]}
+    hot = rng.sample(sorted(tickets), min(args.distinct, len(tickets)))
+    pairs = [(t, tickets[t]) for t in (rng.choice(hot) for _ in range(args.requests))]
+
+    async def joined_uncached(ticket_id, user_id):
+        app_server.flight_cache.clear()
+        app_server.ticket_flight_cache.clear()
+        await app_server.confirm_flight(ConfirmationRequest(ticket_id=ticket_id, user_id=user_id))
+
+    async def joined_cached(ticket_id, user_id):
+        await app_server.confirm_flight(ConfirmationRequest(ticket_id=ticket_id, user_id=user_id))
+
+    async def run_all():
+        try:
+            return [
+                await measure("two_selects", server, pairs, lambda t, u: legacy_confirm(app_server, t, u)),
+                await measure("embedded_select", server, pairs, joined_uncached),
+                await measure("embedded_select+cache", server, pairs, joined_cached),
+            ]
+        finally:
+            await app_server.get_repository().close()
+
+    try:
+        results = asyncio.run(run_all())
+    finally:
+        server.stop()
+
+    print(f"{'variant':<24} {'trips/req':>9} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9}")
+    for r in results:
+        print(f"{r['variant']:<24} {r['round_trips_per_request']:>9} {r['mean_ms']:>9} {r['p50_ms']:>9} {r['p95_ms']:>9}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""Latency of policy answers from the local knowledge base vs the browse-the-web agent path.
+
+Generates synthetic policy documents, builds the index and measures:
+
+- ingest time and retrieval latency of the NumPy top-k cosine search;
+- knowledge_base: PolicyAgentManager's real retrieval + single LLM call path;
+- browse_model: a model of the MCP agent path, i.e. ``--browse-steps`` LLM
+  calls each followed by a tool call of ``--tool-latency-ms`` (web search or
+  headless browser page load) and a final answer call.
+
+Both answer paths call the local mock completion server, so no Groq key or
+network is needed:
+
+    python benchmarks/bench_knowledge_base.py --latency-ms 300 --tool-latency-ms 1500
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(os.path.dirname(BENCH_DIR), "src"))
+sys.path.append(BENCH_DIR)
+
+from langchain_core.messages import HumanMessage
+from langchain_groq import ChatGroq
+
+from knowledgebase import KnowledgeBase
+from mock_llm_server import MockCompletionServer
+
+TOPICS = {
+    "cancellation": [
+        "Tickets cancelled more than {n} hours before departure receive a full refund to the original payment method.",
+        "A cancellation fee of {n} USD applies to economy fares cancelled within 24 hours of departure.",
+        "Refunds are processed within {n} business days of the cancellation request.",
+        "Non-refundable fares can be converted to travel credit valid for {n} months.",
+    ],
+    "pet-travel": [
+        "Small dogs and cats up to {n} kg may travel in the cabin in an approved carrier.",
+        "Pets in the cabin must stay under the seat in front for the entire flight of up to {n} hours.",
+        "Service animals travel free of charge; emotional support animals need {n} days notice.",
+        "A pet fee of {n} USD applies per direction for animals travelling in the cabin.",
+    ],
+    "baggage": [
+        "Economy passengers may check {n} bags of up to 23 kg each.",
+        "Overweight bags between 23 and 32 kg cost {n} USD per direction.",
+        "Cabin baggage is limited to one bag and one personal item weighing {n} kg in total.",
+    ],
+    "seating": [
+        "Seat selection is free {n} hours before departure during online check-in.",
+        "Extra legroom seats can be purchased for {n} USD on flights over three hours.",
+    ],
+}
+QUERIES = [
+    ("Pet Travel", "can I bring my dog in the cabin"),
+    ("Pet Travel", "what is the pet fee for cats"),
+    ("Pet Travel", "do service animals fly free"),
+    ("Cancellation Policy", "how much does it cost to cancel my ticket"),
+    ("Cancellation Policy", "when will I get my refund after cancelling"),
+    ("Cancellation Policy", "can I turn a non refundable fare into credit"),
+]
+
+
+def write_documents(directory: str, copies: int, rng: random.Random):
+    """One Markdown file per topic and copy, each with a few sections"""
+    for topic, sentences in TOPICS.items():
+        for copy in range(copies):
+            sections = []
+            for section in range(4):
+                body = " ".join(s.format(n=rng.randint(2, 90)) for s in rng.sample(sentences, len(sentences)))
+                sections.append(f"## {topic.replace('-', ' ').title()} rules {section + 1}\n\n{body}")
+            with open(os.path.join(directory, f"{topic}-{copy}.md"), "w", encoding="utf-8") as f:
+                f.write(f"# {topic.title()} policy\n\n" + "\n\n".join(sections))
+
+
+def summarize(name: str, latencies) -> dict:
+    ordered = sorted(latencies)
+    return {
+        "variant": name,
+        "requests": len(ordered),
+        "mean_ms": round(statistics.mean(ordered) * 1000, 2),
+        "p50_ms": round(statistics.median(ordered) * 1000, 2),
+        "p95_ms": round(ordered[math.ceil(0.95 * len(ordered)) - 1] * 1000, 2),
+    }
+
+
+async def browse_model(llm: ChatGroq, query: str, steps: int, tool_latency: float):
+    for step in range(steps):
+        await llm.ainvoke([HumanMessage(content=f"Step {step + 1}: decide the next tool call for: {query}")])
+        await asyncio.sleep(tool_latency)
+    await llm.ainvoke([HumanMessage(content=f"Write the final answer for: {query}")])
+
+
+async def run(args) -> list:
+    from policyagent import PolicyAgentManager
+
+    server = MockCompletionServer(latency_ms=args.latency_ms, content="Mock policy answer.")
+    await server.start()
+    llm = ChatGroq(model="openai/gpt-oss-120b", base_url=server.base_url, api_key="mock", max_retries=0)
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        docs_dir = os.path.join(tmp, "policies")
+        os.makedirs(docs_dir)
+        write_documents(docs_dir, args.copies, random.Random(42))
+
+        kb = KnowledgeBase(docs_dir=docs_dir, index_dir=os.path.join(tmp, "index"))
+        start = time.perf_counter()
+        chunks = kb.ingest()
+        ingest_ms = round((time.perf_counter() - start) * 1000, 2)
+
+        retrieval, top_scores = [], []
+        for _ in range(args.requests):
+            for _, query in QUERIES:
+                start = time.perf_counter()
+                hits = kb.search(query, k=4)
+                retrieval.append(time.perf_counter() - start)
+                top_scores.append(hits[0][0] if hits else 0.0)
+        results.append({**summarize("retrieval_only", retrieval), "chunks": chunks, "ingest_ms": ingest_ms,
+                        "mean_top_score": round(statistics.mean(top_scores), 3)})
+
+        manager = PolicyAgentManager()
+        manager.llm = llm
+        manager.knowledge_base = kb
+        answered, browsed = [], []
+        for _ in range(args.requests):
+            for intent, query in QUERIES:
+                start = time.perf_counter()
+                manager.cache.clear()
+                await manager._run_uncached(query, [{"type": intent}], [])
+                answered.append(time.perf_counter() - start)
+
+                start = time.perf_counter()
+                await browse_model(llm, query, args.browse_steps, args.tool_latency_ms / 1000)
+                browsed.append(time.perf_counter() - start)
+        kb_result = summarize("knowledge_base", answered)
+        kb_result["routes"] = dict(manager.route_counts)
+        results.extend([kb_result, summarize("browse_model", browsed)])
+
+    await server.stop()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency-ms", type=float, default=300.0, help="Mock LLM latency per call")
+    parser.add_argument("--browse-steps", type=int, default=3, help="Tool-calling steps in the modelled agent path")
+    parser.add_argument("--tool-latency-ms", type=float, default=1500.0, help="Latency of one web search / browser tool call")
+    parser.add_argument("--copies", type=int, default=25, help="Documents generated per topic")
+    parser.add_argument("--requests", type=int, default=3, help="Passes over the query set")
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    print(f"{'variant':<16} {'requests':>8} {'mean ms':>10} {'p50 ms':>10} {'p95 ms':>10}")
+    for r in results:
+        print(f"{r['variant']:<16} {r['requests']:>8} {r['mean_ms']:>10} {r['p50_ms']:>10} {r['p95_ms']:>10}")
+    retrieval = results[0]
+    print(f"\nIndexed {retrieval['chunks']} chunks in {retrieval['ingest_ms']} ms; "
+          f"mean top-1 cosine score {retrieval['mean_top_score']}; routes {results[1]['routes']}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""Import-time profile of the chat entry modules, and the time from import to ready.
+
+Each module is imported in a fresh interpreter with ``python -X importtime``.
+The report gives the import wall time and the heaviest packages by self time.
+The run fails (exit code 1) in two cases: a module that should only load
+during warm-up was imported eagerly (langchain_groq, mcp_use, mcp, numpy),
+or an import took longer than --budget-ms. That keeps worker cold start from
+creeping back up.
+
+With --warmup it also warms the policy agent up against the fake MCP servers
+and reports import time, time to ready and each warm-up phase.
+
+    python benchmarks/bench_startup.py --modules policyagent app --repeat 5 --budget-ms 1500
+    python benchmarks/bench_startup.py --warmup --search-latency-ms 0 --browser-latency-ms 0
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+from collections import Counter
+from typing import List, Tuple
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(os.path.dirname(BENCH_DIR), "src")
+
+# Loaded by PolicyAgentManager's warm-up, never by importing an entry module
+LAZY_MODULES = ("langchain_groq", "mcp_use", "mcp", "numpy")
+IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+IMPORT_CHILD = """
+import json, sys, time
+sys.path.insert(0, {src!r})
+start = time.perf_counter()
+import {module}
+import_ms = (time.perf_counter() - start) * 1000
+print(json.dumps({{"import_ms": import_ms, "eager": sorted(m for m in {lazy!r} if m in sys.modules)}}))
+"""
+
+WARMUP_CHILD = """
+import asyncio, json, sys, time
+sys.path.insert(0, {src!r})
+start = time.perf_counter()
+import policyagent
+import_ms = (time.perf_counter() - start) * 1000
+
+async def warm_up():
+    manager = policyagent.policy_agent_manager
+    try:
+        await manager.initialize()
+        return manager.get_readiness()
+    finally:
+        await manager.close()
+
+readiness = asyncio.run(warm_up())
+ready_ms = (time.perf_counter() - start) * 1000
+print(json.dumps({{"import_ms": import_ms, "ready_ms": ready_ms, "phases": readiness["phases"]}}))
+"""
+
+
+def child_env(**overrides) -> dict:
+    env = {**os.environ, "GROQ_API_KEY": os.environ.get("GROQ_API_KEY", "mock"), "TRACING_EXPORTER": ""}
+    env.update(overrides)
+    return env
+
+
+def run_child(code: str, env: dict, importtime: bool = False) -> Tuple[dict, str]:
+    """(last stdout line as JSON, stderr) of a fresh interpreter running code"""
+    command = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", code]
+    proc = subprocess.run(command, capture_output=True, text=True, env=env, cwd=SRC_DIR)
+    if proc.returncode != 0:
+        raise RuntimeError(f"Child interpreter exited with {proc.returncode}:\n{proc.stderr[-2000:]}")
+    return json.loads(proc.stdout.strip().splitlines()[-1]), proc.stderr
+
+
+def heaviest_packages(importtime_log: str, top: int) -> List[Tuple[str, float]]:
+    """Self import time summed per top-level package, heaviest first, in ms"""
+    totals: Counter = Counter()
+    for line in importtime_log.splitlines():
+        match = IMPORTTIME_RE.match(line)
+        if match:
+            totals[match.group(4).split(".")[0]] += int(match.group(1)) / 1000
+    return [(name, round(ms, 1)) for name, ms in totals.most_common(top)]
+
+
+def profile_import(module: str, repeat: int, top: int) -> dict:
+    code = IMPORT_CHILD.format(src=SRC_DIR, module=module, lazy=LAZY_MODULES)
+    first, log = run_child(code, child_env(), importtime=True)
+    # -X importtime slows imports down, so wall times come from separate plain runs
+    times = [run_child(code, child_env())[0]["import_ms"] for _ in range(repeat)]
+    return {
+        "module": module,
+        "import_ms_median": round(statistics.median(times), 1),
+        "import_ms_min": round(min(times), 1),
+        "eager_lazy_modules": first["eager"],
+        "heaviest": heaviest_packages(log, top),
+    }
+
+
+def profile_warmup(args) -> dict:
+    sys.path.append(BENCH_DIR)
+    from fake_mcp_server import mcp_config
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config_file = os.path.join(tmp, "mcp.json")
+        with open(config_file, "w") as f:
+            json.dump(mcp_config(args.search_latency_ms, args.browser_latency_ms), f)
+        env = child_env(
+            MCP_CONFIG_FILE=config_file,
+            MCP_HEALTH_CHECK_INTERVAL="0",
+            KB_INDEX_DIR=os.path.join(tmp, "index"),
+            KB_REFRESH_INTERVAL="0",
+        )
+        result, _ = run_child(WARMUP_CHILD.format(src=SRC_DIR), env)
+    return {
+        "import_ms": round(result["import_ms"], 1),
+        "ready_ms": round(result["ready_ms"], 1),
+        "phases": result["phases"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modules", nargs="+", default=["policyagent", "app"])
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh-interpreter imports per module")
+    parser.add_argument("--top", type=int, default=8, help="Heaviest packages to list per module")
+    parser.add_argument("--budget-ms", type=float, default=0.0, help="Fail if a median import exceeds this (0: no budget)")
+    parser.add_argument("--warmup", action="store_true", help="Also time the warm-up against the fake MCP servers")
+    parser.add_argument("--search-latency-ms", type=float, default=0.0)
+    parser.add_argument("--browser-latency-ms", type=float, default=0.0)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    results = {"imports": [profile_import(m, args.repeat, args.top) for m in args.modules]}
+    failures = []
+    for r in results["imports"]:
+        heaviest = ", ".join(f"{name} {ms}ms" for name, ms in r["heaviest"])
+        print(f"⚡ import {r['module']}: {r['import_ms_median']} ms median ({r['import_ms_min']} min)")
+        print(f"   heaviest: {heaviest}")
+        if r["eager_lazy_modules"]:
+            failures.append(f"{r['module']} imports {', '.join(r['eager_lazy_modules'])} eagerly")
+        if args.budget_ms and r["import_ms_median"] > args.budget_ms:
+            failures.append(f"{r['module']} took {r['import_ms_median']} ms to import (budget {args.budget_ms:.0f} ms)")
+
+    if args.warmup:
+        results["warmup"] = warmup = profile_warmup(args)
+        phases = ", ".join(f"{name} {ms} ms" for name, ms in warmup["phases"].items())
+        print(f"🔄 policyagent ready after {warmup['ready_ms']} ms (import {warmup['import_ms']} ms; {phases})")
+
+    results["failures"] = failures
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    for failure in failures:
+        print(f"❌ {failure}")
+    if failures:
+        sys.exit(1)
+    print("✅ Heavy modules load lazily" + (f" and imports fit in {args.budget_ms:.0f} ms" if args.budget_ms else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,498 @@
+"""Offline benchmark suite for the chat stack on deterministic local stand-ins.
+
+Every scenario drives the real code against:
+
+- the mock completion server (``mock_llm_server.py``), scripted so the intent
+  classifier gets the expected intent JSON and each policy agent run makes
+  ``--tool-steps`` tool calls before its final answer;
+- fake MCP stdio servers (``fake_mcp_server.py``) in place of duckduckgo-search
+  and playwright, started through the real MCP session pool;
+- the ticket service (``app_server.app`` under uvicorn) on the in-memory repository.
+
+Scenarios:
+
+- ``classify_llm``: IntentClassifierAgent.aget_intent on unseen queries with the
+  local fast path off (micro-batched LLM calls).
+- ``classify_tiered``: the same on a repeating query mix with the cache and
+  fast path as configured.
+- ``policy_mcp``: PolicyAgentManager.process_query for flight status and seat
+  questions (routed MCP agent runs).
+- ``policy_kb``: the same for pet travel and cancellation policy questions
+  (knowledge base answers).
+- ``policy_cached``: repeated questions answered from the policy cache.
+- ``chat_router``: ChatRouter.reply, the routing behind ``main.process_user_message``
+  and ``/api/chat``: policy questions mixed with complete trip-cancellation
+  flows (cancel, ticket ID, user ID, confirm) that call the ticket service.
+- ``ticket_cancel`` / ``ticket_confirm``: the ticket service endpoints over HTTP.
+
+Each scenario reports throughput, p50/p95/p99 latency, errors, LLM and tool
+calls and the process's memory (RSS; the fake MCP server processes are not
+included). ``--json`` saves the results with the git commit so runs can be
+compared, and ``--compare`` prints the change against an earlier file:
+
+    python benchmarks/bench_suite.py --json benchmarks/results/baseline.json
+    python benchmarks/bench_suite.py --scenarios policy_mcp chat_router --compare benchmarks/results/baseline.json
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Awaitable, Callable, List, Tuple
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(BENCH_DIR))
+sys.path.append(os.path.join(os.path.dirname(BENCH_DIR), "src"))
+sys.path.append(BENCH_DIR)
+
+from fake_mcp_server import mcp_config
+from mock_llm_server import MockCompletionServer
+
+CLASSIFIER_MODEL = "openai/gpt-oss-20b"
+POLICY_ANSWER = "Mock policy answer: check the booking page for the latest details and fees."
+QUERIES = [
+    ("Flight Status", "what is the status of flight NX104 tomorrow"),
+    ("Flight Status", "is my flight from London to Paris delayed"),
+    ("Seat Availability", "are there window seats left on flight NX120"),
+    ("Seat Availability", "can I still get an aisle seat on my Chennai flight"),
+    ("Pet Travel", "can I bring my dog in the cabin"),
+    ("Pet Travel", "what is the pet fee for cats"),
+    ("Cancellation Policy", "how much does it cost to cancel my ticket"),
+    ("Cancellation Policy", "when will I get my refund after cancelling"),
+    ("Cancel Trip", "please cancel my trip"),
+    ("Cancel Trip", "I want to cancel my flight booking"),
+]
+MCP_INTENTS = ("Flight Status", "Seat Availability")
+KB_INTENTS = ("Pet Travel", "Cancellation Policy")
+SCENARIOS = (
+    "classify_llm", "classify_tiered", "policy_mcp", "policy_kb", "policy_cached",
+    "chat_router", "ticket_cancel", "ticket_confirm",
+)
+
+Step = Callable[[], Awaitable[None]]
+
+
+def scripted_content(payload: dict) -> str:
+    """Intent JSON for the query a classifier prompt contains, and a canned answer for anything else"""
+    if payload.get("model") != CLASSIFIER_MODEL:
+        return POLICY_ANSWER
+    prompt = str(payload.get("messages", [{}])[-1].get("content", "")).lower()
+    intent = next((intent for intent, text in QUERIES if text.lower() in prompt), "Flight Status")
+    return json.dumps({"detected_intents": [{
+        "type": intent,
+        "sub_intent": intent,
+        "confidence": 0.95,
+        "justification": "Scripted benchmark classification",
+    }]})
+
+
+def configure_environment(args, llm_url: str, work_dir: str):
+    """Point every client at the stand-ins; must run before anything imports config.settings"""
+    mcp_config_file = os.path.join(work_dir, "mcp.json")
+    with open(mcp_config_file, "w") as f:
+        json.dump(mcp_config(args.search_latency_ms, args.browser_latency_ms), f)
+    docs_dir = os.path.join(work_dir, "policies")
+    os.environ.update({
+        "GROQ_API_KEY": "mock",
+        "GROQ_BASE_URL": llm_url,  # groq SDK (intent classifier)
+        "GROQ_API_BASE": llm_url,  # langchain-groq (policy agent)
+        "MCP_CONFIG_FILE": mcp_config_file,
+        "MCP_POOL_SIZE": str(args.mcp_pool_size),
+        "MCP_HEALTH_CHECK_INTERVAL": "0",
+        "CACHE_URL": "memory://",
+        "KB_DOCS_DIR": docs_dir,
+        "KB_INDEX_DIR": os.path.join(work_dir, "kb-index"),
+        "KB_REFRESH_INTERVAL": "0",
+        "TICKET_REPOSITORY_URL": "memory://",
+        "TRACING_EXPORTER": "",
+    })
+
+    # The repo ships no policy documents, so index synthetic ones (imports settings, hence last)
+    from bench_knowledge_base import write_documents
+
+    os.makedirs(docs_dir)
+    write_documents(docs_dir, args.kb_copies, random.Random(args.seed))
+
+
+def memory_mb() -> Tuple[float, float]:
+    """(current, peak) resident set size of this process in MB"""
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak = peak / 2 ** 20 if sys.platform == "darwin" else peak / 1024
+    try:
+        with open("/proc/self/statm") as f:
+            current = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError):
+        current = peak
+    return round(current, 1), round(peak, 1)
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def expect(condition: bool, detail: str):
+    if not condition:
+        raise RuntimeError(detail)
+
+
+async def drive(conversations: List[List[Step]], concurrency: int) -> Tuple[List[float], int, float]:
+    """Run conversations on `concurrency` workers; a conversation's steps run in order on one worker.
+
+    Returns per-step latencies, the error count and the elapsed time. A failed
+    step ends its conversation, since later steps depend on it.
+    """
+    latencies: List[float] = []
+    errors = 0
+    pending = iter(conversations)
+
+    async def worker():
+        nonlocal errors
+        for steps in pending:
+            for step in steps:
+                start = time.perf_counter()
+                try:
+                    await step()
+                except Exception as e:
+                    errors += 1
+                    if errors <= 3:
+                        print(f"⚠️ Benchmark step failed: {e}")
+                    latencies.append(time.perf_counter() - start)
+                    break
+                latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - start
+
+
+def percentile(ordered: List[float], q: float) -> float:
+    """Nearest-rank percentile of an ascending list, so p95/p99 never fall below the median"""
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+def summarize(name: str, latencies: List[float], errors: int, elapsed: float, concurrency: int) -> dict:
+    ordered = sorted(latencies) or [0.0]
+    return {
+        "scenario": name,
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(statistics.mean(ordered) * 1000, 2),
+        "p50_ms": round(statistics.median(ordered) * 1000, 2),
+        "p95_ms": round(percentile(ordered, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(ordered, 0.99) * 1000, 2),
+    }
+
+
+class BenchContext:
+    """Stand-ins and shared services, created only for the scenarios that need them"""
+
+    def __init__(self, args, llm: MockCompletionServer):
+        self.args = args
+        self.llm = llm
+        self._manager = None
+        self._ticket_server = None
+        self.tickets: List[Tuple[int, int]] = []
+        self.cleanup: List[Callable[[], Awaitable]] = []
+
+    def rng(self, scenario: str) -> random.Random:
+        return random.Random(f"{self.args.seed}:{scenario}")
+
+    async def manager(self):
+        if self._manager is None:
+            from policyagent import PolicyAgentManager
+
+            self._manager = PolicyAgentManager()
+            await self._manager.initialize()
+        return self._manager
+
+    def ticket_url(self) -> str:
+        if self._ticket_server is None:
+            import app_server
+            from load_ticket_service import ServerThread
+            from mock_postgrest import PostgrestStore, seed_ticket_data
+            from ticketrepository import InMemoryTicketRepository
+
+            store = seed_ticket_data(PostgrestStore(), tickets=self.args.tickets)
+            app_server.repository = InMemoryTicketRepository(store.tables["tickets"], store.tables["flights"])
+            self.tickets = [(row["ticket_id"], row["user_id"]) for row in store.tables["tickets"]]
+            self._ticket_server = ServerThread(app_server.app).__enter__()
+        return self._ticket_server.url
+
+    async def close(self):
+        for close in self.cleanup:
+            await close()
+        if self._manager is not None:
+            await self._manager.close()
+        if self._ticket_server is not None:
+            self._ticket_server.__exit__(None, None, None)
+
+
+async def classify_llm(ctx: BenchContext) -> Tuple[List[List[Step]], dict]:
+    from intentclassifier import IntentClassifierAgent
+
+    classifier = IntentClassifierAgent()
+    classifier.local_classifier = None
+    ctx.cleanup.append(classifier.aclose)
+    rng = ctx.rng("classify_llm")
+
+    def step(query: str, expected: str) -> Step:
+        async def run():
+            intents = await classifier.aget_intent(query)
+            expect(bool(intents) and intents[0].get("type") == expected, f"classified {query!r} as {intents}")
+        return run
+
+    conversations = []
+    for i in range(ctx.args.requests):
+        intent, text = rng.choice(QUERIES)
+        conversations.append([step(f"{text} #{i}", intent)])
+    return conversations, {"tiers": lambda: classifier.get_tier_stats()}
+
+
+async def classify_tiered(ctx: BenchContext) -> Tuple[List[List[Step]], dict]:
+    from intentclassifier import IntentClassifierAgent
+
+    classifier = IntentClassifierAgent()
+    ctx.cleanup.append(classifier.aclose)
+    rng = ctx.rng("classify_tiered")
+
+    def step(query: str) -> Step:
+        async def run():
+            expect(bool(await classifier.aget_intent(query)), f"no intent for {query!r}")
+        return run
+
+    conversations = [[step(rng.choice(QUERIES)[1])] for _ in range(ctx.args.requests)]
+    return conversations, {"tiers": lambda: classifier.get_tier_stats()}
+
+
+def _policy_step(manager, query: str, intent: str, conversation_id: str) -> Step:
+    async def run():
+        response = await manager.process_query(query, [{"type": intent}], conversation_id)
+        expect(not response.startswith("I apologize"), response)
+    return run
+
+
+async def _policy_scenario(ctx: BenchContext, name: str, intents, requests: int) -> Tuple[List[List[Step]], dict]:
+    manager = await ctx.manager()
+    rng = ctx.rng(name)
+    queries = [(intent, text) for intent, text in QUERIES if intent in intents]
+    routes_before = dict(manager.route_counts)
+    conversations = []
+    for i in range(requests):
+        intent, text = rng.choice(queries)
+        conversations.append([_policy_step(manager, f"{text} #{name}-{i}", intent, f"{name}-{i}")])
+    routes = lambda: {k: v - routes_before.get(k, 0) for k, v in manager.route_counts.items()}
+    return conversations, {"routes": routes}
+
+
+async def policy_mcp(ctx: BenchContext):
+    return await _policy_scenario(ctx, "policy_mcp", MCP_INTENTS, ctx.args.agent_requests)
+
+
+async def policy_kb(ctx: BenchContext):
+    return await _policy_scenario(ctx, "policy_kb", KB_INTENTS, ctx.args.requests)
+
+
+async def policy_cached(ctx: BenchContext) -> Tuple[List[List[Step]], dict]:
+    manager = await ctx.manager()
+    rng = ctx.rng("policy_cached")
+    queries = [(intent, text) for intent, text in QUERIES if intent != "Cancel Trip"]
+    for n, (intent, text) in enumerate(queries):
+        # Warm the cache outside the measurement; each query opens its own conversation,
+        # since answers given with history are cached for that history only
+        await manager.process_query(text, [{"type": intent}], f"policy_cached-warmup-{n}")
+    stats_before = manager.get_cache_stats()
+    conversations = []
+    for i in range(ctx.args.requests):
+        intent, text = rng.choice(queries)
+        conversations.append([_policy_step(manager, text, intent, f"policy_cached-{i}")])
+    hits = lambda: manager.get_cache_stats()["hits"] - stats_before["hits"]
+    return conversations, {"cache_hits": hits}
+
+
+async def chat_router(ctx: BenchContext) -> Tuple[List[List[Step]], dict]:
+    from canceltripagent import CancelTripAgent
+    from config.settings import settings
+    from intentclassifier import IntentClassifierAgent
+    from router import ChatRouter
+    from speculation import SpeculativePipeline
+
+    manager = await ctx.manager()
+    ticket_url = ctx.ticket_url()
+    pipeline = SpeculativePipeline(manager, IntentClassifierAgent(), enabled=settings.SPECULATIVE_POLICY_ENABLED)
+    router = ChatRouter(pipeline, cancel_agent=CancelTripAgent(api_url=ticket_url))
+    ctx.cleanup.append(pipeline.classifier.aclose)
+    ctx.cleanup.append(router.cancel_agent.aclose)
+    rng = ctx.rng("chat_router")
+    policy_queries = [(intent, text) for intent, text in QUERIES if intent != "Cancel Trip"]
+    cancel_queries = [text for intent, text in QUERIES if intent == "Cancel Trip"]
+
+    def step(message: str, conversation_id: str) -> Step:
+        async def run():
+            result = await router.reply(message, conversation_id)
+            expect(result["type"] != "error", result["content"])
+        return run
+
+    conversations = []
+    for i in range(ctx.args.agent_requests):
+        conversation_id = f"chat-{i}"
+        if rng.random() < ctx.args.cancel_share:
+            ticket_id, user_id = rng.choice(ctx.tickets)
+            messages = [f"{rng.choice(cancel_queries)} #{i}", str(ticket_id), str(user_id), "yes"]
+        else:
+            messages = [f"{rng.choice(policy_queries)[1]} #chat-{i}"]
+        conversations.append([step(message, conversation_id) for message in messages])
+    return conversations, {"routes": lambda: dict(router.routes), "speculation": lambda: pipeline.get_stats()["outcomes"]}
+
+
+async def _ticket_scenario(ctx: BenchContext, name: str, path: str, body: Callable) -> Tuple[List[List[Step]], dict]:
+    import httpx
+
+    url = ctx.ticket_url()
+    limits = httpx.Limits(max_connections=ctx.args.concurrency, max_keepalive_connections=ctx.args.concurrency)
+    client = httpx.AsyncClient(base_url=url, limits=limits, timeout=60.0)
+    ctx.cleanup.append(client.aclose)
+    rng = ctx.rng(name)
+
+    def step(payload: dict) -> Step:
+        async def run():
+            resp = await client.post(path, json=payload)
+            expect(resp.status_code < 500, f"{path} returned {resp.status_code}")
+        return run
+
+    return [[step(body(rng.choice(ctx.tickets)))] for _ in range(ctx.args.requests)], {}
+
+
+async def ticket_cancel(ctx: BenchContext):
+    return await _ticket_scenario(ctx, "ticket_cancel", "/mcp/db/cancel_ticket", lambda t: {"ticket_id": t[0]})
+
+
+async def ticket_confirm(ctx: BenchContext):
+    return await _ticket_scenario(
+        ctx, "ticket_confirm", "/mcp/db/confirm_flight", lambda t: {"ticket_id": t[0], "user_id": t[1]}
+    )
+
+
+async def run_suite(args, llm: MockCompletionServer) -> List[dict]:
+    ctx = BenchContext(args, llm)
+    builders = {name: globals()[name] for name in SCENARIOS}
+    results = []
+    try:
+        for name in args.scenarios:
+            conversations, extras = await builders[name](ctx)
+            rss_before, _ = memory_mb()
+            llm_before, tools_before = llm.requests, llm.tool_calls
+            latencies, errors, elapsed = await drive(conversations, args.concurrency)
+            rss_after, peak = memory_mb()
+            result = summarize(name, latencies, errors, elapsed, args.concurrency)
+            result.update({
+                "llm_calls": llm.requests - llm_before,
+                "tool_calls": llm.tool_calls - tools_before,
+                "rss_mb": rss_after,
+                "rss_delta_mb": round(rss_after - rss_before, 1),
+                "peak_rss_mb": peak,
+                **{key: value() for key, value in extras.items()},
+            })
+            results.append(result)
+            print(f"✅ {name}: {result['throughput_rps']} req/s, p95 {result['p95_ms']} ms, {errors} errors")
+    finally:
+        await ctx.close()
+    return results
+
+
+def compare(results: List[dict], path: str, threshold: float) -> int:
+    """Print the change against an earlier results file; returns the number of regressions"""
+    with open(path) as f:
+        baseline = json.load(f)
+    previous = {r["scenario"]: r for r in baseline["scenarios"]}
+    print(f"\nCompared with {path} (commit {baseline.get('commit')}):")
+    print(f"{'scenario':<16} {'req/s':>20} {'p95 ms':>22} {'rss MB':>16}")
+    regressions = 0
+    for r in results:
+        old = previous.get(r["scenario"])
+        if old is None:
+            continue
+        throughput = (r["throughput_rps"] - old["throughput_rps"]) / old["throughput_rps"] if old["throughput_rps"] else 0.0
+        p95 = (r["p95_ms"] - old["p95_ms"]) / old["p95_ms"] if old["p95_ms"] else 0.0
+        regressed = throughput < -threshold or p95 > threshold
+        regressions += regressed
+        print(
+            f"{r['scenario']:<16} {old['throughput_rps']:>8} → {r['throughput_rps']:<8} ({throughput:+.0%})"
+            f" {old['p95_ms']:>8} → {r['p95_ms']:<8} ({p95:+.0%}) {old['rss_mb']:>6} → {r['rss_mb']:<6}"
+            f"{'  ❌ regression' if regressed else ''}"
+        )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=10, help="Concurrent users per scenario")
+    parser.add_argument("--requests", type=int, default=500, help="Requests per fast scenario")
+    parser.add_argument("--agent-requests", type=int, default=50, help="Requests (conversations) for policy_mcp and chat_router")
+    parser.add_argument("--llm-latency-ms", type=float, default=200.0, help="Mock LLM latency per call")
+    parser.add_argument("--llm-jitter-ms", type=float, default=0.0)
+    parser.add_argument("--tool-steps", type=int, default=2, help="Tool calls per MCP agent run")
+    parser.add_argument("--search-latency-ms", type=float, default=300.0, help="Fake web search tool latency")
+    parser.add_argument("--browser-latency-ms", type=float, default=500.0, help="Fake browser tool latency")
+    parser.add_argument("--mcp-pool-size", type=int, default=2, help="Warm sessions per fake MCP server")
+    parser.add_argument("--kb-copies", type=int, default=5, help="Synthetic policy documents per topic")
+    parser.add_argument("--tickets", type=int, default=10000, help="Tickets seeded in the in-memory store")
+    parser.add_argument("--cancel-share", type=float, default=0.3, help="Share of chat_router conversations that cancel a trip")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="Write results to this file")
+    parser.add_argument("--compare", help="Earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative change flagged as a regression")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    llm = MockCompletionServer(
+        latency_ms=args.llm_latency_ms, jitter_ms=args.llm_jitter_ms, content=scripted_content, tool_steps=args.tool_steps
+    ).start_in_thread()
+    with tempfile.TemporaryDirectory() as tmp:
+        configure_environment(args, llm.base_url, tmp)
+        try:
+            results = asyncio.run(run_suite(args, llm))
+        finally:
+            llm.stop_thread()
+
+    print(f"\n{'scenario':<16} {'reqs':>6} {'err':>4} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'rss MB':>8}")
+    for r in results:
+        print(
+            f"{r['scenario']:<16} {r['requests']:>6} {r['errors']:>4} {r['throughput_rps']:>9} "
+            f"{r['p50_ms']:>9} {r['p95_ms']:>9} {r['p99_ms']:>9} {r['rss_mb']:>8}"
+        )
+
+    regressions = compare(results, args.compare, args.threshold) if args.compare else 0
+    if args.json:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+        with open(args.json, "w") as f:
+            json.dump({
+                "commit": git_commit(),
+                "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "args": vars(args),
+                "scenarios": results,
+            }, f, indent=2)
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Fake MCP stdio servers standing in for duckduckgo-search and playwright in offline benchmarks.
+
+Every tool waits ``--latency-ms`` (a web search or page load) and returns
+deterministic text, so agent runs exercise the real MCP client, session pool
+and tool routing without network access or a browser.
+
+    python benchmarks/fake_mcp_server.py --kind search --latency-ms 300
+    python benchmarks/fake_mcp_server.py --kind browser --latency-ms 800
+"""
+import argparse
+import asyncio
+import hashlib
+import os
+import sys
+from typing import List
+
+from mcp.server.fastmcp import FastMCP
+
+# Server names match browser_mcp.json, so the default tool profiles route to them
+SERVER_NAMES = {"search": "duckduckgo-search", "browser": "playwright"}
+
+
+def _page(seed: str, paragraphs: int = 3) -> str:
+    """Stable filler text for a URL or query"""
+    digest = hashlib.sha256(seed.encode()).hexdigest()
+    return "\n\n".join(
+        f"Section {i + 1} ({digest[i * 8:(i + 1) * 8]}): policies, fees and schedules for {seed}."
+        for i in range(paragraphs)
+    )
+
+
+def build_server(kind: str, latency: float) -> FastMCP:
+    server = FastMCP(f"fake-{SERVER_NAMES[kind]}")
+
+    if kind == "search":
+        @server.tool()
+        async def search(query: str, max_results: int = 10) -> str:
+            """Search the web and return titles, URLs and summaries"""
+            await asyncio.sleep(latency)
+            slug = hashlib.sha256(query.encode()).hexdigest()[:8]
+            return "\n".join(
+                f"{i + 1}. {query} - result {i + 1}\n   URL: https://example.com/{slug}/{i + 1}\n   Summary: {_page(query, 1)}"
+                for i in range(min(max_results, 5))
+            )
+
+        @server.tool()
+        async def fetch_content(url: str) -> str:
+            """Fetch and parse the text content of a web page"""
+            await asyncio.sleep(latency)
+            return _page(url)
+
+    else:
+        state = {"url": "about:blank"}
+
+        @server.tool()
+        async def browser_navigate(url: str) -> str:
+            """Navigate to a URL"""
+            await asyncio.sleep(latency)
+            state["url"] = url
+            return f"Navigated to {url}"
+
+        @server.tool()
+        async def browser_snapshot() -> str:
+            """Capture an accessibility snapshot of the current page"""
+            await asyncio.sleep(latency)
+            return f"- Page URL: {state['url']}\n- Page content:\n{_page(state['url'])}"
+
+        @server.tool()
+        async def browser_wait_for(time: float = 1.0) -> str:
+            """Wait for text to appear or a number of seconds to pass"""
+            await asyncio.sleep(latency)
+            return "Waited"
+
+        @server.tool()
+        async def browser_click(element: str, ref: str) -> str:
+            """Click an element on the page"""
+            await asyncio.sleep(latency)
+            return f"Clicked {element}"
+
+        @server.tool()
+        async def browser_type(element: str, ref: str, text: str) -> str:
+            """Type text into an editable element"""
+            await asyncio.sleep(latency)
+            return f"Typed into {element}"
+
+        @server.tool()
+        async def browser_select_option(element: str, ref: str, values: List[str]) -> str:
+            """Select options in a dropdown"""
+            await asyncio.sleep(latency)
+            return f"Selected {', '.join(values)} in {element}"
+
+        @server.tool()
+        async def browser_press_key(key: str) -> str:
+            """Press a key on the keyboard"""
+            await asyncio.sleep(latency)
+            return f"Pressed {key}"
+
+        @server.tool()
+        async def browser_navigate_back() -> str:
+            """Go back to the previous page"""
+            await asyncio.sleep(latency)
+            return "Navigated back"
+
+    return server
+
+
+def mcp_config(search_latency_ms: float, browser_latency_ms: float) -> dict:
+    """An MCP client config ({"mcpServers": ...}) that launches both fake servers"""
+    script = os.path.abspath(__file__)
+    return {
+        "mcpServers": {
+            SERVER_NAMES["search"]: {
+                "command": sys.executable,
+                "args": [script, "--kind", "search", "--latency-ms", str(search_latency_ms)],
+            },
+            SERVER_NAMES["browser"]: {
+                "command": sys.executable,
+                "args": [script, "--kind", "browser", "--latency-ms", str(browser_latency_ms)],
+            },
+        }
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--kind", choices=sorted(SERVER_NAMES), required=True)
+    parser.add_argument("--latency-ms", type=float, default=300.0, help="Delay of every tool call")
+    args = parser.parse_args()
+    # stdout carries the MCP protocol, so nothing else may be printed
+    build_server(args.kind, args.latency_ms / 1000).run()
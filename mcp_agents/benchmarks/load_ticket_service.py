@@ -0,0 +1,171 @@
+"""Load test of /mcp/db/cancel_ticket: sync threadpool handlers vs the async data layer.
+
+Serves the ticket service with uvicorn and drives it over HTTP with N
+concurrent clients:
+
+- ``sync``: the previous shape, a plain ``def`` handler doing a blocking
+  PostgREST call, so FastAPI runs it on its default threadpool.
+- ``async``: ``app_server.app`` itself, awaiting SupabaseTicketRepository.
+- ``async-sqlite`` / ``async-memory``: the same app on the offline
+  repositories, which profiles the service without any network noise.
+
+The first two talk to the in-memory PostgREST stand-in.
+
+    python benchmarks/load_ticket_service.py --latency-ms 20 --concurrency 10 100 200
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import socket
+import statistics
+import sys
+import threading
+import time
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, HTTPException
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(os.path.dirname(BENCH_DIR), "src"))
+sys.path.append(BENCH_DIR)
+
+from mock_postgrest import MockPostgrestServer, PostgrestStore, seed_ticket_data
+from ticketrepository import InMemoryTicketRepository, SQLiteTicketRepository
+
+DUMMY_KEY = "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoiYW5vbiJ9.bW9jaw"
+
+
+def sync_app(postgrest_url: str) -> FastAPI:
+    """The ticket service as it was: blocking database calls in a def handler"""
+    app = FastAPI()
+    client = httpx.Client(
+        base_url=f"{postgrest_url}/rest/v1",
+        headers={"apikey": DUMMY_KEY, "Authorization": f"Bearer {DUMMY_KEY}"},
+    )
+
+    @app.post("/mcp/db/cancel_ticket")
+    def cancel_ticket(req: dict):
+        outcome = client.post("/rpc/cancel_ticket_atomic", json={"p_ticket_id": req["ticket_id"]}).json()
+        if outcome == "not_found":
+            raise HTTPException(status_code=404, detail="Ticket not found")
+        return {"status": "success", "data": {"ticket_id": req["ticket_id"], "outcome": outcome}}
+
+    return app
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class ServerThread:
+    """Run an ASGI app under uvicorn on a background thread"""
+
+    def __init__(self, app):
+        self.port = _free_port()
+        self.server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=self.port, log_level="warning"))
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def __enter__(self):
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc):
+        self.server.should_exit = True
+        self.thread.join()
+
+
+async def drive(url: str, concurrency: int, requests: int, ticket_ids) -> dict:
+    latencies, errors = [], 0
+    remaining = iter(range(requests))
+    rng = random.Random(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60.0) as client:
+        async def worker():
+            nonlocal errors
+            for _ in remaining:
+                start = time.perf_counter()
+                try:
+                    resp = await client.post("/mcp/db/cancel_ticket", json={"ticket_id": rng.choice(ticket_ids)})
+                    if resp.status_code >= 500:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    ordered = sorted(latencies)
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": errors,
+        "req_per_sec": round(requests / elapsed, 1),
+        "p50_ms": round(statistics.median(ordered) * 1000, 2),
+        "p99_ms": round(ordered[math.ceil(0.99 * len(ordered)) - 1] * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[10, 100, 200])
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per concurrency level")
+    parser.add_argument("--tickets", type=int, default=10000)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    store = seed_ticket_data(PostgrestStore(), tickets=args.tickets)
+    postgrest = MockPostgrestServer(store, latency_ms=args.latency_ms).start()
+    os.environ["SUPABASE_URL"] = postgrest.url
+    os.environ["SUPABASE_KEY"] = DUMMY_KEY
+    os.environ["TICKET_REPOSITORY_URL"] = postgrest.url
+
+    import app_server
+
+    ticket_ids = [row["ticket_id"] for row in store.tables["tickets"]]
+    variants = [
+        ("sync", sync_app(postgrest.url), None),
+        ("async", app_server.app, None),
+        ("async-sqlite", app_server.app, SQLiteTicketRepository),
+        ("async-memory", app_server.app, InMemoryTicketRepository),
+    ]
+    results = []
+    try:
+        for variant, app, repository_class in variants:
+            if repository_class is not None:
+                # Fresh copy of the seed data, loaded straight into the offline repository
+                fresh = seed_ticket_data(PostgrestStore(), tickets=args.tickets)
+                app_server.repository = repository_class()
+                app_server.repository.load(fresh.tables["tickets"], fresh.tables["flights"])
+            with ServerThread(app) as server:
+                for concurrency in args.concurrency:
+                    result = asyncio.run(drive(server.url, concurrency, args.requests, ticket_ids))
+                    results.append({"variant": variant, **result})
+    finally:
+        postgrest.stop()
+
+    print(f"{'variant':<14} {'users':>6} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for r in results:
+        print(f"{r['variant']:<14} {r['concurrency']:>6} {r['req_per_sec']:>9} {r['p50_ms']:>9} {r['p99_ms']:>9} {r['errors']:>7}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
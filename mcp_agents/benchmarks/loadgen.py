@@ -0,0 +1,328 @@
+"""Replay recorded conversations against the chat server and the ticket service.
+
+The log is JSON lines, one turn per line, in conversation order:
+
+    {"conversation_id": "cancel-1", "message": "I need to cancel my trip"}
+    {"conversation_id": "cancel-1", "message": "1042", "delay_ms": 3000}
+    {"conversation_id": "api-1", "path": "/mcp/db/cancel_ticket", "json": {"ticket_id": 1042}}
+
+``message`` turns go to POST /api/chat on --chat-url, ``path`` turns to the
+ticket service on --ticket-url (optional ``headers``). ``delay_ms`` is the
+user's think time before the turn, scaled by --think-scale.
+
+One virtual user replays a whole conversation, turn by turn, so a
+cancellation flow always sees ticket ID, user ID and confirmation in order.
+Conversations run concurrently, and the log is replayed from the top when it
+runs out; every replay gets a fresh conversation ID. For each concurrency
+level the run reports throughput, latency, errors and queueing delay, then
+names the level where the service saturated.
+
+With --rate, conversations arrive at that rate (open loop) and wait for a
+free virtual user; the wait is the client-side queueing delay, and arrivals
+still waiting when the level ends are the backlog. Without it each virtual
+user starts its next conversation straight away (closed loop). Either way,
+server-side queueing is estimated as median latency above the least loaded
+level's.
+
+    python benchmarks/loadgen.py --chat-url http://localhost:8000 --local-ticket-service \\
+        --concurrency 1 5 10 25 50 --duration 30
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import sys
+import time
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(os.path.dirname(BENCH_DIR), "src"))
+sys.path.append(BENCH_DIR)
+
+DEFAULT_LOG = os.path.join(BENCH_DIR, "conversations.jsonl")
+
+Conversation = Tuple[str, List[dict]]
+
+
+def load_conversations(path: str) -> List[Conversation]:
+    """Turns grouped by conversation ID, conversations in order of first appearance"""
+    conversations: "OrderedDict[str, List[dict]]" = OrderedDict()
+    with open(path, encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            turn = json.loads(line)
+            if "conversation_id" not in turn or ("message" in turn) == ("path" in turn):
+                raise ValueError(f"{path}:{number}: a turn needs conversation_id and either message or path")
+            conversations.setdefault(str(turn["conversation_id"]), []).append(turn)
+    if not conversations:
+        raise ValueError(f"{path}: no conversations")
+    return list(conversations.items())
+
+
+def _pct(ordered: List[float], q: float) -> float:
+    return round(ordered[math.ceil(q * len(ordered)) - 1] * 1000, 2) if ordered else 0.0
+
+
+class LevelStats:
+    """Turn latencies, errors and queueing delay for one concurrency level"""
+
+    def __init__(self, concurrency: int):
+        self.concurrency = concurrency
+        self.latencies: Dict[str, List[float]] = {"chat": [], "ticket": []}
+        self.errors: Counter = Counter()
+        self.statuses: Counter = Counter()
+        self.queue_delays: List[float] = []
+        self.conversations = 0
+        self.backlog = 0
+
+    def record(self, target: str, seconds: float, status: str, ok: bool):
+        self.latencies[target].append(seconds)
+        self.statuses[status] += 1
+        if not ok:
+            self.errors[target] += 1
+
+    def summary(self, elapsed: float, open_loop: bool) -> dict:
+        every = sorted(self.latencies["chat"] + self.latencies["ticket"])
+        turns = len(every)
+        result = {
+            "concurrency": self.concurrency,
+            "conversations": self.conversations,
+            "turns": turns,
+            "errors": sum(self.errors.values()),
+            "error_rate": round(sum(self.errors.values()) / turns, 4) if turns else 0.0,
+            "turns_per_sec": round(turns / elapsed, 2) if elapsed else 0.0,
+            "p50_ms": _pct(every, 0.5),
+            "p95_ms": _pct(every, 0.95),
+            "p99_ms": _pct(every, 0.99),
+            "queue_p50_ms": None,
+            "queue_p95_ms": None,
+            "backlog": self.backlog,
+            "statuses": dict(self.statuses),
+            "targets": {},
+        }
+        if open_loop:
+            delays = sorted(self.queue_delays)
+            result["queue_p50_ms"] = _pct(delays, 0.5)
+            result["queue_p95_ms"] = _pct(delays, 0.95)
+        for target, latencies in self.latencies.items():
+            if latencies:
+                ordered = sorted(latencies)
+                result["targets"][target] = {
+                    "turns": len(ordered),
+                    "errors": self.errors[target],
+                    "p50_ms": _pct(ordered, 0.5),
+                    "p95_ms": _pct(ordered, 0.95),
+                }
+        return result
+
+
+class Replayer:
+    """Sends one conversation's turns, in order, to the chat server or the ticket service"""
+
+    def __init__(self, chat: Optional[httpx.AsyncClient], ticket: Optional[httpx.AsyncClient], think_scale: float):
+        self.chat = chat
+        self.ticket = ticket
+        self.think_scale = think_scale
+        self.skipped: Counter = Counter()
+
+    async def send(self, turn: dict, conversation_id: str) -> Tuple[str, str, bool]:
+        """(target, status, ok) for one turn"""
+        if "message" in turn:
+            resp = await self.chat.post("/api/chat", json={"message": turn["message"], "conversationId": conversation_id})
+            ok = resp.status_code == 200 and "error" not in resp.json()
+            return "chat", str(resp.status_code), ok
+        resp = await self.ticket.post(turn["path"], json=turn.get("json", {}), headers=turn.get("headers"))
+        # 404 and 409 are answers (unknown ticket, wrong user), not failures of the service
+        return "ticket", str(resp.status_code), resp.status_code < 500
+
+    async def replay(self, turns: List[dict], conversation_id: str, stats: LevelStats):
+        for turn in turns:
+            client = self.chat if "message" in turn else self.ticket
+            if client is None:
+                self.skipped["chat" if "message" in turn else "ticket"] += 1
+                continue
+            think = turn.get("delay_ms", 0) / 1000 * self.think_scale
+            if think > 0:
+                await asyncio.sleep(think)
+            start = time.perf_counter()
+            target = "chat" if "message" in turn else "ticket"
+            try:
+                target, status, ok = await self.send(turn, conversation_id)
+            except (httpx.HTTPError, ValueError) as e:
+                status, ok = type(e).__name__, False
+            stats.record(target, time.perf_counter() - start, status, ok)
+            if not ok:
+                # Later turns depend on this one (a flow step, a confirmation), so stop here
+                break
+        stats.conversations += 1
+
+
+async def run_level(replayer: Replayer, conversations: List[Conversation], concurrency: int, args, level: int) -> dict:
+    """Replay conversations with `concurrency` virtual users for args.duration seconds"""
+    stats = LevelStats(concurrency)
+    open_loop = args.rate > 0
+    queue: asyncio.Queue = asyncio.Queue(maxsize=0 if open_loop else concurrency)
+    start = time.perf_counter()
+    deadline = start + args.duration
+
+    async def arrivals():
+        n = 0
+        while True:
+            if open_loop:
+                due = start + n / args.rate
+                await asyncio.sleep(max(0.0, due - time.perf_counter()))
+            else:
+                due = None
+            if time.perf_counter() >= deadline:
+                break
+            conversation_id, turns = conversations[n % len(conversations)]
+            await queue.put((due, f"{conversation_id}#{level}.{n // len(conversations)}", turns))
+            n += 1
+        # Arrivals nobody picked up before the deadline are the backlog, not work to finish
+        while not queue.empty():
+            queue.get_nowait()
+            if open_loop:
+                stats.backlog += 1
+        for _ in range(concurrency):
+            await queue.put(None)
+
+    async def virtual_user():
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            due, conversation_id, turns = item
+            if due is not None:
+                stats.queue_delays.append(time.perf_counter() - due)
+            await replayer.replay(turns, conversation_id, stats)
+
+    await asyncio.gather(arrivals(), *(virtual_user() for _ in range(concurrency)))
+    return stats.summary(time.perf_counter() - start, open_loop)
+
+
+def find_saturation(levels: List[dict], min_gain: float, max_error_rate: float, open_loop: bool) -> Optional[dict]:
+    """The first level that errors, falls behind the arrival rate or stops scaling throughput"""
+    previous = None
+    for level in levels:
+        reasons = []
+        if level["error_rate"] > max_error_rate:
+            reasons.append(f"error rate {level['error_rate']:.1%}")
+        if level["backlog"]:
+            reasons.append(f"{level['backlog']} conversations still queued")
+        if previous is not None and not open_loop and previous["turns_per_sec"]:
+            gain = level["turns_per_sec"] / previous["turns_per_sec"] - 1
+            if gain < min_gain:
+                reasons.append(f"throughput {gain:+.0%} at {level['concurrency'] / previous['concurrency']:.1f}x users")
+        if reasons:
+            return {
+                "concurrency": level["concurrency"],
+                "last_healthy": previous["concurrency"] if previous else None,
+                "reasons": reasons,
+            }
+        previous = level
+    return None
+
+
+async def run(args, conversations: List[Conversation], ticket_url: Optional[str]) -> dict:
+    top = max(args.concurrency)
+    limits = httpx.Limits(max_connections=top, max_keepalive_connections=top)
+    chat = httpx.AsyncClient(base_url=args.chat_url, limits=limits, timeout=args.timeout) if args.chat_url else None
+    ticket = httpx.AsyncClient(base_url=ticket_url, limits=limits, timeout=args.timeout) if ticket_url else None
+    replayer = Replayer(chat, ticket, args.think_scale)
+    levels = []
+    try:
+        for index, concurrency in enumerate(args.concurrency):
+            level = await run_level(replayer, conversations, concurrency, args, index)
+            levels.append(level)
+            queue = f" queue p95 {level['queue_p95_ms']}ms" if level["queue_p95_ms"] is not None else ""
+            print(f"📈 {concurrency} users: {level['turns_per_sec']} turns/s, p95 {level['p95_ms']}ms, "
+                  f"{level['error_rate']:.1%} errors{queue}")
+    finally:
+        for client in (chat, ticket):
+            if client is not None:
+                await client.aclose()
+
+    baseline = min((level["p50_ms"] for level in levels if level["turns"]), default=0.0)
+    for level in levels:
+        level["server_queue_ms"] = round(max(0.0, level["p50_ms"] - baseline), 2)
+    return {
+        "log": args.log,
+        "rate": args.rate or None,
+        "duration_s": args.duration,
+        "levels": levels,
+        "saturation": find_saturation(levels, args.min_gain, args.max_error_rate, args.rate > 0),
+        "skipped_turns": dict(replayer.skipped),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--log", default=DEFAULT_LOG, help="JSON-lines conversation log")
+    parser.add_argument("--chat-url", help="Chat server (app.py) base URL")
+    parser.add_argument("--ticket-url", help="Ticket service (app_server.py) base URL")
+    parser.add_argument("--local-ticket-service", action="store_true",
+                        help="Serve app_server.py on the in-memory ticket store instead of --ticket-url")
+    parser.add_argument("--tickets", type=int, default=10000, help="Seeded tickets for --local-ticket-service")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 5, 10, 25, 50], help="Virtual users per level")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds per level")
+    parser.add_argument("--rate", type=float, default=0.0, help="Conversation arrivals per second (0: closed loop)")
+    parser.add_argument("--think-scale", type=float, default=1.0, help="Multiplier for recorded delay_ms (0: no think time)")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--min-gain", type=float, default=0.1,
+                        help="Smallest throughput gain between levels that still counts as scaling")
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    conversations = load_conversations(args.log)
+    args.concurrency = sorted(set(args.concurrency))
+
+    server = None
+    ticket_url = args.ticket_url
+    if args.local_ticket_service:
+        import app_server
+        from load_ticket_service import ServerThread
+        from mock_postgrest import PostgrestStore, seed_ticket_data
+        from ticketrepository import InMemoryTicketRepository
+
+        store = seed_ticket_data(PostgrestStore(), tickets=args.tickets)
+        app_server.repository = InMemoryTicketRepository(store.tables["tickets"], store.tables["flights"])
+        server = ServerThread(app_server.app).__enter__()
+        ticket_url = server.url
+    if not args.chat_url and not ticket_url:
+        parser.error("give --chat-url, --ticket-url or --local-ticket-service")
+
+    turns = sum(len(t) for _, t in conversations)
+    print(f"🔄 Replaying {len(conversations)} conversations ({turns} turns) from {args.log}")
+    try:
+        results = asyncio.run(run(args, conversations, ticket_url))
+    finally:
+        if server is not None:
+            server.__exit__(None, None, None)
+
+    print(f"\n{'users':>6} {'convs':>6} {'turns/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+          f"{'errors':>7} {'queue ms':>9} {'server q':>9} {'backlog':>8}")
+    for r in results["levels"]:
+        queue = r["queue_p95_ms"] if r["queue_p95_ms"] is not None else "-"
+        print(f"{r['concurrency']:>6} {r['conversations']:>6} {r['turns_per_sec']:>9} {r['p50_ms']:>9} {r['p95_ms']:>9} "
+              f"{r['p99_ms']:>9} {r['error_rate']:>7.1%} {queue:>9} {r['server_queue_ms']:>9} {r['backlog']:>8}")
+    saturation = results["saturation"]
+    if saturation is None:
+        print(f"\n✅ No saturation up to {args.concurrency[-1]} users")
+    else:
+        print(f"\n⚠️ Saturated at {saturation['concurrency']} users ({', '.join(saturation['reasons'])}); "
+              f"last healthy level: {saturation['last_healthy'] or 'none'}")
+    if results["skipped_turns"]:
+        print(f"⚠️ Skipped turns without a target URL: {results['skipped_turns']}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+"""Local OpenAI/Groq-compatible chat completion server for offline benchmarks.
+
+Answers every POST to ``*/chat/completions`` after a configurable delay with a
+canned intent-classification JSON body, so Agent/AsyncAgent/Groq clients can be
+pointed at it with ``base_url=server.base_url``.
+
+``content`` may also be a function of the request payload, and with
+``tool_steps`` requests that offer tools are answered with a tool call until
+the conversation holds that many tool results, so agent runs take a fixed
+number of tool-calling steps before their final answer.
+
+    python benchmarks/mock_llm_server.py --port 8765 --latency-ms 200
+"""
+import argparse
+import asyncio
+import json
+import random
+import threading
+import time
+from typing import Callable, List, Optional, Union
+
+DEFAULT_CONTENT = json.dumps({
+    "detected_intents": [{
+        "type": "Flight Status",
+        "sub_intent": "Get flight status",
+        "confidence": 0.9,
+        "justification": "Mock completion",
+    }]
+})
+# Tools called in turn by scripted agent steps, when the request offers them
+PREFERRED_TOOLS = ("search", "browser_navigate", "fetch_content", "browser_snapshot")
+
+
+def _tool_arguments(tool: dict) -> dict:
+    """Placeholder values for a tool's required parameters"""
+    parameters = tool.get("function", {}).get("parameters") or {}
+    placeholders = {"integer": 1, "number": 1, "boolean": False, "array": [], "object": {}}
+    return {
+        name: placeholders.get(parameters.get("properties", {}).get(name, {}).get("type"), "benchmark")
+        for name in parameters.get("required", [])
+    }
+
+
+class MockCompletionServer:
+    """Minimal keep-alive HTTP/1.1 server speaking the chat completions API"""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency_ms: float = 100.0,
+        jitter_ms: float = 0.0,
+        content: Union[str, Callable[[dict], str]] = DEFAULT_CONTENT,
+        stream_chunk_size: int = 8,
+        tool_steps: int = 0,
+    ):
+        self.host = host
+        self.port = port
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.content = content
+        self.stream_chunk_size = stream_chunk_size
+        self.tool_steps = tool_steps
+        self.requests = 0
+        self.tool_calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._connections: set = set()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._server:
+            self._server.close()
+            for task in list(self._connections):
+                task.cancel()
+            await asyncio.gather(*self._connections, return_exceptions=True)
+            await self._server.wait_closed()
+
+    def start_in_thread(self) -> "MockCompletionServer":
+        """Run the server on its own loop thread (for sync benchmark clients)"""
+        ready = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            self._loop.run_until_complete(self.start())
+            ready.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=run, name="mock-llm-server", daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self
+
+    def stop_thread(self):
+        if self._loop:
+            asyncio.run_coroutine_threadsafe(self.stop(), self._loop).result()
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop.close()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        task = asyncio.current_task()
+        self._connections.add(task)
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode().split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode().partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                await self._respond(writer, method, path, body)
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError, asyncio.CancelledError):
+            pass
+        finally:
+            self._connections.discard(task)
+            writer.close()
+
+    async def _respond(self, writer: asyncio.StreamWriter, method: str, path: str, body: bytes):
+        if method != "POST" or not path.rstrip("/").endswith("/chat/completions"):
+            self._write(writer, 404, b'{"error": "not found"}')
+            return
+
+        self.requests += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            payload = json.loads(body or b"{}")
+            await asyncio.sleep(self.latency + random.uniform(0, self.jitter))
+            if payload.get("stream"):
+                await self._stream(writer, payload)
+            else:
+                self._write(writer, 200, json.dumps(self._completion(payload)).encode())
+        finally:
+            self.in_flight -= 1
+        await writer.drain()
+
+    def _message(self, payload: dict) -> dict:
+        """The assistant message: a tool call while scripted tool steps remain, else the content"""
+        tools: List[dict] = payload.get("tools") or []
+        steps_taken = sum(1 for m in payload.get("messages", []) if m.get("role") == "tool")
+        if tools and steps_taken < self.tool_steps:
+            names = [t.get("function", {}).get("name") for t in tools]
+            candidates = [name for name in PREFERRED_TOOLS if name in names] or names
+            name = candidates[steps_taken % len(candidates)]
+            self.tool_calls += 1
+            return {
+                "role": "assistant",
+                "content": None,
+                "tool_calls": [{
+                    "id": f"call_mock_{self.requests}",
+                    "type": "function",
+                    "function": {"name": name, "arguments": json.dumps(_tool_arguments(tools[names.index(name)]))},
+                }],
+            }
+        content = self.content(payload) if callable(self.content) else self.content
+        return {"role": "assistant", "content": content}
+
+    def _completion(self, payload: dict) -> dict:
+        message = self._message(payload)
+        prompt_tokens = sum(len(str(m.get("content", ""))) // 4 for m in payload.get("messages", []))
+        completion_tokens = len(message["content"] or json.dumps(message.get("tool_calls"))) // 4
+        return {
+            "id": f"chatcmpl-mock-{self.requests}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": payload.get("model", "mock"),
+            "choices": [{
+                "index": 0,
+                "message": message,
+                "finish_reason": "tool_calls" if message.get("tool_calls") else "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    async def _stream(self, writer: asyncio.StreamWriter, payload: dict):
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+            b"Transfer-Encoding: chunked\r\nConnection: keep-alive\r\n\r\n"
+        )
+        message = self._message(payload)
+        content = message["content"] or ""
+        deltas = [{"content": content[i:i + self.stream_chunk_size]} for i in range(0, len(content), self.stream_chunk_size)]
+        if message.get("tool_calls"):
+            deltas = [{"role": "assistant", "tool_calls": [{"index": 0, **message["tool_calls"][0]}]}]
+        for delta in deltas:
+            self._write_chunk(writer, self._stream_chunk(payload, delta, None))
+            await writer.drain()
+        if message.get("tool_calls"):
+            self._write_chunk(writer, self._stream_chunk(payload, {}, "tool_calls"))
+        self._write_chunk(writer, b"data: [DONE]\n\n")
+        writer.write(b"0\r\n\r\n")
+
+    def _stream_chunk(self, payload: dict, delta: dict, finish_reason: Optional[str]) -> bytes:
+        chunk = {
+            "id": f"chatcmpl-mock-{self.requests}",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": payload.get("model", "mock"),
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        }
+        return f"data: {json.dumps(chunk)}\n\n".encode()
+
+    @staticmethod
+    def _write_chunk(writer: asyncio.StreamWriter, data: bytes):
+        writer.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+
+    @staticmethod
+    def _write(writer: asyncio.StreamWriter, status: int, body: bytes):
+        reason = {200: "OK", 404: "Not Found"}.get(status, "OK")
+        writer.write(
+            f"HTTP/1.1 {status} {reason}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: keep-alive\r\n\r\n".encode() + body
+        )
+
+
+async def _serve_forever(args):
+    server = MockCompletionServer(args.host, args.port, args.latency_ms, args.jitter_ms)
+    await server.start()
+    print(f"Mock completion server listening on {server.base_url}")
+    await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=100.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    asyncio.run(_serve_forever(parser.parse_args()))
@@ -0,0 +1,317 @@
+"""In-memory PostgREST-compatible stand-in for offline ticket service benchmarks.
+
+Implements the subset of the PostgREST API that supabase-py and the ticket
+service use: ``GET``/``PATCH``/``POST``/``DELETE`` on ``/rest/v1/<table>`` with
+``eq``/``neq``/``in``/``gt``/``gte``/``lt``/``lte``/``is`` filters and ``or=(...)``
+groups of them, column lists,
+many-to-one embedded selects such as ``select=*,flights(*)`` and
+``POST /rest/v1/rpc/<function>`` for registered Python functions. Every request
+sleeps ``latency_ms`` first so round trips cost what they would over a network.
+
+    python benchmarks/mock_postgrest.py --port 54321 --latency-ms 20 --tickets 10000
+"""
+import argparse
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, unquote, urlparse
+
+FILTER_OPS = {
+    "eq": lambda a, b: a == b,
+    # Like SQL, comparisons against NULL never match (use is.null for those)
+    "neq": lambda a, b: a is not None and a != b,
+    "gt": lambda a, b: a is not None and a > b,
+    "gte": lambda a, b: a is not None and a >= b,
+    "lt": lambda a, b: a is not None and a < b,
+    "lte": lambda a, b: a is not None and a <= b,
+}
+RESERVED_PARAMS = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+
+
+def _coerce(raw: str, sample):
+    """Convert a filter literal to the type of the column it is compared against"""
+    raw = raw.strip().strip('"')
+    if raw == "null":
+        return None
+    if isinstance(sample, bool):
+        return raw.lower() == "true"
+    if isinstance(sample, int):
+        try:
+            return int(raw)
+        except ValueError:
+            return raw
+    if isinstance(sample, float):
+        return float(raw)
+    return raw
+
+
+def _split_top_level(select: str) -> List[str]:
+    parts, depth, current = [], 0, ""
+    for ch in select:
+        if ch == "," and depth == 0:
+            parts.append(current)
+            current = ""
+            continue
+        depth += ch == "("
+        depth -= ch == ")"
+        current += ch
+    if current:
+        parts.append(current)
+    return [p.strip() for p in parts if p.strip()]
+
+
+class PostgrestStore:
+    """Tables of row dicts plus many-to-one relations used for embedding"""
+
+    def __init__(self):
+        self.tables: Dict[str, List[dict]] = {}
+        self.relations: Dict[Tuple[str, str], Tuple[str, str]] = {}
+        self.rpc: Dict[str, Callable[["PostgrestStore", dict], object]] = {}
+        self.lock = threading.RLock()
+
+    def add_relation(self, table: str, foreign_table: str, column: str, foreign_column: str):
+        self.relations[(table, foreign_table)] = (column, foreign_column)
+
+    def register_rpc(self, name: str, func: Callable[["PostgrestStore", dict], object]):
+        self.rpc[name] = func
+
+    def _sample(self, table: str, column: str):
+        for row in self.tables.get(table, []):
+            if row.get(column) is not None:
+                return row[column]
+        return ""
+
+    def matches(self, table: str, row: dict, filters: List[Tuple[str, str]]) -> bool:
+        for column, expr in filters:
+            if column == "or":
+                # or=(status.is.null,status.neq.cancelled) matches rows that pass any condition
+                conditions = [c.partition(".")[::2] for c in _split_top_level(expr.strip()[1:-1])]
+                if not any(self._matches_one(table, row, c, e) for c, e in conditions):
+                    return False
+            elif not self._matches_one(table, row, column, expr):
+                return False
+        return True
+
+    def _matches_one(self, table: str, row: dict, column: str, expr: str) -> bool:
+        negate = expr.startswith("not.")
+        if negate:
+            expr = expr[4:]
+        op, _, raw = expr.partition(".")
+        value = row.get(column)
+        if op == "in":
+            sample = self._sample(table, column)
+            options = {_coerce(v, sample) for v in raw.strip("()").split(",") if v}
+            result = value in options
+        elif op == "is":
+            result = value is None if raw == "null" else value == (raw == "true")
+        elif op in FILTER_OPS:
+            result = FILTER_OPS[op](value, _coerce(raw, self._sample(table, column)))
+        else:
+            raise ValueError(f"Unsupported filter operator: {op}")
+        return result != negate
+
+    def project(self, table: str, row: dict, select: str) -> dict:
+        if not select or select == "*":
+            return dict(row)
+        out = {}
+        for part in _split_top_level(select):
+            match = re.match(r"^(?:(\w+):)?(\w+)(?:!\w+)?\((.*)\)$", part)
+            if match:
+                alias, foreign_table, inner = match.groups()
+                column, foreign_column = self.relations[(table, foreign_table)]
+                target = next(
+                    (r for r in self.tables.get(foreign_table, []) if r.get(foreign_column) == row.get(column)),
+                    None,
+                )
+                out[alias or foreign_table] = self.project(foreign_table, target, inner) if target else None
+            elif part == "*":
+                out.update(row)
+            else:
+                out[part] = row.get(part)
+        return out
+
+    def select(self, table: str, filters, select: str, limit: Optional[int] = None) -> List[dict]:
+        with self.lock:
+            rows = [self.project(table, r, select) for r in self.tables.get(table, []) if self.matches(table, r, filters)]
+        return rows[:limit] if limit is not None else rows
+
+    def update(self, table: str, filters, values: dict) -> List[dict]:
+        with self.lock:
+            updated = []
+            for row in self.tables.get(table, []):
+                if self.matches(table, row, filters):
+                    row.update(values)
+                    updated.append(dict(row))
+            return updated
+
+    def insert(self, table: str, rows: List[dict]) -> List[dict]:
+        with self.lock:
+            self.tables.setdefault(table, []).extend(dict(r) for r in rows)
+            return [dict(r) for r in rows]
+
+    def delete(self, table: str, filters) -> List[dict]:
+        with self.lock:
+            keep, removed = [], []
+            for row in self.tables.get(table, []):
+                (removed if self.matches(table, row, filters) else keep).append(row)
+            self.tables[table] = keep
+            return removed
+
+
+def cancel_ticket_atomic(store: PostgrestStore, params: dict) -> str:
+    """Python port of sql/cancel_ticket_atomic.sql"""
+    with store.lock:
+        for row in store.tables.get("tickets", []):
+            if row["ticket_id"] == int(params["p_ticket_id"]):
+                if row.get("status") == "cancelled":
+                    return "already_cancelled"
+                row["status"] = "cancelled"
+                return "cancelled"
+    return "not_found"
+
+
+def seed_ticket_data(store: PostgrestStore, tickets: int = 1000, flights: int = 50, users: int = 200):
+    """Deterministic tickets/flights tables matching the ticket service schema"""
+    store.tables["flights"] = [
+        {
+            "flight_id": f,
+            "flight_name": f"NX{100 + f}",
+            "source": ["New York", "London", "Paris", "Chennai", "Tokyo"][f % 5],
+            "destination": ["London", "Paris", "Chennai", "Tokyo", "New York"][f % 5],
+            "takeoff_time": f"2026-11-{1 + f % 28:02d}T{f % 24:02d}:00:00",
+            "company": "NexusAir",
+        }
+        for f in range(1, flights + 1)
+    ]
+    store.tables["tickets"] = [
+        {
+            "ticket_id": t,
+            "user_id": 1 + t % users,
+            "flight_id": 1 + t % flights,
+            "status": "booked",
+        }
+        for t in range(1, tickets + 1)
+    ]
+    store.add_relation("tickets", "flights", "flight_id", "flight_id")
+    store.register_rpc("cancel_ticket_atomic", cancel_ticket_atomic)
+    return store
+
+
+class MockPostgrestServer:
+    """Threaded HTTP server exposing a PostgrestStore under /rest/v1"""
+
+    def __init__(self, store: Optional[PostgrestStore] = None, host: str = "127.0.0.1", port: int = 0, latency_ms: float = 0.0):
+        self.store = store or PostgrestStore()
+        self.latency = latency_ms / 1000
+        self.requests = 0
+        self._counter_lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockPostgrestServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="mock-postgrest", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, payload=None):
+                body = b"" if payload is None else json.dumps(payload, default=str).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                if isinstance(payload, list):
+                    self.send_header("Content-Range", f"0-{max(len(payload) - 1, 0)}/*")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _parse(self):
+                parsed = urlparse(self.path)
+                params = parse_qsl(parsed.query, keep_blank_values=True)
+                filters = [(k, unquote(v)) for k, v in params if k not in RESERVED_PARAMS]
+                options = {k: unquote(v) for k, v in params if k in RESERVED_PARAMS}
+                return parsed.path, filters, options
+
+            def _body(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                return json.loads(self.rfile.read(length) or b"null") if length else None
+
+            def _dispatch(self, method: str):
+                with server._counter_lock:
+                    server.requests += 1
+                if server.latency:
+                    time.sleep(server.latency)
+                path, filters, options = self._parse()
+                body = self._body() if method in ("POST", "PATCH") else None
+                if not path.startswith("/rest/v1/"):
+                    return self._send(404, {"message": "not found"})
+                resource = path[len("/rest/v1/"):]
+                wants_rows = "return=representation" in (self.headers.get("Prefer") or "")
+                try:
+                    if resource.startswith("rpc/"):
+                        name = resource[len("rpc/"):]
+                        if name not in server.store.rpc:
+                            return self._send(404, {"message": f"function {name} not found"})
+                        return self._send(200, server.store.rpc[name](server.store, body or dict(filters)))
+                    if method == "GET":
+                        limit = int(options["limit"]) if "limit" in options else None
+                        return self._send(200, server.store.select(resource, filters, options.get("select", "*"), limit))
+                    if method == "PATCH":
+                        rows = server.store.update(resource, filters, body or {})
+                    elif method == "POST":
+                        rows = server.store.insert(resource, body if isinstance(body, list) else [body])
+                    elif method == "DELETE":
+                        rows = server.store.delete(resource, filters)
+                    else:
+                        return self._send(405, {"message": "method not allowed"})
+                    if "select" in options:
+                        rows = [server.store.project(resource, r, options["select"]) for r in rows]
+                    return self._send(200, rows) if wants_rows else self._send(204)
+                except (KeyError, ValueError) as e:
+                    return self._send(400, {"message": str(e)})
+
+            def do_GET(self):
+                self._dispatch("GET")
+
+            def do_POST(self):
+                self._dispatch("POST")
+
+            def do_PATCH(self):
+                self._dispatch("PATCH")
+
+            def do_DELETE(self):
+                self._dispatch("DELETE")
+
+        return Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=54321)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--tickets", type=int, default=1000)
+    args = parser.parse_args()
+    server = MockPostgrestServer(seed_ticket_data(PostgrestStore(), tickets=args.tickets), args.host, args.port, args.latency_ms)
+    print(f"Mock PostgREST listening on {server.url}/rest/v1")
+    server._httpd.serve_forever()
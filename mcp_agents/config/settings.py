@@ -4,6 +4,65 @@ class Settings(BaseSettings):
     NVIDIA_API_KEY: str = ""
     GROQ_API_KEY: str = ""
     SERPAPI_API_KEY: str = ""
+    MCP_CONFIG_FILE: str = ""
+    MCP_POOL_SIZE: int = 1
+    MCP_HEALTH_CHECK_INTERVAL: float = 30.0
+    MCP_TOOL_ROUTING_ENABLED: bool = True
+    MCP_TOOL_PROFILES_FILE: str = ""
+    POLICY_AGENT_WARMUP_BLOCKING: bool = False
+    POLICY_CACHE_MAX_ENTRIES: int = 1000
+    POLICY_CACHE_TTL: float = 300.0
+    POLICY_CACHE_MAX_BYTES: int = 16 * 1024 * 1024
+    POLICY_CACHE_INTENT_KEYS: bool = False
+    CACHE_URL: str = "memory://"
+    INTENT_CACHE_TTL: float = 3600.0
+    INTENT_CACHE_MAX_ENTRIES: int = 5000
+    INTENT_FAST_PATH_ENABLED: bool = True
+    INTENT_FAST_PATH_THRESHOLD: float = 0.6
+    INTENT_BATCH_MAX_SIZE: int = 32
+    INTENT_BATCH_MAX_WAIT_MS: float = 5.0
+    INTENT_BATCH_MAX_CONCURRENCY: int = 8
+    SPECULATIVE_POLICY_ENABLED: bool = True
+    TRACING_EXPORTER: str = ""
+    TRACING_FILE: str = "traces.jsonl"
+    TRACING_SAMPLE_RATE: float = 1.0
+    TRACING_SERVICE_NAME: str = "nexusai-chat"
+    SESSION_MAX_SESSIONS: int = 10000
+    SESSION_IDLE_TIMEOUT: float = 1800.0
+    SESSION_MAX_MESSAGES: int = 20
+    SESSION_MAX_BYTES: int = 64 * 1024
+    SESSION_MAX_TOTAL_BYTES: int = 256 * 1024 * 1024
+    KB_ENABLED: bool = True
+    KB_DOCS_DIR: str = ""
+    KB_INDEX_DIR: str = ""
+    KB_EMBEDDER: str = "hashing"
+    KB_INTENTS: str = "Cancellation Policy,Pet Travel"
+    KB_TOP_K: int = 4
+    KB_MIN_SCORE: float = 0.15
+    KB_REFRESH_INTERVAL: float = 3600.0
+    TICKET_API_URL: str = "http://127.0.0.1:8000"
+    TICKET_API_TIMEOUT: float = 10.0
+    TICKET_API_CONNECT_TIMEOUT: float = 3.0
+    TICKET_API_MAX_RETRIES: int = 3
+    TICKET_API_BACKOFF: float = 0.2
+    TICKET_API_POOL_SIZE: int = 20
+    TICKET_REPOSITORY_URL: str = ""
+    SUPABASE_POOL_SIZE: int = 100
+    SUPABASE_POOL_KEEPALIVE: int = 20
+    SUPABASE_TIMEOUT: float = 10.0
+    SUPABASE_CONNECT_TIMEOUT: float = 3.0
+    SUPABASE_HTTP2: bool = True
+    BULK_MAX_TICKETS: int = 10000
+    BULK_CHUNK_SIZE: int = 500
+    FLIGHT_CACHE_MAX_ENTRIES: int = 10000
+    FLIGHT_CACHE_TTL: float = 600.0
+    TICKET_FLIGHT_CACHE_MAX_ENTRIES: int = 100000
+    TICKET_FLIGHT_CACHE_TTL: float = 60.0
+    IDEMPOTENCY_CACHE_URL: str = "memory://"
+    IDEMPOTENCY_TTL: float = 86400.0
+    IDEMPOTENCY_MAX_ENTRIES: int = 100000
+    IDEMPOTENCY_PENDING_TTL: float = 30.0
+    IDEMPOTENCY_WAIT_TIMEOUT: float = 5.0
     #DEFAULT_DATA_PATH: str = "C:\\Users\\arun5\\Desktop\\SAP\\src\\data\\Procurement KPI Analysis Dataset.csv"
     #DATABASE_URL: str = "sqlite+aiosqlite:///./SAP.db"
 
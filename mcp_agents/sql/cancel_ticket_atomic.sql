@@ -0,0 +1,38 @@
+-- Atomic, idempotent ticket cancellation used by POST /mcp/db/cancel_ticket.
+--
+-- Locks the ticket row, and in a single round trip reports whether the ticket
+-- was not found, already cancelled, or cancelled by this call. Concurrent
+-- duplicate requests serialize on the row lock, so exactly one of them sees
+-- 'cancelled' and the others see 'already_cancelled'.
+--
+-- Apply with the Supabase SQL editor or: psql "$DATABASE_URL" -f sql/cancel_ticket_atomic.sql
+
+create or replace function public.cancel_ticket_atomic(p_ticket_id bigint)
+returns text
+language plpgsql
+as $$
+declare
+    v_status text;
+begin
+    select status into v_status
+    from public.tickets
+    where ticket_id = p_ticket_id
+    for update;
+
+    if not found then
+        return 'not_found';
+    end if;
+
+    if v_status = 'cancelled' then
+        return 'already_cancelled';
+    end if;
+
+    update public.tickets
+    set status = 'cancelled'
+    where ticket_id = p_ticket_id;
+
+    return 'cancelled';
+end;
+$$;
+
+grant execute on function public.cancel_ticket_atomic(bigint) to anon, authenticated;
@@ -4,36 +4,210 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
-from groq import Groq
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
 
+from groq import AsyncGroq, Groq
+
+from metrics import observe_llm
+
+MEMORY_MODES = ("full", "stateless", "window", "summary")
+DEFAULT_CONVERSATION = "default"
+
+SUMMARY_PROMPT = (
+    "Summarize the following conversation between a user and an airline assistant "
+    "in a few sentences. Keep ticket IDs, user IDs, flight details and any decisions made.\n\n{transcript}"
+)
+
+
+def observe_completion(model: str, start: float, completion=None):
+    """Record an LLM call for /metrics; completion is None when the call failed"""
+    usage = getattr(completion, "usage", None)
+    observe_llm(
+        model,
+        time.perf_counter() - start,
+        getattr(usage, "prompt_tokens", 0) or 0,
+        getattr(usage, "completion_tokens", 0) or 0,
+        error=completion is None,
+    )
+
+
+def estimate_tokens(messages: List[dict]) -> int:
+    """Rough token count (~4 characters per token plus per-message overhead)"""
+    return sum(len(m.get("content") or "") // 4 + 4 for m in messages)
 
 
 class Agent:
-    def __init__(self, client: Groq, system: str = "", tools: list = None):
+    """Groq chat agent with per-conversation memory.
+
+    memory modes:
+      - "full": keep every turn (original behaviour)
+      - "stateless": send only the system prompt and the current turn
+      - "window": keep the most recent turns that fit in max_history_tokens
+      - "summary": like "window", but older turns are folded into a summary
+    """
+
+    def __init__(
+        self,
+        client: Groq,
+        system: str = "",
+        tools: list = None,
+        memory: str = "full",
+        max_history_tokens: int = 4000,
+        max_conversations: int = 1000,
+        model: str = "openai/gpt-oss-20b",
+    ):
+        if memory not in MEMORY_MODES:
+            raise ValueError(f"Unknown memory mode '{memory}', expected one of {MEMORY_MODES}")
         self.client = client
         self.system = system
-        self.messages = []
         self.tools = tools or []
-        if self.system:
-            self.messages.append({"role": "system", "content": system})
+        self.memory = memory
+        self.max_history_tokens = max_history_tokens
+        self.max_conversations = max_conversations
+        self.model = model
+        self.conversations: "OrderedDict[str, List[dict]]" = OrderedDict()
+        self.summaries: Dict[str, str] = {}
+
+    @property
+    def messages(self) -> List[dict]:
+        """Messages that would be sent for the default conversation"""
+        return self._build_messages(DEFAULT_CONVERSATION)
+
+    def __call__(self, messages="", conversation_id: str = DEFAULT_CONVERSATION):
+        if self.memory == "stateless":
+            return self.execute(self._stateless_messages(messages))
+        history = self._history(conversation_id)
+        if messages:
+            history.append({"role": "user", "content": messages})
+
+        result = self.execute(self._build_messages(conversation_id))
+        history.append({"role": "assistant", "content": result})
+        dropped = self._trim(conversation_id)
+        if dropped:
+            self._summarize(conversation_id, dropped)
+        return result
+
+    def execute(self, messages: Optional[List[dict]] = None):
+        start = time.perf_counter()
+        try:
+            completion = self.client.chat.completions.create(
+                model=self.model,
+                messages=messages if messages is not None else self.messages,
+                temperature=0.0,
+                tools=self.tools  
+            )
+        except Exception:
+            observe_completion(self.model, start)
+            raise
+        observe_completion(self.model, start, completion)
+        return completion.choices[0].message.content
 
-    def __call__(self, messages=""):
+    def reset(self, conversation_id: Optional[str] = None):
+        """Forget one conversation, or every conversation if no ID is given"""
+        if conversation_id is None:
+            self.conversations.clear()
+            self.summaries.clear()
+        else:
+            self.conversations.pop(conversation_id, None)
+            self.summaries.pop(conversation_id, None)
+
+    def _history(self, conversation_id: str) -> List[dict]:
+        history = self.conversations.get(conversation_id)
+        if history is None:
+            history = self.conversations[conversation_id] = []
+            while len(self.conversations) > self.max_conversations:
+                evicted, _ = self.conversations.popitem(last=False)
+                self.summaries.pop(evicted, None)
+        else:
+            self.conversations.move_to_end(conversation_id)
+        return history
+
+    def _stateless_messages(self, message: str) -> List[dict]:
+        """System prompt and this turn, built locally so concurrent callers of a shared agent never share a list"""
+        messages = [{"role": "system", "content": self.system}] if self.system else []
+        if message:
+            messages.append({"role": "user", "content": message})
+        return messages
+
+    def _build_messages(self, conversation_id: str) -> List[dict]:
+        history = self.conversations.get(conversation_id, [])
+        messages = []
+        if self.system:
+            messages.append({"role": "system", "content": self.system})
+        if conversation_id in self.summaries:
+            messages.append({"role": "system", "content": f"Summary of earlier conversation: {self.summaries[conversation_id]}"})
+        return messages + history
+
+    def _trim(self, conversation_id: str) -> List[dict]:
+        """Apply the memory mode; returns the dropped turns that still need summarizing"""
+        history = self.conversations[conversation_id]
+        if self.memory == "full":
+            return []
+        if estimate_tokens(history) <= self.max_history_tokens:
+            return []
+
+        dropped = []
+        while len(history) > 2 and estimate_tokens(history) > self.max_history_tokens:
+            dropped.append(history.pop(0))
+        return dropped if self.memory == "summary" else []
+
+    def _summary_request(self, conversation_id: str, dropped: List[dict]) -> List[dict]:
+        previous = self.summaries.get(conversation_id)
+        transcript = "\n".join(f"{m['role']}: {m['content']}" for m in dropped)
+        if previous:
+            transcript = f"Earlier summary: {previous}\n{transcript}"
+        return [{"role": "user", "content": SUMMARY_PROMPT.format(transcript=transcript)}]
+
+    def _summarize(self, conversation_id: str, dropped: List[dict]):
+        try:
+            self.summaries[conversation_id] = self.execute(self._summary_request(conversation_id, dropped))
+        except Exception as e:
+            print(f"⚠️ Failed to summarize conversation {conversation_id}: {e}")
+
+
+class AsyncAgent(Agent):
+    """Agent variant built on the async Groq client, with the same memory modes"""
+
+    def __init__(self, client: AsyncGroq, system: str = "", tools: list = None, **kwargs):
+        super().__init__(client, system, tools, **kwargs)
+
+    async def __call__(self, messages="", conversation_id: str = DEFAULT_CONVERSATION):
+        if self.memory == "stateless":
+            return await self.execute(self._stateless_messages(messages))
+        history = self._history(conversation_id)
         if messages:
-            self.messages.append({"role": "user", "content": messages})
-        
-        result = self.execute()
-        self.messages.append({"role": "assistant", "content": result})
+            history.append({"role": "user", "content": messages})
+
+        result = await self.execute(self._build_messages(conversation_id))
+        history.append({"role": "assistant", "content": result})
+        dropped = self._trim(conversation_id)
+        if dropped:
+            await self._summarize(conversation_id, dropped)
         return result
 
-    def execute(self):
-        completion = self.client.chat.completions.create(
-            model="openai/gpt-oss-20b",
-            messages=self.messages,
-            temperature=0.0,
-            tools=self.tools  
-        )
+    async def execute(self, messages: Optional[List[dict]] = None):
+        start = time.perf_counter()
+        try:
+            completion = await self.client.chat.completions.create(
+                model=self.model,
+                messages=messages if messages is not None else self.messages,
+                temperature=0.0,
+                tools=self.tools
+            )
+        except Exception:
+            observe_completion(self.model, start)
+            raise
+        observe_completion(self.model, start, completion)
         return completion.choices[0].message.content
 
+    async def _summarize(self, conversation_id: str, dropped: List[dict]):
+        try:
+            self.summaries[conversation_id] = await self.execute(self._summary_request(conversation_id, dropped))
+        except Exception as e:
+            print(f"⚠️ Failed to summarize conversation {conversation_id}: {e}")
+
 
 
 
@@ -0,0 +1,157 @@
+# app.py
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
+from fastapi.staticfiles import StaticFiles
+from pydantic import BaseModel, Field
+from typing import AsyncIterator, List, Optional
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from canceltripagent import CancelTripAgent
+from config.settings import settings
+from intentclassifier import IntentClassifierAgent
+from metrics import render_metrics, stats_collector, track_request
+from policyagent import DEFAULT_CONVERSATION_ID, policy_agent_manager
+from router import ChatRouter
+from speculation import SpeculativePipeline
+from streaming import sse_event
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+chat_router: Optional[ChatRouter] = None
+
+
+def create_chat_router() -> ChatRouter:
+    """Intent routing over the shared policy agent, classifier and cancellation client"""
+    classifier = IntentClassifierAgent()
+    pipeline = SpeculativePipeline(policy_agent_manager, classifier, enabled=settings.SPECULATIVE_POLICY_ENABLED)
+    return ChatRouter(
+        pipeline,
+        cancel_agent=CancelTripAgent(api_url=settings.TICKET_API_URL),
+        max_conversations=settings.SESSION_MAX_SESSIONS,
+    )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global chat_router
+    # MCP sessions live on this server's event loop, so start them here rather than
+    # on policyagent's background loop (that one serves sync callers like Streamlit).
+    # The warm-up runs in the background so the worker takes traffic right away;
+    # /api/ready reports when it is done, and agent runs before then wait for it.
+    policy_agent_manager.start_warmup()
+    if settings.POLICY_AGENT_WARMUP_BLOCKING:
+        await policy_agent_manager.initialize()
+    chat_router = create_chat_router()
+    stats_collector.register_cache("policy", policy_agent_manager.get_cache_stats)
+    stats_collector.register_cache("intent", chat_router.pipeline.classifier.cache.get_stats)
+    stats_collector.register_pool("policy_agent", policy_agent_manager.get_pool_metrics)
+    yield
+    await chat_router.pipeline.classifier.aclose()
+    await chat_router.cancel_agent.aclose()
+    await policy_agent_manager.close()
+
+
+app = FastAPI(
+    title="NexusAI Chat",
+    docs_url=None,
+    redoc_url=None,
+    openapi_url=None,
+    lifespan=lifespan
+)
+app.mount("/static", StaticFiles(directory=os.path.join(BASE_DIR, "static")), name="static")
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    return await track_request("chat", request, call_next)
+
+
+class ChatRequest(BaseModel):
+    message: str = Field(..., min_length=1)
+    conversationId: Optional[str] = None
+    history: List[dict] = []
+
+
+@app.get("/")
+async def index():
+    return FileResponse(os.path.join(BASE_DIR, "templates", "index.html"))
+
+async def _chat_events(req: ChatRequest) -> AsyncIterator[str]:
+    conversation_id = req.conversationId or DEFAULT_CONVERSATION_ID
+    async for event in chat_router.route(req.message.strip(), conversation_id):
+        yield sse_event(event)
+
+@app.post("/api/chat")
+async def chat(req: ChatRequest):
+    """Answer one message: continue a cancellation flow, start one, or ask the policy agent"""
+    if not req.message.strip():
+        raise HTTPException(status_code=400, detail="Message must not be empty")
+    conversation_id = req.conversationId or DEFAULT_CONVERSATION_ID
+    result = await chat_router.reply(req.message.strip(), conversation_id)
+    if result["type"] == "error":
+        return {"error": result["content"], "conversationId": conversation_id}
+    intents = result["intents"]
+    return {
+        "response": result["content"],
+        "conversationId": conversation_id,
+        "intent": intents[0].get("type") if intents else None,
+        "cancellationFlow": result.get("flow"),
+    }
+
+@app.delete("/api/chat/{conversation_id}")
+async def clear_chat(conversation_id: str):
+    """Forget a conversation's agent memory and any cancellation flow in progress"""
+    chat_router.clear(conversation_id)
+    await policy_agent_manager.clear_memory(conversation_id)
+    return {"cleared": conversation_id}
+
+@app.post("/api/chat/stream")
+async def chat_stream(req: ChatRequest):
+    """Stream the answer as server-sent events: token and step events, then done or error"""
+    if not req.message.strip():
+        raise HTTPException(status_code=400, detail="Message must not be empty")
+    return StreamingResponse(
+        _chat_events(req),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get("/api/stats")
+async def stats():
+    """Time-to-first-token, cache and MCP pool stats for this worker"""
+    return {
+        "chat": chat_router.get_stats(),
+        "intent_tiers": chat_router.pipeline.classifier.get_tier_stats(),
+        "stream": policy_agent_manager.get_stream_stats(),
+        "cache": policy_agent_manager.get_cache_stats(),
+        "singleflight": policy_agent_manager.get_singleflight_stats(),
+        "sessions": policy_agent_manager.get_session_stats(),
+        "knowledge_base": policy_agent_manager.get_knowledge_base_stats(),
+        "intents": policy_agent_manager.get_intent_stats(),
+        "pool": policy_agent_manager.get_pool_metrics(),
+        "readiness": policy_agent_manager.get_readiness(),
+    }
+
+
+@app.get("/api/ready")
+async def ready():
+    """Readiness probe: 503 until the LLM client and MCP sessions are warm"""
+    readiness = policy_agent_manager.get_readiness()
+    return JSONResponse(readiness, status_code=200 if readiness["ready"] else 503)
+
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """LLM latency and tokens per model, request, cache and MCP pool metrics in the Prometheus text format"""
+    body, content_type = render_metrics()
+    return Response(body, media_type=content_type)
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host="0.0.0.0", port=int(os.getenv("PORT", "5000")))
@@ -0,0 +1,88 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+
+class MicroBatcher:
+    """Coalesces requests that arrive within a few milliseconds into one batch.
+
+    Requests are collected for up to ``max_wait_ms`` (or until ``max_batch_size``
+    is reached). Identical keys inside a batch share a single handler call, and
+    at most ``max_concurrency`` handler calls run at once across all batches.
+    Must be used from a single event loop.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[Any], Awaitable[Any]],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        max_concurrency: int = 8,
+    ):
+        self.handler = handler
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.max_concurrency = max_concurrency
+        self._queue: Optional[asyncio.Queue] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._tasks: set = set()
+        self.stats = {"requests": 0, "batches": 0, "handler_calls": 0, "coalesced": 0, "max_batch": 0}
+
+    def _ensure_started(self):
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._worker = asyncio.create_task(self._collect())
+
+    async def submit(self, item: Any, key: Optional[str] = None) -> Any:
+        """Queue an item and wait for its result; ``key`` defaults to the item itself"""
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        self.stats["requests"] += 1
+        await self._queue.put((item if key is None else key, item, future))
+        return await future
+
+    async def _collect(self):
+        while True:
+            batch = [await self._queue.get()]
+            if self.max_wait > 0 and self._queue.qsize() < self.max_batch_size - 1:
+                await asyncio.sleep(self.max_wait)
+            while len(batch) < self.max_batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            task = asyncio.create_task(self._dispatch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self, batch: List[Tuple[Any, Any, asyncio.Future]]):
+        groups: Dict[Any, Tuple[Any, List[asyncio.Future]]] = {}
+        for key, item, future in batch:
+            groups.setdefault(key, (item, []))[1].append(future)
+        self.stats["batches"] += 1
+        self.stats["handler_calls"] += len(groups)
+        self.stats["coalesced"] += len(batch) - len(groups)
+        self.stats["max_batch"] = max(self.stats["max_batch"], len(batch))
+        await asyncio.gather(*(self._run(item, futures) for item, futures in groups.values()))
+
+    async def _run(self, item: Any, futures: List[asyncio.Future]):
+        async with self._semaphore:
+            try:
+                result = await self.handler(item)
+            except Exception as e:
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+        for future in futures:
+            if not future.done():
+                future.set_result(result)
+
+    async def close(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
@@ -0,0 +1,464 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, List, Optional
+from urllib.parse import urlparse
+
+STOPWORDS = {
+    "a", "an", "the", "is", "are", "was", "were", "be", "been", "am",
+    "do", "does", "did", "i", "im", "me", "my", "we", "our", "us", "you", "your",
+    "it", "its", "this", "that", "these", "those", "there",
+    "of", "to", "for", "in", "on", "at", "by", "with", "about", "and", "or",
+    "what", "whats", "s", "please", "pls", "hi", "hello", "hey", "thanks", "thank",
+    "tell", "know", "could", "would", "can", "will", "just", "any", "some",
+}
+
+_APOSTROPHES = re.compile(r"['‘’`]")
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_query(text: str, keep_stopwords: bool = False) -> str:
+    """Normalize a query so trivially different phrasings share a cache key.
+
+    Lowercases, folds unicode, drops apostrophes ("what's" -> "whats"), turns
+    punctuation into whitespace, collapses whitespace and removes stopwords
+    (unless ``keep_stopwords``).
+    """
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode()
+    text = _APOSTROPHES.sub("", text.lower())
+    tokens = [t for t in _NON_WORD.sub(" ", text).split() if keep_stopwords or t not in STOPWORDS]
+    return " ".join(tokens)
+
+
+def make_cache_key(
+    query: str,
+    intents: Optional[List[dict]] = None,
+    use_intent: bool = False,
+    keep_stopwords: bool = False,
+) -> str:
+    """Build a cache key from the normalized query, or from the primary intent and its entities.
+
+    Intent lookups pass ``keep_stopwords``: "can I cancel my flight?" asks about
+    the policy while "cancel my flight" is a command, and only stopwords tell them apart.
+    """
+    normalized = normalize_query(query, keep_stopwords=keep_stopwords)
+    if not normalized:
+        # Only stopwords ("hi", "thanks", "what is it?"): key on the text itself, or they would all share one key
+        normalized = "raw:" + " ".join(query.lower().split())
+    if use_intent and intents:
+        primary = intents[0]
+        entities = primary.get("entities")
+        if isinstance(entities, dict):
+            entities = [f"{k}={v}" for k, v in entities.items()]
+        if not entities:
+            entities = normalized.split()
+        raw = "intent:{}|{}|{}".format(
+            primary.get("type", "Unknown"),
+            primary.get("sub_intent", ""),
+            " ".join(sorted({str(e).lower() for e in entities})),
+        )
+    else:
+        raw = f"query:{normalized}"
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def _sizeof(value: Any) -> int:
+    if isinstance(value, str):
+        return len(value.encode())
+    return len(json.dumps(value, default=str).encode())
+
+
+class CacheStats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.sets = 0
+        self.errors = 0
+
+    def as_dict(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "sets": self.sets,
+            "errors": self.errors,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+class CacheBackend:
+    """Interface shared by every cache backend.
+
+    Values must be JSON-serializable so that out-of-process backends can store
+    them. Backend failures are counted and treated as misses rather than raised.
+    """
+
+    backend = "base"
+
+    def __init__(self, ttl: float = 300):
+        self.ttl = ttl
+        self.stats = CacheStats()
+
+    def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        raise NotImplementedError
+
+    def add(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        """Store the value only if the key is missing or expired, atomically.
+
+        Returns False if another entry holds the key. A backend failure returns
+        True, so callers go ahead as they would on a cache miss.
+        """
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def get_stats(self) -> dict:
+        stats = self.stats.as_dict()
+        stats.update({"backend": self.backend, "ttl": self.ttl})
+        return stats
+
+
+class ResponseCache(CacheBackend):
+    """Bounded in-process LRU cache with per-entry TTL and a memory limit.
+
+    Lookups, inserts and evictions are all O(1): entries live in an OrderedDict
+    kept in recency order, so the least recently used entry is always first.
+    """
+
+    backend = "memory"
+
+    def __init__(self, max_entries: int = 1000, ttl: float = 300, max_bytes: Optional[int] = None):
+        super().__init__(ttl)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entries: "OrderedDict[str, tuple[Any, float, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key, record=False) is not None
+
+    def get(self, key: str, record: bool = True) -> Optional[Any]:
+        """Return the cached value, or None if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                if record:
+                    self.stats.misses += 1
+                return None
+            value, expires_at, _ = entry
+            if expires_at <= time.time():
+                self._remove(key)
+                self.stats.expirations += 1
+                if record:
+                    self.stats.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            if record:
+                self.stats.hits += 1
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """Insert or refresh an entry, evicting least recently used entries to stay within limits"""
+        size = _sizeof(value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._insert(key, value, expires_at, size)
+
+    def add(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        size = _sizeof(value)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > now:
+                return False
+            self._insert(key, value, now + (self.ttl if ttl is None else ttl), size)
+            return True
+
+    def _insert(self, key: str, value: Any, expires_at: float, size: int):
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (value, expires_at, size)
+        self.bytes += size
+        self.stats.sets += 1
+        while len(self._entries) > self.max_entries or (
+            self.max_bytes is not None and self.bytes > self.max_bytes
+        ):
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+            self.stats.evictions += 1
+
+    def delete(self, key: str):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def _remove(self, key: str):
+        _, _, size = self._entries.pop(key)
+        self.bytes -= size
+
+    def get_stats(self) -> dict:
+        stats = super().get_stats()
+        stats.update({
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+        })
+        return stats
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """Disk-backed cache shared by every worker on a node and kept across restarts.
+
+    Entries are evicted least-recently-used once the table grows past max_entries.
+    """
+
+    backend = "sqlite"
+
+    def __init__(self, path: str, namespace: str = "default", ttl: float = 300, max_entries: int = 10000):
+        super().__init__(ttl)
+        self.path = path
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._sets_since_prune = 0
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5.0, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL,"
+            " expires_at REAL NOT NULL, last_access REAL NOT NULL,"
+            " PRIMARY KEY (namespace, key))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_last_access ON cache (namespace, last_access)")
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT value, expires_at FROM cache WHERE namespace = ? AND key = ?",
+                    (self.namespace, key),
+                ).fetchone()
+                if row is None:
+                    self.stats.misses += 1
+                    return None
+                if row[1] <= now:
+                    self._conn.execute("DELETE FROM cache WHERE namespace = ? AND key = ?", (self.namespace, key))
+                    self.stats.expirations += 1
+                    self.stats.misses += 1
+                    return None
+                self._conn.execute(
+                    "UPDATE cache SET last_access = ? WHERE namespace = ? AND key = ?",
+                    (now, self.namespace, key),
+                )
+            self.stats.hits += 1
+            return json.loads(row[0])
+        except (sqlite3.Error, ValueError) as e:
+            self.stats.errors += 1
+            print(f"⚠️ SQLite cache read failed: {e}")
+            return None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        now = time.time()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        try:
+            payload = json.dumps(value)
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO cache (namespace, key, value, expires_at, last_access)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (self.namespace, key, payload, expires_at, now),
+                )
+                self.stats.sets += 1
+                self._sets_since_prune += 1
+                if self._sets_since_prune >= 100:
+                    self._prune(now)
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            self.stats.errors += 1
+            print(f"⚠️ SQLite cache write failed: {e}")
+
+    def add(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        now = time.time()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        try:
+            payload = json.dumps(value)
+            with self._lock:
+                # An expired row is taken over; a live one leaves the upsert with no changes
+                cursor = self._conn.execute(
+                    "INSERT INTO cache (namespace, key, value, expires_at, last_access) VALUES (?, ?, ?, ?, ?)"
+                    " ON CONFLICT (namespace, key) DO UPDATE SET value = excluded.value,"
+                    " expires_at = excluded.expires_at, last_access = excluded.last_access"
+                    " WHERE cache.expires_at <= ?",
+                    (self.namespace, key, payload, expires_at, now, now),
+                )
+                if cursor.rowcount == 0:
+                    return False
+                self.stats.sets += 1
+                return True
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            self.stats.errors += 1
+            print(f"⚠️ SQLite cache write failed: {e}")
+            return True
+
+    def _prune(self, now: float):
+        self._sets_since_prune = 0
+        self._conn.execute("DELETE FROM cache WHERE namespace = ? AND expires_at <= ?", (self.namespace, now))
+        count = self._conn.execute("SELECT COUNT(*) FROM cache WHERE namespace = ?", (self.namespace,)).fetchone()[0]
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM cache WHERE namespace = ? AND key IN ("
+                " SELECT key FROM cache WHERE namespace = ? ORDER BY last_access LIMIT ?)",
+                (self.namespace, self.namespace, overflow),
+            )
+            self.stats.evictions += overflow
+
+    def delete(self, key: str):
+        try:
+            with self._lock:
+                self._conn.execute("DELETE FROM cache WHERE namespace = ? AND key = ?", (self.namespace, key))
+        except sqlite3.Error as e:
+            self.stats.errors += 1
+            print(f"⚠️ SQLite cache delete failed: {e}")
+
+    def clear(self):
+        try:
+            with self._lock:
+                self._conn.execute("DELETE FROM cache WHERE namespace = ?", (self.namespace,))
+        except sqlite3.Error as e:
+            self.stats.errors += 1
+            print(f"⚠️ SQLite cache clear failed: {e}")
+
+    def get_stats(self) -> dict:
+        stats = super().get_stats()
+        with self._lock:
+            entries = self._conn.execute(
+                "SELECT COUNT(*) FROM cache WHERE namespace = ?", (self.namespace,)
+            ).fetchone()[0]
+        stats.update({"entries": entries, "max_entries": self.max_entries, "path": self.path})
+        return stats
+
+
+class RedisCacheBackend(CacheBackend):
+    """Cache shared across the fleet through any Redis-protocol server.
+
+    Expiry is delegated to Redis key TTLs and size limits to the server's
+    maxmemory policy. Pass ``client`` to use an existing connection, e.g. a
+    fakeredis instance when running locally.
+    """
+
+    backend = "redis"
+
+    def __init__(self, url: str = "redis://localhost:6379/0", namespace: str = "default", ttl: float = 300, client=None):
+        super().__init__(ttl)
+        if client is None:
+            import redis
+            client = redis.Redis.from_url(url, socket_timeout=1.0, socket_connect_timeout=1.0)
+        self.client = client
+        self.prefix = f"asapp:cache:{namespace}:"
+
+    def get(self, key: str) -> Optional[Any]:
+        try:
+            raw = self.client.get(self.prefix + key)
+            if raw is None:
+                self.stats.misses += 1
+                return None
+            value = json.loads(raw)
+        except Exception as e:
+            self.stats.errors += 1
+            print(f"⚠️ Redis cache read failed: {e}")
+            return None
+        self.stats.hits += 1
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        ttl = self.ttl if ttl is None else ttl
+        try:
+            self.client.set(self.prefix + key, json.dumps(value), px=max(1, int(ttl * 1000)))
+            self.stats.sets += 1
+        except Exception as e:
+            self.stats.errors += 1
+            print(f"⚠️ Redis cache write failed: {e}")
+
+    def add(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        ttl = self.ttl if ttl is None else ttl
+        try:
+            added = self.client.set(self.prefix + key, json.dumps(value), px=max(1, int(ttl * 1000)), nx=True)
+        except Exception as e:
+            self.stats.errors += 1
+            print(f"⚠️ Redis cache write failed: {e}")
+            return True
+        if added:
+            self.stats.sets += 1
+        return bool(added)
+
+    def delete(self, key: str):
+        try:
+            self.client.delete(self.prefix + key)
+        except Exception as e:
+            self.stats.errors += 1
+            print(f"⚠️ Redis cache delete failed: {e}")
+
+    def clear(self):
+        try:
+            keys = list(self.client.scan_iter(match=self.prefix + "*"))
+            if keys:
+                self.client.delete(*keys)
+        except Exception as e:
+            self.stats.errors += 1
+            print(f"⚠️ Redis cache clear failed: {e}")
+
+
+def create_cache_backend(
+    url: str = "memory://",
+    namespace: str = "default",
+    ttl: float = 300,
+    max_entries: int = 1000,
+    max_bytes: Optional[int] = None,
+) -> CacheBackend:
+    """Build a cache backend from a URL.
+
+    ``memory://`` gives a per-process LRU, ``sqlite:///path/to/cache.db`` a
+    node-local disk cache and ``redis://host:port/db`` a fleet-wide one.
+    """
+    scheme = urlparse(url).scheme if url else "memory"
+    if scheme in ("", "memory"):
+        return ResponseCache(max_entries=max_entries, ttl=ttl, max_bytes=max_bytes)
+    if scheme == "sqlite":
+        path = url[len("sqlite:///"):] if url.startswith("sqlite:///") else url[len("sqlite://"):]
+        return SQLiteCacheBackend(path or "cache.db", namespace=namespace, ttl=ttl, max_entries=max_entries)
+    if scheme in ("redis", "rediss", "unix"):
+        return RedisCacheBackend(url, namespace=namespace, ttl=ttl)
+    raise ValueError(f"Unsupported cache backend URL: {url}")
@@ -2,20 +2,71 @@
 import os
 import sys
 import json
+import httpx
 import requests
 
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
+from config.settings import settings
+from ticketclient import AsyncTicketServiceClient, TicketServiceClient
+
 class CancelTripAgent:
     def __init__(self, api_url: str, api_key: str | None = None):
         self.api_url = api_url.rstrip("/")
+        self.api_key = api_key
         self.cancel_endpoint = f"{self.api_url}/mcp/db/cancel_ticket"
-        self.headers = {"Content-Type": "application/json"}
-        if api_key:
-            self.headers["Authorization"] = f"Bearer {api_key}"
+        self.client = TicketServiceClient(self.api_url, api_key, **self._client_options())
+        self._async_client: AsyncTicketServiceClient | None = None
         self.memory = {}
 
+    @staticmethod
+    def _client_options() -> dict:
+        return {
+            "timeout": settings.TICKET_API_TIMEOUT,
+            "connect_timeout": settings.TICKET_API_CONNECT_TIMEOUT,
+            "max_retries": settings.TICKET_API_MAX_RETRIES,
+            "backoff": settings.TICKET_API_BACKOFF,
+            "pool_size": settings.TICKET_API_POOL_SIZE,
+        }
+
+    @property
+    def async_client(self) -> AsyncTicketServiceClient:
+        if self._async_client is None:
+            self._async_client = AsyncTicketServiceClient(self.api_url, self.api_key, **self._client_options())
+        return self._async_client
+
+    @staticmethod
+    def _parse(status_code: int, text: str, json_loader) -> dict:
+        if 200 <= status_code < 300:
+            try:
+                return json_loader()
+            except ValueError:
+                return {"raw": text}
+        return {"status_code": status_code, "body": text}
+
+    def cancel(self, user_id, ticket_id, idempotency_key: str | None = None) -> dict:
+        """Cancel a ticket without prompting; returns the response body or an error dict"""
+        try:
+            resp = self.client.cancel_ticket(ticket_id=ticket_id, user_id=user_id, idempotency_key=idempotency_key)
+        except requests.RequestException as e:
+            return {"error": str(e)}
+        return self._parse(resp.status_code, resp.text, resp.json)
+
+    async def acancel(self, user_id, ticket_id, idempotency_key: str | None = None) -> dict:
+        """Async variant of cancel()"""
+        try:
+            resp = await self.async_client.cancel_ticket(ticket_id=ticket_id, user_id=user_id, idempotency_key=idempotency_key)
+        except httpx.HTTPError as e:
+            return {"error": str(e)}
+        return self._parse(resp.status_code, resp.text, resp.json)
+
+    async def aclose(self):
+        """Close the async client's connection pool, if it was ever opened"""
+        if self._async_client is not None:
+            await self._async_client.close()
+            self._async_client = None
+
     def _ask_int(self, prompt: str) -> int:
         while True:
             val = input(prompt).strip()
@@ -36,13 +87,8 @@ class CancelTripAgent:
         if "ticket_id" not in self.memory or not self.memory.get("ticket_id"):
             self.memory["ticket_id"] = self._ask_int("Agent: Great! Now, can you provide your Ticket ID? ")
 
-        payload = {
-            "user_id": self.memory["user_id"],
-            "ticket_id": self.memory["ticket_id"]
-        }
-
         try:
-            resp = requests.post(self.cancel_endpoint, json=payload, headers=self.headers, timeout=10)
+            resp = self.client.cancel_ticket(ticket_id=self.memory["ticket_id"], user_id=self.memory["user_id"])
         except requests.RequestException as e:
             print("Agent: Network error when calling cancel endpoint:", str(e))
             return {"error": str(e)}
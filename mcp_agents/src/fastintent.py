@@ -0,0 +1,188 @@
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from cache import normalize_query
+
+DEFAULT_SUB_INTENTS = {
+    "Cancel Trip": "Cancel Flight",
+    "Cancellation Policy": "Get cancellation policy details",
+    "Flight Status": "Get flight status",
+    "Seat Availability": "Get seat availability",
+    "Pet Travel": "Get pet travel policy",
+}
+
+# Ordered: the first matching rule wins, so specific rules come before broad ones.
+KEYWORD_RULES: List[Tuple[str, re.Pattern, float]] = [
+    ("Cancellation Policy", re.compile(
+        r"\b(cancel\w*|refund\w*)\b.*\b(polic\w*|fees?|charges?|penalt\w*|rules?|terms|allowed|eligible|how much|deadline)\b"
+        r"|\b(polic\w*|fees?|charges?|penalt\w*|rules?|terms)\b.*\b(cancel\w*|refund\w*)\b"
+    ), 0.92),
+    ("Cancel Trip", re.compile(
+        r"\b(cancel|cancell?ing|scrap|call off)\b.*\b(my|the|this|our)?\s*(ticket|flight|trip|booking|reservation)s?\b"
+    ), 0.93),
+    ("Pet Travel", re.compile(r"\b(pets?|dogs?|cats?|puppy|kitten|animals?|service animal|emotional support)\b"), 0.95),
+    ("Seat Availability", re.compile(
+        r"\b(seats?|seating)\b.*\b(availab\w*|left|open|free|empty|book|choose|select)\b"
+        r"|\b(availab\w*|any|open|free|empty)\b.*\bseats?\b"
+    ), 0.9),
+    ("Flight Status", re.compile(
+        r"\b(flight|plane)\b.*\b(status|delayed?|on time|late|landed|departed|arriv\w*|boarding|gate)\b"
+        r"|\b(status|delayed?|on time)\b.*\bflight\b"
+    ), 0.9),
+]
+
+# Asking about cancelling, or saying you don't want to, is not a request to cancel. The
+# Cancel Trip rule skips these, and a nearest-neighbour Cancel Trip guess for them goes to the LLM.
+CANCEL_QUESTION_OR_NEGATION = re.compile(
+    r"\b(not|never|no longer|don['’]?t|doesn['’]?t|didn['’]?t)\b(\W+\w+){0,3}?\W+cancel"
+    r"|\b(what happens|what if|if i|if we|can i|could i|may i|am i|is it|should i|how|when|why)\b.*\bcancel"
+)
+
+INTENT_EXAMPLES: Dict[str, List[str]] = {
+    "Cancel Trip": [
+        "cancel my ticket",
+        "i want to cancel my flight",
+        "please cancel my booking",
+        "cancel my trip to london",
+        "i need to cancel my reservation",
+        "can you cancel ticket 12345",
+        "i won't be travelling, cancel the flight",
+        "drop my booking for next monday",
+    ],
+    "Cancellation Policy": [
+        "what is your cancellation policy",
+        "how much does it cost to cancel",
+        "is there a fee for cancelling",
+        "will i get a refund if i cancel",
+        "can i cancel within 24 hours for free",
+        "what are the refund rules",
+        "cancellation charges for economy tickets",
+        "is my fare refundable",
+    ],
+    "Flight Status": [
+        "what is the status of my flight",
+        "is flight AA100 on time",
+        "is my flight delayed",
+        "has the flight from new york landed",
+        "when does my flight depart",
+        "what gate is my flight boarding at",
+        "track flight 234",
+        "is the plane running late",
+    ],
+    "Seat Availability": [
+        "are there seats available on the flight",
+        "is there a window seat left",
+        "how many seats are left to paris",
+        "can i pick an aisle seat",
+        "check seat availability for tomorrow",
+        "any business class seats open",
+        "i want to change my seat",
+        "is the flight full",
+    ],
+    "Pet Travel": [
+        "can i bring my dog",
+        "pet travel policy",
+        "can my cat fly in the cabin",
+        "do you allow pets on board",
+        "rules for flying with a service animal",
+        "how much to bring a puppy on the plane",
+        "can animals travel in cargo",
+        "pet carrier size limits",
+    ],
+}
+
+
+def _features(text: str) -> List[str]:
+    tokens = normalize_query(text).split()
+    return tokens + [f"{a}_{b}" for a, b in zip(tokens, tokens[1:])]
+
+
+class TfidfNearestNeighbours:
+    """Tiny TF-IDF k-nearest-neighbour classifier over labelled example queries"""
+
+    def __init__(self, examples: Dict[str, List[str]], k: int = 3):
+        self.k = k
+        docs = [(label, _features(text)) for label, texts in examples.items() for text in texts]
+        doc_freq = Counter(term for _, terms in docs for term in set(terms))
+        self.idf = {term: math.log((1 + len(docs)) / (1 + df)) + 1 for term, df in doc_freq.items()}
+        self.vectors = [(label, self._vectorize(terms)) for label, terms in docs]
+
+    def _vectorize(self, terms: List[str]) -> Dict[str, float]:
+        counts = Counter(t for t in terms if t in self.idf)
+        vector = {t: c * self.idf[t] for t, c in counts.items()}
+        norm = math.sqrt(sum(v * v for v in vector.values()))
+        return {t: v / norm for t, v in vector.items()} if norm else {}
+
+    def predict(self, text: str) -> Optional[Tuple[str, float]]:
+        """Return (label, confidence) where confidence blends similarity and neighbour agreement"""
+        query = self._vectorize(_features(text))
+        if not query:
+            return None
+        scored = sorted(
+            ((sum(w * vec.get(t, 0.0) for t, w in query.items()), label) for label, vec in self.vectors),
+            reverse=True,
+        )[: self.k]
+        votes: Dict[str, float] = {}
+        for score, label in scored:
+            votes[label] = votes.get(label, 0.0) + score
+        total = sum(votes.values())
+        if total <= 0:
+            return None
+        label = max(votes, key=votes.get)
+        best_similarity = max(score for score, l in scored if l == label)
+        return label, round(best_similarity * votes[label] / total, 3)
+
+
+class LocalIntentClassifier:
+    """Keyword/regex tier followed by a TF-IDF nearest-neighbour tier.
+
+    Returns the same ``detected_intents`` schema as the LLM classifier, or an
+    empty list when neither tier reaches ``threshold`` so the caller can fall
+    back to the LLM.
+    """
+
+    def __init__(self, threshold: float = 0.6, examples: Optional[Dict[str, List[str]]] = None):
+        self.threshold = threshold
+        self.knn = TfidfNearestNeighbours(examples or INTENT_EXAMPLES)
+
+    def _intent(self, intent_type: str, confidence: float, justification: str) -> dict:
+        return {
+            "type": intent_type,
+            "sub_intent": DEFAULT_SUB_INTENTS.get(intent_type, "Unknown"),
+            "confidence": confidence,
+            "justification": justification,
+        }
+
+    def classify_keywords(self, query: str) -> List[dict]:
+        text = query.lower()
+        for intent_type, pattern, confidence in KEYWORD_RULES:
+            if intent_type == "Cancel Trip" and CANCEL_QUESTION_OR_NEGATION.search(text):
+                continue
+            if pattern.search(text):
+                return [self._intent(intent_type, confidence, "Matched local keyword rule")]
+        return []
+
+    def classify_knn(self, query: str) -> List[dict]:
+        prediction = self.knn.predict(query)
+        if prediction is None:
+            return []
+        intent_type, confidence = prediction
+        return [self._intent(intent_type, confidence, "Nearest labelled example queries")]
+
+    def guess(self, query: str) -> List[dict]:
+        """Best local guess regardless of threshold, for work started before the LLM has answered"""
+        return self.classify_keywords(query) or self.classify_knn(query)
+
+    def classify(self, query: str) -> Tuple[List[dict], Optional[str]]:
+        """Return (intents, tier) for the first confident tier, or ([], None)"""
+        intents = self.classify_keywords(query)
+        if intents and intents[0]["confidence"] >= self.threshold:
+            return intents, "keyword"
+        intents = self.classify_knn(query)
+        if intents and intents[0]["type"] == "Cancel Trip" and CANCEL_QUESTION_OR_NEGATION.search(query.lower()):
+            return [], None
+        if intents and intents[0]["confidence"] >= self.threshold:
+            return intents, "knn"
+        return [], None
@@ -1,40 +1,95 @@
 import os
+import re
+import json
 import sys
 
-from typing import List
+from collections import Counter
+from typing import List, Optional
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
-from agent import Agent
-from config.settings import Settings
+from agent import Agent, AsyncAgent
+from batching import MicroBatcher
+from cache import create_cache_backend, make_cache_key
+from config.settings import Settings, settings
+from fastintent import LocalIntentClassifier
 from prompts.agent_prompts import INTENT_CLASSIFIER_PROMPT
-from groq import Groq
+from tracing import current_span, tracer
+from groq import AsyncGroq, Groq
 
 
 class IntentClassifierAgent:
 
     def __init__(self):
         self.client = Groq(api_key=Settings().GROQ_API_KEY)
-        self.agent = Agent(self.client, INTENT_CLASSIFIER_PROMPT)
+        self.agent = Agent(self.client, INTENT_CLASSIFIER_PROMPT, memory="stateless")
+        self.async_client = AsyncGroq(api_key=Settings().GROQ_API_KEY)
+        self.async_agent = AsyncAgent(self.async_client, INTENT_CLASSIFIER_PROMPT, memory="stateless")
+        self.batcher = MicroBatcher(
+            self._classify_remote_async,
+            max_batch_size=settings.INTENT_BATCH_MAX_SIZE,
+            max_wait_ms=settings.INTENT_BATCH_MAX_WAIT_MS,
+            max_concurrency=settings.INTENT_BATCH_MAX_CONCURRENCY,
+        )
+        self.cache = create_cache_backend(
+            settings.CACHE_URL,
+            namespace="intent",
+            ttl=settings.INTENT_CACHE_TTL,
+            max_entries=settings.INTENT_CACHE_MAX_ENTRIES,
+        )
+        self.local_classifier = (
+            LocalIntentClassifier(threshold=settings.INTENT_FAST_PATH_THRESHOLD)
+            if settings.INTENT_FAST_PATH_ENABLED
+            else None
+        )
+        self.tier_counts = Counter({"cache": 0, "keyword": 0, "knn": 0, "llm": 0})
 
 
     def build_intent_prompt(self, query: str) -> str:
         return INTENT_CLASSIFIER_PROMPT.format(query=query)
 
 
-    def get_intent(self, query: str) -> List[dict]:
-        intent_prompt = self.build_intent_prompt(query)
-        response = self.agent(intent_prompt)
+    @tracer.traced("intent.classify_local")
+    def classify_locally(self, query: str) -> Optional[List[dict]]:
+        """Intents from the cache or the local fast path without calling the LLM, or None"""
+        return self._classify_locally(query, make_cache_key(query, keep_stopwords=True))
 
-        import json
-        import re
-        
-        json_match = re.search(r'\{.*\}', response, re.DOTALL)
+    def guess_intent(self, query: str) -> List[dict]:
+        """Low-confidence local guess, used to start speculative work while the LLM classifies"""
+        return self.local_classifier.guess(query) if self.local_classifier is not None else []
+
+    def _classify_locally(self, query: str, cache_key: str) -> Optional[List[dict]]:
+        """Answer from the cache or the local fast path, or None if the LLM is needed"""
+        with tracer.span("cache.get", **{"cache.namespace": "intent"}) as span:
+            cached = self.cache.get(cache_key)
+            span.set_attribute("cache.hit", cached is not None)
+        if cached is not None:
+            self._record_tier("cache", cached)
+            return cached
+
+        if self.local_classifier is not None:
+            intents, tier = self.local_classifier.classify(query)
+            if intents:
+                self._record_tier(tier, intents)
+                return intents
+        return None
+
+    def _record_tier(self, tier: str, intents: List[dict]):
+        self.tier_counts[tier] += 1
+        span = current_span()
+        if span is not None:
+            span.set_attributes({"intent.tier": tier, "intent.type": intents[0].get("type") if intents else None})
+
+    def _parse_response(self, response: str, cache_key: str) -> List[dict]:
+        json_match = re.search(r'\{.*\}', response or "", re.DOTALL)
         if json_match:
             json_str = json_match.group()
             try:
                 data = json.loads(json_str)
-                return data.get("detected_intents", [])
+                intents = data.get("detected_intents", [])
+                if intents:
+                    self.cache.set(cache_key, intents)
+                return intents
             except json.JSONDecodeError:
                 print("Failed to parse JSON response")
                 return []
@@ -42,6 +97,53 @@ class IntentClassifierAgent:
         print("No JSON found in response")
         return []
 
+    @tracer.traced("intent.classify")
+    def get_intent(self, query: str) -> List[dict]:
+        cache_key = make_cache_key(query, keep_stopwords=True)
+        intents = self._classify_locally(query, cache_key)
+        if intents is not None:
+            return intents
+
+        intent_prompt = self.build_intent_prompt(query)
+        response = self.agent(intent_prompt)
+        intents = self._parse_response(response, cache_key)
+        self._record_tier("llm", intents)
+        return intents
+
+    async def _classify_remote_async(self, query: str) -> str:
+        return await self.async_agent(self.build_intent_prompt(query))
+
+    @tracer.traced("intent.classify")
+    async def aget_intent(self, query: str, checked_locally: bool = False) -> List[dict]:
+        """Async get_intent; concurrent LLM classifications are micro-batched.
+
+        Pass ``checked_locally`` when classify_locally() already returned None for
+        this query, so the cache and fast path are not consulted (and counted) twice.
+        """
+        cache_key = make_cache_key(query, keep_stopwords=True)
+        if not checked_locally:
+            intents = self._classify_locally(query, cache_key)
+            if intents is not None:
+                return intents
+
+        response = await self.batcher.submit(query, key=cache_key)
+        intents = self._parse_response(response, cache_key)
+        self._record_tier("llm", intents)
+        return intents
+
+    def get_tier_stats(self) -> dict:
+        """How many classifications each tier answered, and its share of traffic"""
+        total = sum(self.tier_counts.values())
+        return {
+            tier: {"count": count, "fraction": round(count / total, 3) if total else 0.0}
+            for tier, count in self.tier_counts.items()
+        }
+
+    async def aclose(self):
+        """Stop the micro-batcher's worker task and close the async LLM client"""
+        await self.batcher.close()
+        await self.async_client.close()
+
 
 if __name__ == "__main__":
     classifier = IntentClassifierAgent()
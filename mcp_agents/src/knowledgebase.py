@@ -0,0 +1,248 @@
+"""Local vector index of the airline's policy documents.
+
+Documents (.md/.txt) are chunked on paragraph boundaries, embedded and saved
+as a NumPy matrix next to a JSON manifest, so policy questions can be answered
+from a top-k cosine search instead of a live web search.
+
+    python knowledgebase.py ingest              # build the index from KB_DOCS_DIR
+    python knowledgebase.py search "can I bring my dog"
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+import zlib
+from typing import List, Tuple
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from cache import normalize_query
+from config.settings import settings
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DOCS_DIR = os.path.join(BASE_DIR, "knowledge", "policies")
+DEFAULT_INDEX_DIR = os.path.join(BASE_DIR, "knowledge", "index")
+DOC_EXTENSIONS = (".md", ".txt")
+
+
+def chunk_text(text: str, max_chars: int = 800, overlap: int = 1) -> List[str]:
+    """Split text into chunks of whole paragraphs, repeating `overlap` paragraphs between chunks.
+
+    Markdown headings stay attached to the paragraphs that follow them.
+    """
+    paragraphs = [p.strip() for p in re.split(r"\n\s*\n", text) if p.strip()]
+    chunks, current = [], []
+    for paragraph in paragraphs:
+        if current and sum(len(p) for p in current) + len(paragraph) > max_chars and not current[-1].startswith("#"):
+            chunks.append("\n\n".join(current))
+            current = current[-overlap:] if overlap else []
+        current.append(paragraph)
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+
+class HashingEmbedder:
+    """Dependency-free embedding: hashed words, word bigrams and in-word character n-grams.
+
+    The character n-grams let "cancelling" match "cancellation" without a
+    stemmer. Counts are sublinear (log1p) and rows are L2-normalized.
+    """
+
+    def __init__(self, dim: int = 2048, char_ngram: int = 4):
+        self.dim = dim
+        self.char_ngram = char_ngram
+        self.name = f"hashing-{dim}-c{char_ngram}"
+
+    def _features(self, text: str) -> List[str]:
+        tokens = normalize_query(text).split()
+        features = tokens + [f"{a}_{b}" for a, b in zip(tokens, tokens[1:])]
+        n = self.char_ngram
+        for token in tokens:
+            word = f"<{token}>"
+            features.extend(word[i:i + n] for i in range(max(1, len(word) - n + 1)))
+        return features
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                matrix[row, zlib.crc32(feature.encode()) % self.dim] += 1.0
+        np.log1p(matrix, out=matrix)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.where(norms == 0, 1.0, norms)
+
+
+class NVIDIAEmbedder:
+    """NVIDIA hosted embeddings (needs langchain-nvidia-ai-endpoints and NVIDIA_API_KEY)"""
+
+    def __init__(self, model: str):
+        from langchain_nvidia_ai_endpoints import NVIDIAEmbeddings
+
+        self.name = f"nvidia:{model}"
+        self.client = NVIDIAEmbeddings(model=model, api_key=settings.NVIDIA_API_KEY or None)
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        matrix = np.asarray(self.client.embed_documents(texts), dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.where(norms == 0, 1.0, norms)
+
+
+def create_embedder(name: str = "hashing"):
+    """``hashing`` (default, offline) or ``nvidia:<model>``"""
+    if not name or name == "hashing":
+        return HashingEmbedder()
+    if name.startswith("nvidia:"):
+        return NVIDIAEmbedder(name[len("nvidia:"):])
+    raise ValueError(f"Unsupported embedder: {name}")
+
+
+class KnowledgeBase:
+    """Chunk embeddings held in memory as one matrix; search is a single matrix-vector product.
+
+    The index on disk is rebuilt only when the documents change, and the
+    in-memory copy is swapped atomically so searches never see a half-built index.
+    """
+
+    def __init__(self, docs_dir: str = DEFAULT_DOCS_DIR, index_dir: str = DEFAULT_INDEX_DIR, embedder=None):
+        self.docs_dir = docs_dir
+        self.index_dir = index_dir
+        self.embedder = embedder or HashingEmbedder()
+        self.embeddings = np.zeros((0, 0), dtype=np.float32)
+        self.chunks: List[dict] = []
+        self.manifest: dict = {}
+        self._lock = threading.Lock()
+
+    @property
+    def index_path(self) -> str:
+        return os.path.join(self.index_dir, "index.npz")
+
+    def is_empty(self) -> bool:
+        return not self.chunks
+
+    def _documents(self) -> List[Tuple[str, str, str]]:
+        """(relative path, sha1, text) for every policy document"""
+        documents = []
+        if not os.path.isdir(self.docs_dir):
+            return documents
+        for root, _, files in os.walk(self.docs_dir):
+            for name in sorted(files):
+                if not name.lower().endswith(DOC_EXTENSIONS) or name.lower() == "readme.md":
+                    continue
+                path = os.path.join(root, name)
+                with open(path, encoding="utf-8") as f:
+                    text = f.read()
+                documents.append((os.path.relpath(path, self.docs_dir), hashlib.sha1(text.encode()).hexdigest(), text))
+        return documents
+
+    def _fingerprint(self, documents) -> dict:
+        return {"embedder": self.embedder.name, "documents": {path: digest for path, digest, _ in documents}}
+
+    def load(self) -> bool:
+        """Load the saved index; returns False if there is none"""
+        if not os.path.exists(self.index_path):
+            return False
+        with np.load(self.index_path) as index:
+            manifest = json.loads(str(index["manifest"]))
+            embeddings = index["embeddings"]
+        if manifest.get("embedder") != self.embedder.name:
+            print(f"⚠️ Knowledge base index was built with {manifest.get('embedder')}, not {self.embedder.name}; ignoring it")
+            return False
+        with self._lock:
+            self.embeddings, self.chunks, self.manifest = embeddings, manifest["chunks"], manifest
+        return True
+
+    def ingest(self) -> int:
+        """Chunk and embed every document, save the index and swap it in; returns the chunk count"""
+        documents = self._documents()
+        chunks = [
+            {"source": path, "chunk": i, "text": text}
+            for path, _, body in documents
+            for i, text in enumerate(chunk_text(body))
+        ]
+        embeddings = self.embedder.embed([c["text"] for c in chunks]) if chunks else np.zeros((0, 0), dtype=np.float32)
+        manifest = {**self._fingerprint(documents), "built_at": time.time(), "chunks": chunks}
+
+        os.makedirs(self.index_dir, exist_ok=True)
+        # Matrix and manifest share one file, written then renamed, so readers in other
+        # processes never load a partial index or a matrix paired with another manifest
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, embeddings=embeddings, manifest=np.array(json.dumps(manifest)))
+        os.replace(tmp_path, self.index_path)
+
+        with self._lock:
+            self.embeddings, self.chunks, self.manifest = embeddings, chunks, manifest
+        return len(chunks)
+
+    def refresh(self) -> bool:
+        """Rebuild the index if documents were added, changed or removed; returns True if rebuilt"""
+        fingerprint = self._fingerprint(self._documents())
+        if not self.manifest:
+            self.load()
+        if self.manifest and all(self.manifest.get(k) == v for k, v in fingerprint.items()):
+            return False
+        print(f"🔄 Rebuilding knowledge base index ({len(fingerprint['documents'])} documents)")
+        self.ingest()
+        return True
+
+    def search(self, query: str, k: int = 4, min_score: float = 0.0) -> List[Tuple[float, dict]]:
+        """Top-k chunks by cosine similarity"""
+        with self._lock:
+            embeddings, chunks = self.embeddings, self.chunks
+        if not chunks:
+            return []
+        scores = embeddings @ self.embedder.embed([query])[0]
+        k = min(k, len(chunks))
+        top = np.argpartition(-scores, k - 1)[:k]
+        ranked = sorted(((float(scores[i]), chunks[i]) for i in top), key=lambda hit: hit[0], reverse=True)
+        return [hit for hit in ranked if hit[0] >= min_score]
+
+    def get_stats(self) -> dict:
+        return {
+            "chunks": len(self.chunks),
+            "documents": len(self.manifest.get("documents", {})),
+            "embedder": self.embedder.name,
+            "built_at": self.manifest.get("built_at"),
+        }
+
+
+def create_knowledge_base() -> KnowledgeBase:
+    """Knowledge base configured from settings, loaded from disk (or built if missing/stale)"""
+    kb = KnowledgeBase(
+        docs_dir=settings.KB_DOCS_DIR or DEFAULT_DOCS_DIR,
+        index_dir=settings.KB_INDEX_DIR or DEFAULT_INDEX_DIR,
+        embedder=create_embedder(settings.KB_EMBEDDER),
+    )
+    kb.refresh()
+    return kb
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("ingest", help="Rebuild the index from the policy documents")
+    search = sub.add_parser("search", help="Show the top matching chunks for a query")
+    search.add_argument("query")
+    search.add_argument("-k", type=int, default=settings.KB_TOP_K)
+    args = parser.parse_args()
+
+    knowledge_base = KnowledgeBase(
+        docs_dir=settings.KB_DOCS_DIR or DEFAULT_DOCS_DIR,
+        index_dir=settings.KB_INDEX_DIR or DEFAULT_INDEX_DIR,
+        embedder=create_embedder(settings.KB_EMBEDDER),
+    )
+    if args.command == "ingest":
+        print(f"✅ Indexed {knowledge_base.ingest()} chunks from {knowledge_base.docs_dir}")
+    else:
+        if not knowledge_base.load():
+            knowledge_base.ingest()
+        for score, chunk in knowledge_base.search(args.query, k=args.k):
+            print(f"{score:.3f}  {chunk['source']}#{chunk['chunk']}\n{chunk['text']}\n")
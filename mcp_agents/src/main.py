@@ -2,9 +2,11 @@ import streamlit as st
 import os
 import sys
 import asyncio
-from policyagent import process_query_sync, initialize_agent_sync
-
-initialize_agent_sync()
+import uuid
+import router
+from policyagent import agent_loop, iterate_on_agent_loop, policy_agent_manager, submit_query, stream_query_sync, start_agent_warmup
+from config.settings import settings
+from tracing import tracer
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.append(current_dir)
@@ -15,6 +17,13 @@ st.set_page_config(
     layout="wide"
 )
 
+@st.cache_resource
+def warm_up_policy_agent():
+    """Spawn the MCP servers and load the LLM client in the background, once per process"""
+    return start_agent_warmup()
+
+warm_up_policy_agent()
+
 st.markdown("""
 <style>
     .main-header {
@@ -109,13 +118,12 @@ if "messages" not in st.session_state:
         {"role": "assistant", "content": "👋 Hello! I'm NexusAI, your travel assistant. I can help with flight cancellations, status checks, seat availability, and travel policies. How can I assist you today?"}
     ]
 
+if "conversation_id" not in st.session_state:
+    # Keys this browser session's memory in the policy agent's session store
+    st.session_state.conversation_id = uuid.uuid4().hex
+
 if "cancellation_flow" not in st.session_state:
-    st.session_state.cancellation_flow = {
-        "active": False,
-        "step": None, 
-        "ticket_id": None,
-        "user_id": None
-    }
+    st.session_state.cancellation_flow = router.new_cancellation_flow()
 
 @st.cache_resource
 def load_agents():
@@ -124,7 +132,7 @@ def load_agents():
         from intentclassifier import IntentClassifierAgent
         
         intent_classifier = IntentClassifierAgent()
-        cancel_agent = CancelTripAgent(api_url="http://127.0.0.1:8000")
+        cancel_agent = CancelTripAgent(api_url=settings.TICKET_API_URL)
         
         return {
             "intent_classifier": intent_classifier,
@@ -135,6 +143,20 @@ def load_agents():
 
 agents_dict, agents_loaded = load_agents()
 
+@st.cache_resource
+def load_speculative_pipeline():
+    """Classifies messages while the policy agent already starts answering them"""
+    if not agents_loaded:
+        return None
+    from speculation import SpeculativePipeline
+    return SpeculativePipeline(
+        policy_agent_manager,
+        agents_dict["intent_classifier"],
+        enabled=settings.SPECULATIVE_POLICY_ENABLED,
+    )
+
+speculative_pipeline = load_speculative_pipeline()
+
 @st.cache_resource
 def setup_policy_agent():
     """Setup the PolicyAgent for handling general queries"""
@@ -152,41 +174,14 @@ async def run_policy_agent_async(user_message: str) -> str:
         return "I'm currently unable to process policy-related queries. Please try again later."
     
     try:
-        from dotenv import load_dotenv
-        from langchain_groq import ChatGroq
-        from mcp import ClientSession
-        from mcp_use import MCPAgent, MCPClient
-        import os
-        
-        load_dotenv()
-        config_file = r"C:\\Users\\jaiak\\Downloads\\new asapp\\NexusAI\\mcp_agents\\src\\browser_mcp.json"
-        
-        client = MCPClient.from_config_file(config_file)
-        llm = ChatGroq(model="openai/gpt-oss-120b")
-        
-        agent = MCPAgent(
-            llm=llm,
-            client=client,
-            max_steps=15,
-            memory_enabled=True,
-        )
-        
-        response = await agent.run(user_message)
-        await client.close_all_sessions()
-        return response
-        
+        return await asyncio.wrap_future(submit_query(user_message, conversation_id=st.session_state.conversation_id))
     except Exception as e:
         return f"Policy agent error: {str(e)}"
 
 def run_policy_agent_sync(user_message: str) -> str:
     """Run policy agent synchronously for Streamlit"""
     try:
-        import asyncio
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        response = loop.run_until_complete(run_policy_agent_async(user_message))
-        loop.close()
-        return response
+        return submit_query(user_message, conversation_id=st.session_state.conversation_id).result()
     except Exception as e:
         return f"Error processing your query: {str(e)}"
 
@@ -203,123 +198,73 @@ def classify_intent(user_message: str):
 
 def start_cancellation_flow():
     """Start the cancellation flow"""
-    st.session_state.cancellation_flow = {
-        "active": True,
-        "step": "ticket_id",
-        "ticket_id": None,
-        "user_id": None
-    }
-    return "🛫 **Flight Cancellation Started**\n\nI can help you cancel your flight. Please provide your **Ticket ID** (any numbers or letters):"
+    return router.start_cancellation_flow(st.session_state.cancellation_flow)
 
 def process_cancellation_flow(user_message: str) -> str:
     """Process messages during cancellation flow"""
-    flow = st.session_state.cancellation_flow
-    
-    if flow["step"] == "ticket_id":
-        if user_message.strip():
-            ticket_id = user_message.strip()
-            st.session_state.cancellation_flow["ticket_id"] = ticket_id
-            st.session_state.cancellation_flow["step"] = "user_id"
-            return f"✅ **Ticket ID Received**\n\nGot your Ticket ID: **{ticket_id}**\n\nNow please provide your **User ID** (any numbers or letters):"
-        else:
-            return "❌ **Please provide a Ticket ID**\n\nPlease enter your Ticket ID (it can be any numbers or letters):"
-    
-    elif flow["step"] == "user_id":
-        if user_message.strip():
-            user_id = user_message.strip()
-            st.session_state.cancellation_flow["user_id"] = user_id
-            st.session_state.cancellation_flow["step"] = "confirmation"
-            ticket_id = flow["ticket_id"]
-            return f"✅ **User ID Received**\n\nGot your User ID: **{user_id}**\n\n**Cancellation Summary:**\n• Ticket ID: {ticket_id}\n• User ID: {user_id}\n\nShould I proceed with cancelling this ticket? Please type **'yes'** to confirm or **'no'** to cancel."
-        else:
-            return "❌ **Please provide a User ID**\n\nPlease enter your User ID (it can be any numbers or letters):"
-    
-    elif flow["step"] == "confirmation":
-        user_message_lower = user_message.lower().strip()
-        if user_message_lower in ['yes', 'y', 'confirm', 'proceed', 'ok']:
-            return process_cancellation()
-        elif user_message_lower in ['no', 'n', 'cancel', 'stop']:
-            return reset_cancellation_flow("❌ **Cancellation Cancelled**\n\nFlight cancellation has been cancelled. How else can I help you?")
-        else:
-            return "❓ **Confirmation Required**\n\nPlease type **'yes'** to proceed with cancellation or **'no'** to cancel the request:"
+    return agent_loop.run(router.process_cancellation_flow(
+        st.session_state.cancellation_flow, user_message, agents_dict.get("cancel_trip")
+    ))
 
-def process_cancellation() -> str:
-    """Process the actual cancellation"""
-    flow = st.session_state.cancellation_flow
-    ticket_id = flow["ticket_id"]
-    user_id = flow["user_id"]
-    
-    try:
-        if agents_loaded and "cancel_trip" in agents_dict:
-            payload = {
-                "user_id": user_id,
-                "ticket_id": ticket_id
-            }
-            
-            import requests
-            try:
-                response = requests.post(
-                    "http://127.0.0.1:8000/mcp/db/cancel_ticket",
-                    json=payload,
-                    headers={"Content-Type": "application/json"},
-                    timeout=10
-                )
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    if result.get("status") == "success":
-                        if "already cancelled" in result.get("message", "").lower():
-                            success_msg = f"✅ **Ticket Already Cancelled**\n\n🎫 **Ticket Details:**\n• Ticket ID: {ticket_id}\n• User ID: {user_id}\n\n📝 **Status:** This ticket was already cancelled previously. No further action needed."
-                        else:
-                            success_msg = f"✅ **Flight Cancelled Successfully!**\n\n🎫 **Ticket Details:**\n• Ticket ID: {ticket_id}\n• User ID: {user_id}\n\n📧 **Next Steps:**\n• Confirmation email sent\n• Refund will be processed in 5-7 business days\n• Check your email for details"
-                    else:
-                        success_msg = f"❌ **Cancellation Failed**\n\nError: {result.get('message', 'Unknown error')}"
-                else:
-                    success_msg = f"❌ **API Error**\n\nServer returned status: {response.status_code}"
-                    
-            except requests.RequestException as e:
-                success_msg = f"❌ **Connection Error**\n\nCould not connect to cancellation service: {str(e)}"
-        else:
-            # Demo mode
-            success_msg = f"✅ **Flight Cancelled Successfully!**\n\n🎫 **Ticket Details:**\n• Ticket ID: {ticket_id}\n• User ID: {user_id}\n\n📧 **Next Steps:**\n• Confirmation email sent\n• Refund will be processed in 5-7 business days\n• Check your email for details"
-        
-        reset_cancellation_flow()
-        return success_msg + "\n\nWhat else can I help you with today?"
-        
-    except Exception as e:
-        error_msg = f"❌ **Cancellation Failed**\n\nError: {str(e)}\n\nPlease try again or contact customer support."
-        reset_cancellation_flow()
-        return error_msg
-
-def reset_cancellation_flow():
-    """Reset cancellation flow and return to initial state"""
-    st.session_state.cancellation_flow = {
-        "active": False,
-        "step": None,
-        "ticket_id": None,
-        "user_id": None
-    }
+def show_intent(intents: list):
+    if intents:
+        intent_info = f"🎯 Detected: {intents[0].get('type', 'Unknown')} - {intents[0].get('sub_intent', 'Unknown')} (Confidence: {intents[0].get('confidence', 0):.2f})"
+        st.markdown(f'<div class="intent-info">{intent_info}</div>', unsafe_allow_html=True)
 
 def handle_policy_agent_query(user_message: str, intents: list) -> str:
-    """Handle queries using PolicyAgent for non-cancellation intents"""
+    """Handle queries using PolicyAgent for non-cancellation intents, rendering tokens as they arrive"""
+    return render_policy_events(stream_query_sync(user_message, intents, st.session_state.conversation_id))
+
+def handle_speculative_query(user_message: str) -> str:
+    """Classify the message while the policy agent answers it, switching to the cancellation flow if needed"""
+    events = iterate_on_agent_loop(speculative_pipeline.stream(user_message, st.session_state.conversation_id))
+    return render_policy_events(events)
+
+def render_policy_events(events) -> str:
+    """Render a policy agent event stream as it arrives and return the final message"""
     try:
-        st.info("🔍 Consulting travel database...")
-        response = process_query_sync(user_message)
-        return f"📋 **Travel Information**\n\n{response}"
+        status = st.info("🔍 Consulting travel database...")
+        placeholder = st.empty()
+        partial = ""
+        for event in events:
+            if event["type"] == "intent":
+                show_intent(event["intents"])
+            elif event["type"] == "cancel_trip":
+                status.empty()
+                return start_cancellation_flow()
+            elif event["type"] == "token":
+                partial += event["content"]
+                placeholder.markdown(f'<div class="agent-response"><strong>🤖 NexusAI:</strong><br>{partial}</div>', unsafe_allow_html=True)
+            elif event["type"] == "step":
+                # Tokens so far were the model planning this tool call, not the answer
+                partial = ""
+                status.info(f"🔧 Step {event['step']}: using {event['tool']}...")
+            elif event["type"] == "error":
+                return f"❌ **Error processing query**\n\n{event['content']}"
+            elif event["type"] == "done":
+                return f"📋 **Travel Information**\n\n{event['content']}"
+        return f"📋 **Travel Information**\n\n{partial}"
     except Exception as e:
         return f"❌ **Error processing query**\n\nI encountered an error: {str(e)}"
+    finally:
+        # Stop the agent run when we return early (cancel_trip) or Streamlit reruns mid-stream
+        events.close()
     
 def process_user_message(user_message: str) -> str:
     """Main function to process user messages with intent classification"""
-    
+    with tracer.span("chat.message", **{"chat.conversation_id": st.session_state.conversation_id}):
+        return _process_user_message(user_message)
+
+
+def _process_user_message(user_message: str) -> str:
     if st.session_state.cancellation_flow["active"]:
         return process_cancellation_flow(user_message)
+
+    if speculative_pipeline is not None:
+        return handle_speculative_query(user_message)
     
     intents = classify_intent(user_message)
-    
-    if intents:
-        intent_info = f"🎯 Detected: {intents[0].get('type', 'Unknown')} - {intents[0].get('sub_intent', 'Unknown')} (Confidence: {intents[0].get('confidence', 0):.2f})"
-        st.markdown(f'<div class="intent-info">{intent_info}</div>', unsafe_allow_html=True)
+    show_intent(intents)
     
     if intents:
         primary_intent = intents[0].get('type', 'Unknown')
@@ -333,6 +278,12 @@ def process_user_message(user_message: str) -> str:
 
 st.markdown('<div class="main-header">✈️ NexusAI Travel Assistant</div>', unsafe_allow_html=True)
 
+readiness = policy_agent_manager.get_readiness()
+if readiness["status"] == "failed":
+    st.warning(f"⚠️ Travel tools failed to start: {readiness['error']}")
+elif not readiness["ready"]:
+    st.info("⏳ Travel tools are starting in the background; the first answer may take a little longer.")
+
 
 if st.session_state.cancellation_flow["active"]:
     flow = st.session_state.cancellation_flow
@@ -379,27 +330,19 @@ if send_button and user_input:
     st.rerun()
 
 if clear_button:
+    # Drop this conversation's agent memory too, so the next answer starts fresh
+    agent_loop.submit(policy_agent_manager.clear_memory(st.session_state.conversation_id))
     st.session_state.messages = [
         {"role": "assistant", "content": "👋 Hello! I'm NexusAI, your travel assistant. How can I help you today?"}
     ]
-    st.session_state.cancellation_flow = {
-        "active": False,
-        "step": None,
-        "ticket_id": None,
-        "user_id": None
-    }
+    st.session_state.cancellation_flow = router.new_cancellation_flow()
     st.rerun()
 
 if clear_button:
     st.session_state.messages = [
         {"role": "assistant", "content": "👋 Hello! I'm NexusAI, your travel assistant. How can I help you today?"}
     ]
-    st.session_state.cancellation_flow = {
-        "active": False,
-        "step": None,
-        "ticket_id": None,
-        "user_id": None
-    }
+    st.session_state.cancellation_flow = router.new_cancellation_flow()
     st.rerun()
 
 
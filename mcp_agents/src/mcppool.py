@@ -0,0 +1,334 @@
+import asyncio
+import json
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional, Set
+
+from mcp_use import MCPClient
+
+from tracing import tracer
+
+
+class PooledSession:
+    """One warm MCP server session owned by the pool.
+
+    The stdio session is opened and closed by the same long-lived owner task:
+    its anyio cancel scopes must be exited in the task that entered them, or
+    the server subprocess is left running.
+    """
+
+    def __init__(self, server_name: str):
+        self.server_name = server_name
+        self.client: Optional[MCPClient] = None
+        self.session = None
+        self.spawn_latency = 0.0
+        self.created_at = time.time()
+        self.last_used = self.created_at
+        self._stop = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @classmethod
+    async def open(cls, server_name: str, server_config: dict) -> "PooledSession":
+        """Spawn the server on its owner task and wait until the session is connected"""
+        pooled = cls(server_name)
+        ready = asyncio.get_running_loop().create_future()
+        pooled._task = asyncio.create_task(pooled._own(server_config, ready), name=f"mcp-session-{server_name}")
+        try:
+            await ready
+        except asyncio.CancelledError:
+            pooled._stop.set()
+            raise
+        return pooled
+
+    async def _own(self, server_config: dict, ready: asyncio.Future):
+        start = time.perf_counter()
+        try:
+            client = MCPClient.from_dict({"mcpServers": {self.server_name: server_config}})
+            session = await client.create_session(self.server_name)
+        except BaseException as e:
+            if not ready.done():
+                if isinstance(e, asyncio.CancelledError):
+                    ready.cancel()
+                else:
+                    ready.set_exception(e)
+            return
+        self.client, self.session = client, session
+        self.spawn_latency = time.perf_counter() - start
+        self._trace_tool_calls()
+        if not ready.done():
+            ready.set_result(None)
+        try:
+            await self._stop.wait()
+        finally:
+            try:
+                await client.close_all_sessions()
+            except Exception as e:
+                print(f"⚠️ Error closing {self.server_name} session: {e}")
+
+    def _trace_tool_calls(self):
+        """Wrap the connector's call_tool (used by every MCPAgent tool) in an mcp.tool span"""
+        connector = self.session.connector
+        call_tool = connector.call_tool
+        server_name = self.server_name
+
+        async def traced_call_tool(name, arguments, *args, **kwargs):
+            with tracer.span("mcp.tool", kind="client", **{"mcp.server": server_name, "mcp.tool": name}) as span:
+                result = await call_tool(name, arguments, *args, **kwargs)
+                if getattr(result, "isError", False):
+                    span.status = "ERROR"
+                return result
+
+        connector.call_tool = traced_call_tool
+
+    @property
+    def connector(self):
+        return self.session.connector
+
+    async def ping(self, timeout: float) -> bool:
+        """Return True if the underlying server still answers an MCP ping"""
+        if not getattr(self.session, "is_connected", True):
+            return False
+        connector = self.session.connector
+        client_session = getattr(connector, "client_session", None) or getattr(connector, "client", None)
+        if client_session is None:
+            return False
+        try:
+            await asyncio.wait_for(client_session.send_ping(), timeout=timeout)
+            return True
+        except Exception:
+            return False
+
+    async def close(self):
+        """Have the owner task close the session, and wait until it has"""
+        self._stop.set()
+        if self._task is not None:
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+
+class MCPSessionPool:
+    """Keeps N pre-warmed sessions per configured MCP server.
+
+    Each pooled session is backed by its own single-server MCPClient, so a dead
+    npx process can be restarted without touching the other servers. Callers
+    lease one connector per server and hand them to an MCPAgent.
+    """
+
+    def __init__(
+        self,
+        config: dict,
+        size_per_server: int = 1,
+        health_check_interval: float = 30.0,
+        health_check_timeout: float = 5.0,
+        acquire_timeout: float = 60.0,
+    ):
+        self.config = config
+        self.servers: Dict[str, dict] = dict(config.get("mcpServers", {}))
+        self.size_per_server = max(1, size_per_server)
+        self.health_check_interval = health_check_interval
+        self.health_check_timeout = health_check_timeout
+        self.acquire_timeout = acquire_timeout
+
+        self._idle: Dict[str, asyncio.Queue] = {}
+        self._in_use: Dict[str, int] = {name: 0 for name in self.servers}
+        self._restarts: Dict[str, int] = {name: 0 for name in self.servers}
+        self._spawn_failures: Dict[str, int] = {name: 0 for name in self.servers}
+        self._restarting: Dict[str, int] = {name: 0 for name in self.servers}
+        self._spawn_latencies: Dict[str, deque] = {name: deque(maxlen=50) for name in self.servers}
+        # Every live session, leased or idle, so close() can shut them all down
+        self._sessions: Set[PooledSession] = set()
+        self._health_task: Optional[asyncio.Task] = None
+        self._start_lock = asyncio.Lock()
+        self._started = False
+
+    @classmethod
+    def from_config_file(cls, path: str, **kwargs) -> "MCPSessionPool":
+        with open(path, "r") as f:
+            return cls(json.load(f), **kwargs)
+
+    @property
+    def server_names(self) -> List[str]:
+        return list(self.servers)
+
+    @property
+    def started(self) -> bool:
+        return self._started
+
+    async def start(self):
+        """Spawn every configured server up front and start the health checker"""
+        async with self._start_lock:
+            if self._started:
+                return
+            self._idle = {name: asyncio.Queue() for name in self.servers}
+            spawns = [
+                self._spawn(name)
+                for name in self.servers
+                for _ in range(self.size_per_server)
+            ]
+            results = await asyncio.gather(*spawns, return_exceptions=True)
+            for result in results:
+                if isinstance(result, PooledSession):
+                    self._idle[result.server_name].put_nowait(result)
+                else:
+                    print(f"⚠️ MCP server failed to start: {result}")
+
+            self._started = True
+            if self.health_check_interval > 0:
+                self._health_task = asyncio.create_task(self._health_loop())
+            print(f"✅ MCP session pool ready: {self.metrics()['totals']}")
+
+    async def _spawn(self, server_name: str) -> PooledSession:
+        start = time.perf_counter()
+        try:
+            with tracer.span("mcp.spawn", **{"mcp.server": server_name}):
+                pooled = await PooledSession.open(server_name, self.servers[server_name])
+        except Exception:
+            self._spawn_failures[server_name] += 1
+            raise
+        self._spawn_latencies[server_name].append(time.perf_counter() - start)
+        self._sessions.add(pooled)
+        return pooled
+
+    async def _close_session(self, pooled: PooledSession):
+        self._sessions.discard(pooled)
+        await pooled.close()
+
+    async def _restart(self, pooled: PooledSession):
+        name = pooled.server_name
+        self._restarts[name] += 1
+        self._restarting[name] += 1
+        try:
+            await self._close_session(pooled)
+            replacement = await self._spawn(name)
+        except Exception as e:
+            print(f"❌ Failed to restart MCP server '{name}': {e}")
+            return
+        finally:
+            self._restarting[name] -= 1
+        if not self._started:
+            # The pool was closed while the replacement was spawning
+            await self._close_session(replacement)
+            return
+        self._idle[name].put_nowait(replacement)
+
+    def available(self, server_name: str) -> bool:
+        """Whether a server has a live (idle, leased or restarting) session; False once every spawn failed"""
+        queue = self._idle.get(server_name)
+        return bool(queue and queue.qsize()) or self._in_use[server_name] > 0 or self._restarting[server_name] > 0
+
+    async def acquire(self, server_name: str) -> PooledSession:
+        """Take an idle session for a server, waiting if all are leased"""
+        if not self._started:
+            await self.start()
+        if not self.available(server_name):
+            # Nothing would ever be released to wait for; the health checker respawns it later
+            raise RuntimeError(f"MCP server '{server_name}' is unavailable")
+        pooled = await asyncio.wait_for(self._idle[server_name].get(), timeout=self.acquire_timeout)
+        self._in_use[server_name] += 1
+        pooled.last_used = time.time()
+        return pooled
+
+    async def release(self, pooled: PooledSession, check_health: bool = False):
+        """Return a session to the pool, restarting it if it no longer responds"""
+        self._in_use[pooled.server_name] -= 1
+        if not self._started:
+            # Leased when the pool was closed; don't hand it out again
+            await self._close_session(pooled)
+            return
+        if check_health and not await pooled.ping(self.health_check_timeout):
+            await self._restart(pooled)
+            return
+        self._idle[pooled.server_name].put_nowait(pooled)
+
+    @asynccontextmanager
+    async def lease(self, server_names: Optional[List[str]] = None):
+        """Lease one connector per server (all servers by default), skipping servers that are down"""
+        if not self._started:
+            await self.start()
+        requested = server_names if server_names is not None else self.server_names
+        names = [name for name in requested if self.available(name)]
+        if requested and not names:
+            raise RuntimeError(f"No MCP server available among {', '.join(requested)}")
+        leased: List[PooledSession] = []
+        failed = False
+        try:
+            with tracer.span("mcp.lease", **{"mcp.servers": ",".join(names)}):
+                for name in names:
+                    leased.append(await self.acquire(name))
+            yield [pooled.connector for pooled in leased]
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            for pooled in leased:
+                await self.release(pooled, check_health=failed)
+
+    async def check_health(self):
+        """Ping every idle session and restart the ones that are dead"""
+        for name, queue in self._idle.items():
+            for _ in range(queue.qsize()):
+                try:
+                    pooled = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+                if await pooled.ping(self.health_check_timeout):
+                    queue.put_nowait(pooled)
+                else:
+                    print(f"⚠️ MCP server '{name}' failed health check, restarting")
+                    await self._restart(pooled)
+            missing = self.size_per_server - queue.qsize() - self._in_use[name] - self._restarting[name]
+            for _ in range(max(0, missing)):
+                try:
+                    queue.put_nowait(await self._spawn(name))
+                except Exception as e:
+                    print(f"❌ Failed to replace MCP server '{name}': {e}")
+                    break
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.sleep(self.health_check_interval)
+            try:
+                await self.check_health()
+            except Exception as e:
+                print(f"⚠️ MCP health check error: {e}")
+
+    def metrics(self) -> dict:
+        """Per-server pool state, for sizing the pool per node"""
+        servers = {}
+        for name in self.servers:
+            latencies = self._spawn_latencies[name]
+            queue = self._idle.get(name)
+            servers[name] = {
+                "size": self.size_per_server,
+                "in_use": self._in_use[name],
+                "idle": queue.qsize() if queue else 0,
+                "restarts": self._restarts[name],
+                "spawn_failures": self._spawn_failures[name],
+                "spawn_latency_last_ms": round(latencies[-1] * 1000, 1) if latencies else None,
+                "spawn_latency_avg_ms": round(sum(latencies) / len(latencies) * 1000, 1) if latencies else None,
+                "spawn_latency_max_ms": round(max(latencies) * 1000, 1) if latencies else None,
+            }
+        totals = {
+            "in_use": sum(s["in_use"] for s in servers.values()),
+            "idle": sum(s["idle"] for s in servers.values()),
+            "restarts": sum(s["restarts"] for s in servers.values()),
+        }
+        return {"servers": servers, "totals": totals}
+
+    async def close(self):
+        """Stop health checks and close every session, including ones still leased"""
+        self._started = False
+        if self._health_task:
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+            self._health_task = None
+        for queue in self._idle.values():
+            while not queue.empty():
+                queue.get_nowait()
+        await asyncio.gather(*(self._close_session(pooled) for pooled in list(self._sessions)))
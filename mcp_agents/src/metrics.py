@@ -0,0 +1,144 @@
+"""Prometheus metrics for the chat service, the agents and the ticket service.
+
+Requests, LLM calls, Supabase queries and cancellation outcomes are counted as
+they happen. Cache and MCP pool state is read from the existing stats objects
+when /metrics is scraped (see StatsCollector), so the hot paths pay nothing
+extra for it.
+"""
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+LLM_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0)
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests by route and status code", ["service", "method", "route", "status"]
+)
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ["service", "method", "route"],
+    buckets=REQUEST_BUCKETS,
+)
+SUPABASE_LATENCY = Histogram(
+    "supabase_request_duration_seconds", "Supabase (PostgREST) call latency", ["method", "table"],
+    buckets=REQUEST_BUCKETS,
+)
+SUPABASE_ERRORS = Counter(
+    "supabase_errors_total", "Failed Supabase calls by HTTP status or exception type", ["method", "table", "reason"]
+)
+TICKET_CANCEL_OUTCOMES = Counter(
+    "ticket_cancel_outcomes_total",
+    "Ticket cancellations by outcome (not_found, already_cancelled, cancelled); mode is single, bulk or replay",
+    ["outcome", "mode"],
+)
+LLM_LATENCY = Histogram("llm_request_duration_seconds", "LLM call latency by model", ["model"], buckets=LLM_BUCKETS)
+LLM_REQUESTS = Counter("llm_requests_total", "LLM calls by model and status", ["model", "status"])
+LLM_TOKENS = Counter("llm_tokens_total", "LLM tokens by model and type (prompt, completion)", ["model", "type"])
+
+
+def route_template(request) -> str:
+    """The matched route's path template, so path parameters don't become label values"""
+    route = request.scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+async def track_request(service: str, request, call_next):
+    """Count and time one request; use from an @app.middleware("http") function"""
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = route_template(request)
+        HTTP_REQUESTS.labels(service, request.method, route, str(status)).inc()
+        HTTP_LATENCY.labels(service, request.method, route).observe(time.perf_counter() - start)
+
+
+def observe_llm(model: str, seconds: float, prompt_tokens: int = 0, completion_tokens: int = 0, error: bool = False):
+    LLM_REQUESTS.labels(model, "error" if error else "ok").inc()
+    LLM_LATENCY.labels(model).observe(seconds)
+    if prompt_tokens:
+        LLM_TOKENS.labels(model, "prompt").inc(prompt_tokens)
+    if completion_tokens:
+        LLM_TOKENS.labels(model, "completion").inc(completion_tokens)
+
+
+def observe_supabase(method: str, table: str, seconds: float, error: Optional[str] = None):
+    SUPABASE_LATENCY.labels(method, table).observe(seconds)
+    if error is not None:
+        SUPABASE_ERRORS.labels(method, table, error).inc()
+
+
+def record_cancel_outcome(outcome: str, mode: str = "single"):
+    TICKET_CANCEL_OUTCOMES.labels(outcome, mode).inc()
+
+
+class StatsCollector:
+    """Exports registered caches' and MCP pools' get_stats() output at scrape time"""
+
+    def __init__(self):
+        self.caches: Dict[str, Callable[[], dict]] = {}
+        self.pools: Dict[str, Callable[[], dict]] = {}
+
+    def register_cache(self, name: str, get_stats: Callable[[], dict]):
+        self.caches[name] = get_stats
+
+    def register_pool(self, name: str, get_metrics: Callable[[], dict]):
+        self.pools[name] = get_metrics
+
+    @staticmethod
+    def _read(kind: str, name: str, get_stats: Callable[[], dict]) -> dict:
+        try:
+            return get_stats() or {}
+        except Exception as e:
+            print(f"⚠️ Could not read {kind} stats for {name}: {e}")
+            return {}
+
+    def collect(self):
+        hits = CounterMetricFamily("cache_hits", "Cache hits", labels=["cache"])
+        misses = CounterMetricFamily("cache_misses", "Cache misses", labels=["cache"])
+        evictions = CounterMetricFamily("cache_evictions", "Entries evicted to stay within limits", labels=["cache"])
+        errors = CounterMetricFamily("cache_errors", "Backend errors, counted as misses", labels=["cache"])
+        hit_ratio = GaugeMetricFamily("cache_hit_ratio", "Hits / lookups since start", labels=["cache"])
+        entries = GaugeMetricFamily("cache_entries", "Entries currently cached", labels=["cache"])
+        for name, get_stats in self.caches.items():
+            stats = self._read("cache", name, get_stats)
+            if not stats:
+                continue
+            hits.add_metric([name], stats.get("hits", 0))
+            misses.add_metric([name], stats.get("misses", 0))
+            evictions.add_metric([name], stats.get("evictions", 0))
+            errors.add_metric([name], stats.get("errors", 0))
+            hit_ratio.add_metric([name], stats.get("hit_ratio", 0.0))
+            if stats.get("entries") is not None:
+                entries.add_metric([name], stats["entries"])
+        yield from (hits, misses, evictions, errors, hit_ratio, entries)
+
+        sessions = GaugeMetricFamily("mcp_pool_sessions", "MCP sessions by state (in_use, idle)", labels=["pool", "server", "state"])
+        size = GaugeMetricFamily("mcp_pool_size", "Configured sessions per server", labels=["pool", "server"])
+        restarts = CounterMetricFamily("mcp_pool_restarts", "Dead MCP sessions restarted", labels=["pool", "server"])
+        failures = CounterMetricFamily("mcp_pool_spawn_failures", "MCP server spawns that failed", labels=["pool", "server"])
+        spawn = GaugeMetricFamily("mcp_pool_spawn_latency_seconds", "Latency of the last MCP server spawn", labels=["pool", "server"])
+        for name, get_metrics in self.pools.items():
+            for server, state in self._read("pool", name, get_metrics).get("servers", {}).items():
+                sessions.add_metric([name, server, "in_use"], state["in_use"])
+                sessions.add_metric([name, server, "idle"], state["idle"])
+                size.add_metric([name, server], state["size"])
+                restarts.add_metric([name, server], state["restarts"])
+                failures.add_metric([name, server], state["spawn_failures"])
+                if state.get("spawn_latency_last_ms") is not None:
+                    spawn.add_metric([name, server], state["spawn_latency_last_ms"] / 1000)
+        yield from (sessions, size, restarts, failures, spawn)
+
+
+stats_collector = StatsCollector()
+REGISTRY.register(stats_collector)
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """(body, content type) of the Prometheus text exposition for this process"""
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
@@ -1,19 +1,79 @@
 import asyncio
-from dotenv import load_dotenv
-from langchain_groq import ChatGroq
-from mcp import ClientSession
-from mcp_use import MCPAgent, MCPClient
-import os
+import atexit
 import hashlib
+import importlib
+import queue
 import time
-from typing import Dict, Optional
+from concurrent.futures import Future
+from dotenv import load_dotenv
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+import os
+import sys
+from collections import Counter
+from typing import TYPE_CHECKING, AsyncIterator, Iterator, List, Optional, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from cache import create_cache_backend, make_cache_key
+from config.settings import settings
+from eventloop import BackgroundEventLoop
+from sessions import SessionStore
+from singleflight import SingleFlight
+from streaming import MetricsCallbackHandler, StreamingCallbackHandler, StreamStats, TracingCallbackHandler
+from toolrouting import IntentRunStats, ToolProfile, ToolRouter
+from tracing import tracer
+
+if TYPE_CHECKING:
+    # Imported during warm-up instead (see _import_in_thread), so importing this module stays cheap
+    from knowledgebase import KnowledgeBase
+    from langchain_groq import ChatGroq
+    from mcppool import MCPSessionPool
+
+DEFAULT_MCP_CONFIG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "browser_mcp.json")
+DEFAULT_CONVERSATION_ID = "default"
+POLICY_MODEL = "openai/gpt-oss-120b"
+KNOWLEDGE_BASE_INSTRUCTIONS = """Answer the question using only the policy excerpts provided with it. If they do not cover the question, say so and suggest contacting customer support. Keep the answer concise."""
+
+
+async def _import_in_thread(name: str):
+    """Import a heavy module (langchain_groq, mcp_use, numpy) on a worker thread so the event loop keeps serving"""
+    return await asyncio.to_thread(importlib.import_module, name)
+
 
 class PolicyAgentManager:
     def __init__(self):
-        self.client: Optional[MCPClient] = None
-        self.agent: Optional[MCPAgent] = None
-        self.cache: Dict[str, tuple[str, float]] = {}
-        self.cache_ttl = 300 
+        self.pool: Optional["MCPSessionPool"] = None
+        self.llm: Optional["ChatGroq"] = None
+        # Warm-up status: cold, warming, ready or failed, with milliseconds per phase
+        self.readiness = {"status": "cold", "error": None, "phases": {}, "warmup_ms": None}
+        self._warmup: Optional[asyncio.Task] = None
+        # Per-conversation memory; the MCP session pool and LLM client are shared by all of them
+        self.sessions = SessionStore(
+            max_sessions=settings.SESSION_MAX_SESSIONS,
+            idle_timeout=settings.SESSION_IDLE_TIMEOUT,
+            max_messages=settings.SESSION_MAX_MESSAGES,
+            max_bytes=settings.SESSION_MAX_BYTES,
+            max_total_bytes=settings.SESSION_MAX_TOTAL_BYTES or None,
+        )
+        self.cache = create_cache_backend(
+            settings.CACHE_URL,
+            namespace="policy",
+            ttl=settings.POLICY_CACHE_TTL,
+            max_entries=settings.POLICY_CACHE_MAX_ENTRIES,
+            max_bytes=settings.POLICY_CACHE_MAX_BYTES or None,
+        )
+        self.stream_stats = StreamStats()
+        # Identical cache-missing queries share one agent run (keyed on the cache key)
+        self.singleflight = SingleFlight()
+        self.avoided_runs: Counter = Counter()
+        self.knowledge_base: Optional["KnowledgeBase"] = None
+        self.knowledge_base_intents = {i.strip() for i in settings.KB_INTENTS.split(",") if i.strip()}
+        self.route_counts: Counter = Counter()
+        self._refresh_task: Optional[asyncio.Task] = None
+        # Per-intent MCP servers, tools, step budget and timeout for agent runs
+        self.tool_router = self._create_tool_router()
+        self.intent_stats = IntentRunStats()
         self.system_prompt = """You are a helpful travel assistant specializing in flight information, travel policies, and general travel queries. 
 
 Your capabilities include:
@@ -34,84 +94,340 @@ Guidelines:
 
 Perform tasks as efficiently as possible while maintaining accuracy."""
         
+    @staticmethod
+    def _create_tool_router() -> ToolRouter:
+        if not settings.MCP_TOOL_ROUTING_ENABLED:
+            # Every intent gets every tool and the old 15-step budget; runs are still measured per intent
+            return ToolRouter(profiles={})
+        if settings.MCP_TOOL_PROFILES_FILE:
+            return ToolRouter.from_file(settings.MCP_TOOL_PROFILES_FILE)
+        return ToolRouter()
+
     async def initialize(self):
-        """Initialize the agent once at startup"""
-        if self.client is None:
-            load_dotenv()
-            os.environ["GROQ_API_KEY"] = os.getenv("GROQ_API_KEY")
+        """Initialize the LLM and pre-warm the MCP session pool; concurrent callers share one warm-up"""
+        if self.pool is None:
+            # Shielded so a cancelled request doesn't abort the warm-up other callers are waiting on
+            await asyncio.shield(self.start_warmup())
 
-            config_file = r"C:\\Users\\jaiak\\Downloads\\new asapp\\NexusAI\\mcp_agents\\src\\browser_mcp.json"
+    def start_warmup(self) -> asyncio.Task:
+        """Start warming up on the running loop without waiting for it; a failed warm-up is retried"""
+        if self._warmup is None or (self._warmup.done() and self.pool is None):
+            self._warmup = asyncio.get_running_loop().create_task(self._warm_up())
+            # Failures are reported by get_readiness() and raised to whoever awaits initialize()
+            self._warmup.add_done_callback(lambda task: task.cancelled() or task.exception())
+        return self._warmup
 
-            print("Initializing Policy Agent...")
-            
+    async def _warm_up(self):
+        """Create the LLM client, spawn the MCP servers and load the knowledge base concurrently"""
+        start = time.perf_counter()
+        self.readiness.update(status="warming", error=None, phases={}, warmup_ms=None)
+        print("Initializing Policy Agent...")
+        with tracer.span("policy_agent.warmup") as span:
+            phases = [self._timed_phase("llm", self._create_llm()), self._timed_phase("mcp_pool", self._start_pool())]
+            if settings.KB_ENABLED:
+                phases.append(self._timed_phase("knowledge_base", self._start_knowledge_base()))
+            llm, pool, *_ = await asyncio.gather(*phases, return_exceptions=True)
+            error = next((r for r in (llm, pool) if isinstance(r, BaseException)), None)
+            if error is not None:
+                if not isinstance(pool, BaseException):
+                    await pool.close()
+                self.readiness.update(status="failed", error=f"{type(error).__name__}: {error}")
+                print(f"❌ Failed to initialize Policy Agent: {error}")
+                raise error
+            self.llm, self.pool = llm, pool
+            self.readiness.update(status="ready", warmup_ms=round((time.perf_counter() - start) * 1000, 1))
+            span.set_attributes({f"warmup.{name}_ms": ms for name, ms in self.readiness["phases"].items()})
+        print(f"✅ Policy Agent initialized successfully in {self.readiness['warmup_ms']:.0f} ms")
+
+    async def _timed_phase(self, name: str, coro):
+        start = time.perf_counter()
+        try:
+            return await coro
+        finally:
+            self.readiness["phases"][name] = round((time.perf_counter() - start) * 1000, 1)
+
+    async def _create_llm(self) -> "ChatGroq":
+        load_dotenv()
+        os.environ["GROQ_API_KEY"] = os.getenv("GROQ_API_KEY")
+        langchain_groq = await _import_in_thread("langchain_groq")
+        return langchain_groq.ChatGroq(model=POLICY_MODEL, callbacks=[MetricsCallbackHandler(POLICY_MODEL)])
+
+    async def _start_pool(self) -> "MCPSessionPool":
+        mcppool = await _import_in_thread("mcppool")
+        pool = mcppool.MCPSessionPool.from_config_file(
+            settings.MCP_CONFIG_FILE or DEFAULT_MCP_CONFIG_FILE,
+            size_per_server=settings.MCP_POOL_SIZE,
+            health_check_interval=settings.MCP_HEALTH_CHECK_INTERVAL,
+        )
+        await pool.start()
+        return pool
+
+    def get_readiness(self) -> dict:
+        """Warm-up status, time per phase (llm, mcp_pool, knowledge_base) and the last error"""
+        return {**self.readiness, "ready": self.pool is not None, "phases": dict(self.readiness["phases"])}
+
+    async def _start_knowledge_base(self):
+        """Load (or build) the policy index and keep it fresh in the background"""
+        if self.knowledge_base is not None:
+            return
+        try:
+            knowledgebase = await _import_in_thread("knowledgebase")
+            self.knowledge_base = await asyncio.to_thread(knowledgebase.create_knowledge_base)
+            print(f"📚 Knowledge base loaded: {self.knowledge_base.get_stats()['chunks']} chunks")
+        except Exception as e:
+            print(f"⚠️ Knowledge base unavailable, policy questions will use web tools: {e}")
+            return
+        if settings.KB_REFRESH_INTERVAL > 0:
+            self._refresh_task = asyncio.create_task(self._refresh_knowledge_base())
+
+    async def _refresh_knowledge_base(self):
+        while True:
+            await asyncio.sleep(settings.KB_REFRESH_INTERVAL)
             try:
-                self.client = MCPClient.from_config_file(config_file)
-                llm = ChatGroq(model="openai/gpt-oss-120b")
-
-                self.agent = MCPAgent(
-                    llm=llm,
-                    client=self.client,
-                    max_steps=15,
-                    memory_enabled=True
-                )
-                
-                if hasattr(self.agent, 'messages') or hasattr(self.agent, 'memory'):
-                    try:
-                        if hasattr(self.agent, 'messages'):
-                            self.agent.messages.insert(0, {"role": "system", "content": self.system_prompt})
-                        elif hasattr(self.agent, 'memory'):
-                            pass
-                    except Exception as e:
-                        print(f"⚠️ Could not set system message: {e}")
-                
-                print("✅ Policy Agent initialized successfully")
+                await asyncio.to_thread(self.knowledge_base.refresh)
             except Exception as e:
-                print(f"❌ Failed to initialize Policy Agent: {e}")
-                raise
+                print(f"⚠️ Knowledge base refresh failed: {e}")
+
+    async def run_agent(
+        self,
+        query: str,
+        history: Optional[List[BaseMessage]] = None,
+        callbacks: Optional[list] = None,
+        stream: bool = False,
+        profile: Optional[ToolProfile] = None,
+    ) -> str:
+        """Run one MCPAgent turn on connectors leased from the warm session pool.
+
+        A profile limits the run to its servers and tools and sets its step budget.
+        """
+        if self.pool is None:
+            await self.initialize()
+        profile = profile or ToolProfile()
+
+        llm = self.llm
+        if callbacks:
+            # Per-run copy so concurrent runs don't see each other's callbacks; shares the HTTP client.
+            # The client's own callbacks (LLM metrics) stay in place.
+            llm = self.llm.model_copy(update={"callbacks": [*(self.llm.callbacks or []), *callbacks], "streaming": stream})
+
+        from mcp_use import MCPAgent  # already loaded by the warm-up
+
+        servers = None if profile.servers is None else [s for s in profile.servers if s in self.pool.server_names]
+        async with self.pool.lease(servers) as connectors:
+            agent = MCPAgent(
+                llm=llm,
+                connectors=connectors,
+                max_steps=profile.max_steps,
+                memory_enabled=False,
+                disallowed_tools=profile.disallowed_tools(connectors),
+            )
+            # Pooled connectors are already connected; this only loads their tools into the agent
+            await agent.initialize()
+            return await agent.run(query, manage_connector=False, external_history=history)
 
-    def _get_cache_key(self, user_input: str) -> str:
-        """Generate a cache key from user input"""
-        normalized_input = user_input.lower().strip()
-        return hashlib.md5(normalized_input.encode()).hexdigest()
+    def get_pool_metrics(self) -> dict:
+        """Expose MCP pool state (in use, idle, restarts, spawn latency)"""
+        if self.pool is None:
+            return {}
+        return self.pool.metrics()
 
-    def _get_cached_response(self, user_input: str) -> Optional[str]:
+    def _get_cache_key(
+        self,
+        user_input: str,
+        intents: Optional[List[dict]] = None,
+        history: Optional[List[BaseMessage]] = None,
+    ) -> str:
+        """Generate a cache key from the normalized user input (and intent, if enabled).
+
+        Follow-up turns are answered with the conversation's history, so their key
+        also covers a digest of it; one conversation's answer is never served to another.
+        """
+        key = make_cache_key(user_input, intents, use_intent=settings.POLICY_CACHE_INTENT_KEYS)
+        if history:
+            transcript = "\n".join(f"{message.type}:{message.content}" for message in history)
+            key = f"{key}:{hashlib.md5(transcript.encode()).hexdigest()}"
+        return key
+
+    def _get_cached_response(
+        self,
+        user_input: str,
+        intents: Optional[List[dict]] = None,
+        history: Optional[List[BaseMessage]] = None,
+    ) -> Optional[str]:
         """Get cached response if available and not expired"""
-        cache_key = self._get_cache_key(user_input)
-        if cache_key in self.cache:
-            response, timestamp = self.cache[cache_key]
-            if time.time() - timestamp < self.cache_ttl:
-                return response
-            else:
-                del self.cache[cache_key]
-        return None
+        return self.cache.get(self._get_cache_key(user_input, intents, history))
 
-    def _cache_response(self, user_input: str, response: str):
+    def _cache_response(
+        self,
+        user_input: str,
+        response: str,
+        intents: Optional[List[dict]] = None,
+        history: Optional[List[BaseMessage]] = None,
+    ):
         """Cache the response for future use"""
-        cache_key = self._get_cache_key(user_input)
-        self.cache[cache_key] = (response, time.time())
-        
-        if len(self.cache) > 100: 
-            oldest_key = min(self.cache.keys(), key=lambda k: self.cache[k][1])
-            del self.cache[oldest_key]
+        self.cache.set(self._get_cache_key(user_input, intents, history), response)
+
+    def _lookup_cache(self, cache_key: str) -> Optional[str]:
+        with tracer.span("cache.get", **{"cache.namespace": "policy"}) as span:
+            response = self.cache.get(cache_key)
+            span.set_attribute("cache.hit", response is not None)
+            return response
+
+    def get_cache_stats(self) -> dict:
+        """Hit/miss/eviction counters and current cache size"""
+        return self.cache.get_stats()
+
+    async def _run_uncached(
+        self,
+        user_input: str,
+        intents: Optional[List[dict]],
+        history: List[BaseMessage],
+        events: Optional[asyncio.Queue] = None,
+        cache: bool = True,
+    ) -> Tuple[str, dict]:
+        """Answer from the knowledge base or run the agent, cache the answer and report how many LLM calls and tool steps it took"""
+        handler = StreamingCallbackHandler(events)
+        hits = self._knowledge_hits(user_input, intents)
+        if hits:
+            self.route_counts["knowledge_base"] += 1
+            with tracer.span("knowledge_base.answer", **{"kb.hits": len(hits), "kb.top_score": round(hits[0][0], 3)}):
+                response = await self._answer_from_knowledge_base(user_input, history, hits, handler, stream=events is not None)
+        else:
+            self.route_counts["mcp_agent"] += 1
+            response = await self._run_routed_agent(user_input, intents, history, handler, stream=events is not None)
+        if cache:
+            self._cache_response(user_input, response, intents, history)
+        return response, {"llm_calls": handler.llm_calls, "tool_calls": handler.steps}
+
+    async def _run_routed_agent(
+        self,
+        user_input: str,
+        intents: Optional[List[dict]],
+        history: List[BaseMessage],
+        handler: StreamingCallbackHandler,
+        stream: bool = False,
+    ) -> str:
+        """Run the MCP agent with the intent's tools and budgets, logging steps, tokens and wall time"""
+        if self.pool is None:
+            await self.initialize()
+        intent, profile = self.tool_router.route(intents, self.pool.server_names)
+        contextualized_query = f"Context: {self.system_prompt}\n\nUser Query: {user_input}"
+        start = time.perf_counter()
+        timed_out = False
+        with tracer.span("agent.run", **{"agent.intent": intent, "agent.max_steps": profile.max_steps}) as span:
+            try:
+                return await asyncio.wait_for(
+                    self.run_agent(
+                        contextualized_query,
+                        history=history,
+                        callbacks=[handler, TracingCallbackHandler()],
+                        stream=stream,
+                        profile=profile,
+                    ),
+                    timeout=profile.timeout,
+                )
+            except asyncio.TimeoutError:
+                timed_out = True
+                raise TimeoutError(f"the {intent} lookup took longer than {profile.timeout:.0f}s") from None
+            finally:
+                wall_time = time.perf_counter() - start
+                span.set_attributes({
+                    "agent.steps": handler.llm_calls,
+                    "agent.tool_calls": handler.steps,
+                    "agent.tokens": handler.total_tokens,
+                })
+                self.intent_stats.record(
+                    intent, handler.llm_calls, handler.steps, handler.total_tokens, wall_time, profile.max_steps, timed_out
+                )
+                print(
+                    f"🧭 {intent}: {handler.llm_calls}/{profile.max_steps} steps, {handler.steps} tool calls, "
+                    f"{handler.total_tokens} tokens, {wall_time:.1f}s{' (timed out)' if timed_out else ''}"
+                )
+
+    def get_intent_stats(self) -> dict:
+        """Steps, tool calls, tokens and wall time of agent runs per intent, next to each intent's budgets"""
+        return {"runs": self.intent_stats.get_stats(), "profiles": self.tool_router.get_profiles()}
+
+    def _knowledge_hits(self, user_input: str, intents: Optional[List[dict]]) -> List[Tuple[float, dict]]:
+        """Relevant policy chunks for FAQ intents; empty means use the MCP agent instead"""
+        if self.knowledge_base is None or self.knowledge_base.is_empty() or not intents:
+            return []
+        if intents[0].get("type") not in self.knowledge_base_intents:
+            return []
+        with tracer.span("knowledge_base.search") as span:
+            hits = self.knowledge_base.search(user_input, k=settings.KB_TOP_K, min_score=settings.KB_MIN_SCORE)
+            span.set_attribute("kb.hits", len(hits))
+            return hits
+
+    async def _answer_from_knowledge_base(
+        self,
+        user_input: str,
+        history: List[BaseMessage],
+        hits: List[Tuple[float, dict]],
+        handler: StreamingCallbackHandler,
+        stream: bool = False,
+    ) -> str:
+        """One LLM call grounded on the retrieved policy excerpts"""
+        if self.llm is None:
+            await self.initialize()
+        excerpts = "\n\n".join(f"[{chunk['source']}]\n{chunk['text']}" for _, chunk in hits)
+        messages = [
+            SystemMessage(content=f"{self.system_prompt}\n\n{KNOWLEDGE_BASE_INSTRUCTIONS}"),
+            *history,
+            HumanMessage(content=f"Policy excerpts:\n\n{excerpts}\n\nQuestion: {user_input}"),
+        ]
+        callbacks = [*(self.llm.callbacks or []), handler, TracingCallbackHandler()]
+        llm = self.llm.model_copy(update={"callbacks": callbacks, "streaming": stream})
+        result = await llm.ainvoke(messages)
+        return result.content
+
+    def get_knowledge_base_stats(self) -> dict:
+        """Index size and how many answers came from it vs the MCP agent"""
+        stats = self.knowledge_base.get_stats() if self.knowledge_base else {"chunks": 0}
+        return {**stats, "routes": dict(self.route_counts)}
+
+    async def _join_in_flight(self, cache_key: str) -> str:
+        """Wait for an identical query that is already running instead of starting another"""
+        print("♻️ Joining in-flight identical query")
+        response, run_stats = await self.singleflight.do(cache_key, None)
+        self.avoided_runs.update(run_stats)
+        return response
 
-    async def process_query(self, user_input: str) -> str:
+    def get_singleflight_stats(self) -> dict:
+        """Agent runs executed vs coalesced, and the LLM calls and tool steps that saved"""
+        return {
+            **self.singleflight.get_stats(),
+            "avoided_llm_calls": self.avoided_runs["llm_calls"],
+            "avoided_tool_calls": self.avoided_runs["tool_calls"],
+        }
+
+    def get_session_stats(self) -> dict:
+        """Live conversations, their memory use and evictions by reason"""
+        return self.sessions.get_stats()
+
+    async def process_query(
+        self,
+        user_input: str,
+        intents: Optional[List[dict]] = None,
+        conversation_id: str = DEFAULT_CONVERSATION_ID,
+    ) -> str:
         """Process a user query with caching and efficient session management"""
         try:
-            cached_response = self._get_cached_response(user_input)
+            history = self.sessions.history(conversation_id)
+            cache_key = self._get_cache_key(user_input, intents, history)
+            cached_response = self._lookup_cache(cache_key)
             if cached_response:
                 print("✅ Serving from cache")
                 return cached_response
 
-            if self.agent is None:
-                await self.initialize()
-
-            print(f"🔍 Processing query: {user_input}")
-            
-            contextualized_query = f"Context: {self.system_prompt}\n\nUser Query: {user_input}"
-            
-            response = await self.agent.run(contextualized_query)
-            
-            self._cache_response(user_input, response)
+            if self.singleflight.in_flight(cache_key):
+                response = await self._join_in_flight(cache_key)
+            else:
+                print(f"🔍 Processing query: {user_input}")
+                response, _ = await self.singleflight.do(
+                    cache_key, lambda: self._run_uncached(user_input, intents, history)
+                )
+            self.sessions.append(conversation_id, user_input, response)
             
             return response
 
@@ -120,21 +436,108 @@ Perform tasks as efficiently as possible while maintaining accuracy."""
             print(f"❌ Error in process_query: {e}")
             return error_msg
 
-    async def clear_memory(self):
-        """Clear conversation memory while keeping the session alive"""
-        if self.agent:
-            self.agent.clear_conversation_history()
-            print("🗑️ Conversation memory cleared")
+    async def stream_query(
+        self,
+        user_input: str,
+        intents: Optional[List[dict]] = None,
+        conversation_id: str = DEFAULT_CONVERSATION_ID,
+        confirm: Optional[asyncio.Future] = None,
+    ) -> AsyncIterator[dict]:
+        """Stream a response as token, step and done events.
+
+        Ends with {"type": "done", "content": <full response>, "ttft_ms": ...}
+        or {"type": "error", "content": <message>}. Cached answers and answers
+        shared with an identical in-flight query arrive as a single token.
+
+        With ``confirm`` (a speculative run) the answer is only cached and added
+        to the conversation once that future resolves; cancel the stream instead
+        to drop it.
+        """
+        start = time.perf_counter()
+        history = self.sessions.history(conversation_id)
+        cache_key = self._get_cache_key(user_input, intents, history)
+        cached_response = self._lookup_cache(cache_key)
+        shared = cached_response is None and self.singleflight.in_flight(cache_key) is not None
+        if cached_response or shared:
+            try:
+                response = cached_response or await self._join_in_flight(cache_key)
+            except Exception as e:
+                self.stream_stats.record(None, time.perf_counter() - start, error=True)
+                yield {"type": "error", "content": f"I apologize, but I encountered an error while processing your query: {str(e)}"}
+                return
+            ttft = time.perf_counter() - start
+            self.stream_stats.record(ttft, ttft, cached=True)
+            if shared:
+                if confirm is not None:
+                    await confirm
+                self.sessions.append(conversation_id, user_input, response)
+            yield {"type": "token", "content": response}
+            yield {"type": "done", "content": response, "cached": True, "ttft_ms": round(ttft * 1000, 1)}
+            return
+
+        print(f"🔍 Streaming query: {user_input}")
+        events: asyncio.Queue = asyncio.Queue()
+        task = self.singleflight.track(
+            cache_key, self._run_uncached(user_input, intents, history, events, cache=confirm is None)
+        )
+        task.add_done_callback(lambda _: events.put_nowait(None))
+
+        ttft = None
+        try:
+            while (event := await events.get()) is not None:
+                if ttft is None and event["type"] == "token":
+                    ttft = time.perf_counter() - start
+                yield event
+            response, _ = task.result()
+        except Exception as e:
+            self.stream_stats.record(ttft, time.perf_counter() - start, error=True)
+            print(f"❌ Error in stream_query: {e}")
+            yield {"type": "error", "content": f"I apologize, but I encountered an error while processing your query: {str(e)}"}
+            return
+        finally:
+            # The consumer went away (e.g. the browser closed the stream); stop the agent
+            # run unless identical queries are waiting on it
+            if not task.done() and not self.singleflight.waiters(cache_key):
+                task.cancel()
+
+        total = time.perf_counter() - start
+        self.stream_stats.record(ttft if ttft is not None else total, total)
+        if confirm is not None:
+            await confirm
+            self._cache_response(user_input, response, intents, history)
+        self.sessions.append(conversation_id, user_input, response)
+        yield {
+            "type": "done",
+            "content": response,
+            "cached": False,
+            "ttft_ms": round((ttft if ttft is not None else total) * 1000, 1),
+            "total_ms": round(total * 1000, 1),
+        }
+
+    def get_stream_stats(self) -> dict:
+        """Time-to-first-token and total latency of streamed responses"""
+        return self.stream_stats.get_stats()
+
+    async def clear_memory(self, conversation_id: Optional[str] = None):
+        """Clear one conversation's memory (or all of them) while keeping the MCP sessions alive"""
+        self.sessions.clear(conversation_id)
+        print("🗑️ Conversation memory cleared")
 
     async def close(self):
-        """Close the client session"""
-        if self.client and self.client.sessions:
-            await self.client.close_all_sessions()
-            self.client = None
-            self.agent = None
+        """Close every pooled MCP session"""
+        if self._warmup and not self._warmup.done():
+            self._warmup.cancel()
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            self._refresh_task = None
+        if self.pool:
+            await self.pool.close()
+            self.pool = None
             print("🔒 Policy Agent session closed")
+        self.readiness.update(status="cold", warmup_ms=None)
 
 policy_agent_manager = PolicyAgentManager()
+agent_loop = BackgroundEventLoop(name="policy-agent-loop")
 
 async def run_memory_chat():
     """Interactive chat mode (for testing)"""
@@ -144,6 +547,11 @@ async def run_memory_chat():
     print("Type 'exit' to quit the chat.")
     print("Type 'clear' to clear the memory.")
     print("Type 'cache' to show cache stats.")
+    print("Type 'pool' to show MCP pool stats.")
+    print("Type 'stream' to show time-to-first-token stats.")
+    print("Type 'flight' to show coalesced query stats.")
+    print("Type 'sessions' to show conversation memory stats.")
+    print("Type 'intents' to show per-intent step, token and latency stats.")
     print("=================================\n")
 
     try:
@@ -156,15 +564,36 @@ async def run_memory_chat():
                 print("Memory cleared.")
                 continue
             elif user_input.lower() == "cache":
-                cache_size = len(policy_agent_manager.cache)
-                print(f"Cache stats: {cache_size} entries")
+                print(f"Cache stats: {policy_agent_manager.get_cache_stats()}")
+                continue
+            elif user_input.lower() == "pool":
+                print(f"Pool stats: {policy_agent_manager.get_pool_metrics()}")
+                continue
+            elif user_input.lower() == "stream":
+                print(f"Stream stats: {policy_agent_manager.get_stream_stats()}")
+                continue
+            elif user_input.lower() == "flight":
+                print(f"Single-flight stats: {policy_agent_manager.get_singleflight_stats()}")
+                continue
+            elif user_input.lower() == "sessions":
+                print(f"Session stats: {policy_agent_manager.get_session_stats()}")
+                continue
+            elif user_input.lower() == "intents":
+                print(f"Intent stats: {policy_agent_manager.get_intent_stats()}")
                 continue
             
             print("\nAssistant: ", end="", flush=True)
             
             try:
-                response = await policy_agent_manager.process_query(user_input)
-                print(f"Agent: {response}")
+                async for event in policy_agent_manager.stream_query(user_input):
+                    if event["type"] == "token":
+                        print(event["content"], end="", flush=True)
+                    elif event["type"] == "step":
+                        print(f"\n🔧 Step {event['step']}: {event['tool']}", flush=True)
+                    elif event["type"] == "error":
+                        print(f"\n{event['content']}")
+                    else:
+                        print(f"\n(first token after {event['ttft_ms']} ms)")
             
             except Exception as e:
                 print(f"\nError: {e}")
@@ -172,18 +601,48 @@ async def run_memory_chat():
     finally:
         await policy_agent_manager.close()
 
+def submit_query(
+    user_input: str,
+    intents: Optional[List[dict]] = None,
+    conversation_id: str = DEFAULT_CONVERSATION_ID,
+) -> Future:
+    """Submit a query to the policy agent loop and return a future for the response"""
+    return agent_loop.submit(policy_agent_manager.process_query(user_input, intents, conversation_id))
+
+def iterate_on_agent_loop(stream: AsyncIterator[dict]) -> Iterator[dict]:
+    """Run an async event stream on the agent loop and iterate it from a sync caller such as Streamlit"""
+    events: queue.Queue = queue.Queue()
+
+    async def pump():
+        try:
+            async for event in stream:
+                events.put(event)
+        finally:
+            events.put(None)
+            await stream.aclose()
+
+    future = agent_loop.submit(pump())
+    try:
+        while (event := events.get()) is not None:
+            yield event
+        future.result()
+    finally:
+        # The caller stopped early (Streamlit rerun or disconnect): cancel the pump so the
+        # stream is closed and the agent run releases its MCP lease
+        future.cancel()
+
+def stream_query_sync(
+    user_input: str,
+    intents: Optional[List[dict]] = None,
+    conversation_id: str = DEFAULT_CONVERSATION_ID,
+) -> Iterator[dict]:
+    """Iterate stream events from the agent loop in a sync caller such as Streamlit"""
+    return iterate_on_agent_loop(policy_agent_manager.stream_query(user_input, intents, conversation_id))
+
 def process_query_sync(user_input: str) -> str:
     """Synchronous wrapper for Streamlit integration"""
     try:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
-        if policy_agent_manager.agent is None:
-            loop.run_until_complete(policy_agent_manager.initialize())
-        
-        response = loop.run_until_complete(policy_agent_manager.process_query(user_input))
-        loop.close()
-        return response
+        return submit_query(user_input).result()
     except Exception as e:
         return f"Error processing your query: {str(e)}"
 
@@ -191,43 +650,35 @@ async def initialize_agent_async():
     """Async initialization for Streamlit"""
     await policy_agent_manager.initialize()
 
+def start_agent_warmup() -> Future:
+    """Warm up the policy agent on the agent loop without blocking the caller (see get_readiness())"""
+    return agent_loop.submit(policy_agent_manager.initialize())
+
 def initialize_agent_sync():
-    """Synchronous initialization for Streamlit"""
+    """Synchronous initialization (blocks until the agent is warm)"""
     try:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        loop.run_until_complete(policy_agent_manager.initialize())
-        loop.close()
+        agent_loop.run(policy_agent_manager.initialize())
         print("✅ Policy Agent initialized successfully")
     except Exception as e:
         print(f"❌ Failed to initialize Policy Agent: {e}")
 
+def shutdown_agent_sync():
+    """Close MCP sessions on the agent loop and stop it"""
+    if not agent_loop.is_running():
+        return
+    try:
+        agent_loop.run(policy_agent_manager.close(), timeout=10)
+    except Exception as e:
+        print(f"⚠️ Failed to close Policy Agent cleanly: {e}")
+    finally:
+        agent_loop.stop()
+
+atexit.register(shutdown_agent_sync)
+
 def process_query_simple(user_input: str) -> str:
-    """Simple synchronous version without complex initialization"""
+    """Simple synchronous version without caching or conversation memory"""
     try:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
-        load_dotenv()
-        os.environ["GROQ_API_KEY"] = os.getenv("GROQ_API_KEY")
-        
-        config_file = r"C:\\Users\\jaiak\\Downloads\\new asapp\\NexusAI\\mcp_agents\\src\\browser_mcp.json"
-        
-        client = MCPClient.from_config_file(config_file)
-        llm = ChatGroq(model="openai/gpt-oss-120b")
-        
-        agent = MCPAgent(
-            llm=llm,
-            client=client,
-            max_steps=15,
-            memory_enabled=True,
-        )
-        
-        response = loop.run_until_complete(agent.run(user_input))
-        loop.run_until_complete(client.close_all_sessions())
-        loop.close()
-        
-        return response
+        return agent_loop.run(policy_agent_manager.run_agent(user_input))
     except Exception as e:
         return f"Error: {str(e)}"
 
@@ -0,0 +1,190 @@
+"""Chat message routing shared by the Streamlit UI and the async chat service.
+
+A message either continues an active trip-cancellation flow (ticket ID, user
+ID, confirmation) or is classified: "Cancel Trip" starts the flow and every
+other intent goes to the policy agent.
+"""
+import threading
+from collections import Counter, OrderedDict
+from typing import AsyncIterator, Optional
+
+from tracing import tracer
+
+CLEAR_COMMAND = "clear"
+CONFIRM_WORDS = ['yes', 'y', 'confirm', 'proceed', 'ok']
+DECLINE_WORDS = ['no', 'n', 'cancel', 'stop']
+CANCELLED_SUCCESS = "✅ **Flight Cancelled Successfully!**\n\n🎫 **Ticket Details:**\n• Ticket ID: {ticket_id}\n• User ID: {user_id}\n\n📧 **Next Steps:**\n• Confirmation email sent\n• Refund will be processed in 5-7 business days\n• Check your email for details"
+
+
+def new_cancellation_flow() -> dict:
+    return {
+        "active": False,
+        "step": None,
+        "ticket_id": None,
+        "user_id": None
+    }
+
+
+def start_cancellation_flow(flow: dict) -> str:
+    """Start the cancellation flow"""
+    flow.update(active=True, step="ticket_id", ticket_id=None, user_id=None)
+    return "🛫 **Flight Cancellation Started**\n\nI can help you cancel your flight. Please provide your **Ticket ID** (any numbers or letters):"
+
+
+def reset_cancellation_flow(flow: dict):
+    """Reset cancellation flow and return to initial state"""
+    flow.update(new_cancellation_flow())
+
+
+def cancellation_result_message(result: dict, ticket_id: str, user_id: str) -> str:
+    """User-facing message for a cancel_ticket response"""
+    if "error" in result:
+        return f"❌ **Connection Error**\n\nCould not connect to cancellation service: {result['error']}"
+    if "status_code" in result:
+        return f"❌ **API Error**\n\nServer returned status: {result['status_code']}"
+    if result.get("status") == "success":
+        if "already cancelled" in result.get("message", "").lower():
+            return f"✅ **Ticket Already Cancelled**\n\n🎫 **Ticket Details:**\n• Ticket ID: {ticket_id}\n• User ID: {user_id}\n\n📝 **Status:** This ticket was already cancelled previously. No further action needed."
+        return CANCELLED_SUCCESS.format(ticket_id=ticket_id, user_id=user_id)
+    return f"❌ **Cancellation Failed**\n\nError: {result.get('message', 'Unknown error')}"
+
+
+async def process_cancellation(flow: dict, cancel_agent=None) -> str:
+    """Process the actual cancellation (demo mode without a cancel agent)"""
+    ticket_id = flow["ticket_id"]
+    user_id = flow["user_id"]
+    try:
+        if cancel_agent is not None:
+            result = await cancel_agent.acancel(user_id=user_id, ticket_id=ticket_id)
+            message = cancellation_result_message(result, ticket_id, user_id)
+        else:
+            message = CANCELLED_SUCCESS.format(ticket_id=ticket_id, user_id=user_id)
+        reset_cancellation_flow(flow)
+        return message + "\n\nWhat else can I help you with today?"
+    except Exception as e:
+        reset_cancellation_flow(flow)
+        return f"❌ **Cancellation Failed**\n\nError: {str(e)}\n\nPlease try again or contact customer support."
+
+
+async def process_cancellation_flow(flow: dict, user_message: str, cancel_agent=None) -> str:
+    """Process messages during cancellation flow"""
+    if flow["step"] == "ticket_id":
+        if user_message.strip():
+            ticket_id = user_message.strip()
+            flow.update(ticket_id=ticket_id, step="user_id")
+            return f"✅ **Ticket ID Received**\n\nGot your Ticket ID: **{ticket_id}**\n\nNow please provide your **User ID** (any numbers or letters):"
+        return "❌ **Please provide a Ticket ID**\n\nPlease enter your Ticket ID (it can be any numbers or letters):"
+
+    if flow["step"] == "user_id":
+        if user_message.strip():
+            user_id = user_message.strip()
+            flow.update(user_id=user_id, step="confirmation")
+            ticket_id = flow["ticket_id"]
+            return f"✅ **User ID Received**\n\nGot your User ID: **{user_id}**\n\n**Cancellation Summary:**\n• Ticket ID: {ticket_id}\n• User ID: {user_id}\n\nShould I proceed with cancelling this ticket? Please type **'yes'** to confirm or **'no'** to cancel."
+        return "❌ **Please provide a User ID**\n\nPlease enter your User ID (it can be any numbers or letters):"
+
+    user_message_lower = user_message.lower().strip()
+    if user_message_lower in CONFIRM_WORDS:
+        return await process_cancellation(flow, cancel_agent)
+    if user_message_lower in DECLINE_WORDS:
+        reset_cancellation_flow(flow)
+        return "❌ **Cancellation Cancelled**\n\nFlight cancellation has been cancelled. How else can I help you?"
+    return "❓ **Confirmation Required**\n\nPlease type **'yes'** to proceed with cancellation or **'no'** to cancel the request:"
+
+
+class ChatRouter:
+    """Routes each conversation's messages to the cancellation flow or the policy agent.
+
+    Flow state is kept per conversation ID, least recently used conversations
+    first, and capped at max_conversations. Answers come back as the policy
+    agent's stream events; flow replies are a single token followed by done.
+    """
+
+    def __init__(self, pipeline, cancel_agent=None, max_conversations: int = 10000):
+        self.pipeline = pipeline
+        self.cancel_agent = cancel_agent
+        self.max_conversations = max_conversations
+        self.routes: Counter = Counter()
+        self._flows: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def flow(self, conversation_id: str) -> dict:
+        with self._lock:
+            flow = self._flows.get(conversation_id)
+            if flow is None:
+                flow = self._flows[conversation_id] = new_cancellation_flow()
+                while len(self._flows) > self.max_conversations:
+                    self._flows.popitem(last=False)
+            else:
+                self._flows.move_to_end(conversation_id)
+            return flow
+
+    @staticmethod
+    async def _reply(content: str, flow: dict) -> AsyncIterator[dict]:
+        yield {"type": "token", "content": content}
+        yield {"type": "done", "content": content, "flow": dict(flow)}
+
+    async def route(self, user_message: str, conversation_id: str) -> AsyncIterator[dict]:
+        """Stream the reply to one message as intent, token, step and done (or error) events"""
+        with tracer.span("chat.message", **{"chat.conversation_id": conversation_id}) as span:
+            async for event in self._route(user_message, conversation_id, span):
+                yield event
+
+    async def _route(self, user_message: str, conversation_id: str, span) -> AsyncIterator[dict]:
+        if user_message.strip().lower() == CLEAR_COMMAND:
+            span.set_attribute("chat.route", "clear")
+            self.clear(conversation_id)
+            await self.pipeline.manager.clear_memory(conversation_id)
+            async for event in self._reply("🗑️ Conversation memory cleared. How can I help you?", new_cancellation_flow()):
+                yield event
+            return
+
+        flow = self.flow(conversation_id)
+        if flow["active"]:
+            span.set_attributes({"chat.route": "cancellation_flow", "chat.flow_step": flow["step"]})
+            self.routes["cancellation_flow"] += 1
+            content = await process_cancellation_flow(flow, user_message, self.cancel_agent)
+            async for event in self._reply(content, flow):
+                yield event
+            return
+
+        async for event in self.pipeline.stream(user_message, conversation_id):
+            if event["type"] == "cancel_trip":
+                span.set_attribute("chat.route", "cancel_trip")
+                self.routes["cancel_trip"] += 1
+                async for reply in self._reply(start_cancellation_flow(flow), flow):
+                    yield reply
+                return
+            if event["type"] == "done":
+                span.set_attribute("chat.route", "policy_agent")
+                self.routes["policy_agent"] += 1
+            elif event["type"] == "error":
+                span.set_attribute("chat.error", event.get("content", ""))
+            yield event
+
+    async def reply(self, user_message: str, conversation_id: str) -> dict:
+        """The final done (or error) event for one message, without streaming"""
+        final: Optional[dict] = None
+        intents = []
+        async for event in self.route(user_message, conversation_id):
+            if event["type"] == "intent":
+                intents = event["intents"]
+            elif event["type"] in ("done", "error"):
+                final = event
+        return {**(final or {"type": "error", "content": "No response was produced"}), "intents": intents}
+
+    def clear(self, conversation_id: Optional[str] = None):
+        """Forget one conversation's flow state, or every conversation's"""
+        with self._lock:
+            if conversation_id is None:
+                self._flows.clear()
+            else:
+                self._flows.pop(conversation_id, None)
+
+    def get_stats(self) -> dict:
+        return {
+            "conversations": len(self._flows),
+            "active_cancellation_flows": sum(f["active"] for f in list(self._flows.values())),
+            "routes": dict(self.routes),
+            "speculation": self.pipeline.get_stats(),
+        }
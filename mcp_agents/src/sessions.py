@@ -0,0 +1,138 @@
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import List, Optional
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+
+
+def _message_bytes(message: BaseMessage) -> int:
+    return len(str(message.content).encode("utf-8"))
+
+
+class Session:
+    """Conversation memory for one conversationId"""
+
+    __slots__ = ("conversation_id", "history", "bytes", "created_at", "last_active")
+
+    def __init__(self, conversation_id: str):
+        self.conversation_id = conversation_id
+        self.history: List[BaseMessage] = []
+        self.bytes = 0
+        self.created_at = time.time()
+        self.last_active = self.created_at
+
+
+class SessionStore:
+    """Bounded per-conversation history shared by every agent run on a node.
+
+    Sessions live in an OrderedDict kept in last-active order, so the least
+    recently used (and therefore most idle) session is always first. Sessions
+    are evicted when idle for longer than idle_timeout, when there are more
+    than max_sessions, or when total history exceeds max_total_bytes. Each
+    session keeps at most max_messages messages and max_bytes of text,
+    dropping its oldest turns first.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = 10000,
+        idle_timeout: float = 1800,
+        max_messages: int = 20,
+        max_bytes: int = 64 * 1024,
+        max_total_bytes: Optional[int] = None,
+    ):
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.max_messages = max_messages
+        self.max_bytes = max_bytes
+        self.max_total_bytes = max_total_bytes
+        self.total_bytes = 0
+        self.evictions: Counter = Counter()
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __contains__(self, conversation_id: str) -> bool:
+        return conversation_id in self._sessions
+
+    def _evict(self, conversation_id: str, reason: str):
+        session = self._sessions.pop(conversation_id)
+        self.total_bytes -= session.bytes
+        self.evictions[reason] += 1
+
+    def _evict_idle(self, now: float):
+        cutoff = now - self.idle_timeout
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if oldest.last_active > cutoff:
+                break
+            self._evict(oldest.conversation_id, "idle")
+
+    def _enforce_limits(self):
+        while len(self._sessions) > self.max_sessions:
+            self._evict(next(iter(self._sessions)), "capacity")
+        while self.max_total_bytes and self.total_bytes > self.max_total_bytes and len(self._sessions) > 1:
+            self._evict(next(iter(self._sessions)), "memory")
+
+    def _touch(self, conversation_id: str) -> Session:
+        now = time.time()
+        self._evict_idle(now)
+        session = self._sessions.get(conversation_id)
+        if session is None:
+            session = self._sessions[conversation_id] = Session(conversation_id)
+            self._enforce_limits()
+        else:
+            self._sessions.move_to_end(conversation_id)
+        session.last_active = now
+        return session
+
+    def history(self, conversation_id: str) -> List[BaseMessage]:
+        """Snapshot of a conversation's history (creating the session if needed)"""
+        with self._lock:
+            return list(self._touch(conversation_id).history)
+
+    def append(self, conversation_id: str, user_input: str, response: str):
+        """Record one turn, trimming the session's oldest turns to stay within its caps"""
+        with self._lock:
+            session = self._touch(conversation_id)
+            for message in (HumanMessage(content=user_input), AIMessage(content=response)):
+                session.history.append(message)
+                size = _message_bytes(message)
+                session.bytes += size
+                self.total_bytes += size
+            while session.history and (
+                len(session.history) > self.max_messages or session.bytes > self.max_bytes
+            ):
+                # Drop a whole turn so the history never starts with an orphaned answer
+                for message in session.history[:2]:
+                    size = _message_bytes(message)
+                    session.bytes -= size
+                    self.total_bytes -= size
+                del session.history[:2]
+            self._enforce_limits()
+
+    def clear(self, conversation_id: Optional[str] = None):
+        """Forget one conversation, or every conversation when no ID is given"""
+        with self._lock:
+            if conversation_id is None:
+                self._sessions.clear()
+                self.total_bytes = 0
+            elif conversation_id in self._sessions:
+                self._evict(conversation_id, "cleared")
+
+    def evict_idle(self):
+        with self._lock:
+            self._evict_idle(time.time())
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "total_bytes": self.total_bytes,
+                "max_total_bytes": self.max_total_bytes,
+                "evictions": dict(self.evictions),
+            }
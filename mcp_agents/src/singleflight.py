@@ -0,0 +1,64 @@
+import asyncio
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key into one execution.
+
+    The first caller for a key starts the work; callers arriving while it is
+    still running await the same task and get the same result (or exception).
+    The shared task is shielded, so one waiter being cancelled does not cancel
+    it for the others.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Task] = {}
+        self._waiters: Counter = Counter()
+        self.executions = 0
+        self.coalesced = 0
+
+    def in_flight(self, key: str) -> Optional[asyncio.Task]:
+        return self._calls.get(key)
+
+    def waiters(self, key: str) -> int:
+        """Callers currently awaiting the shared task for key"""
+        return self._waiters[key]
+
+    def track(self, key: str, coro: Awaitable) -> asyncio.Task:
+        """Start coro as the shared execution for key (the caller must check in_flight first)"""
+        task = asyncio.ensure_future(coro)
+        self._calls[key] = task
+        self.executions += 1
+
+        def _done(_):
+            if self._calls.get(key) is task:
+                del self._calls[key]
+
+        task.add_done_callback(_done)
+        return task
+
+    async def wait(self, key: str, task: asyncio.Task) -> Any:
+        self._waiters[key] += 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            self._waiters[key] -= 1
+            if not self._waiters[key]:
+                del self._waiters[key]
+
+    async def do(self, key: str, factory: Callable[[], Awaitable]) -> Any:
+        """Run factory() once per key at a time and share its result with concurrent callers"""
+        task = self._calls.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = self.track(key, factory())
+        return await self.wait(key, task)
+
+    def get_stats(self) -> dict:
+        return {
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._calls),
+        }
@@ -0,0 +1,165 @@
+"""Speculative policy answers started while the intent is still being classified.
+
+Most messages end up at the policy agent, so waiting for the LLM classifier
+before starting the agent just adds the classifier's latency to every answer.
+SpeculativePipeline starts both at once. Agent events are held back until the
+classifier has answered: a "Cancel Trip" intent cancels the speculative run,
+and any other intent releases the buffered events and the rest of the stream.
+The speculative answer is only cached and added to the conversation once the
+intent is known, so a cancelled run leaves no trace even if it had finished.
+"""
+import asyncio
+import statistics
+import threading
+import time
+from collections import Counter, deque
+from typing import AsyncIterator, List, Optional
+
+CANCEL_TRIP_INTENT = "Cancel Trip"
+
+
+class SpeculationStats:
+    """How often speculation was used or thrown away, the latency it saved and the work it wasted"""
+
+    def __init__(self, window: int = 1000):
+        self.outcomes: Counter = Counter()
+        self.wasted_events: Counter = Counter()
+        self.saved = deque(maxlen=window)
+        self.wasted = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, outcome: str, saved: float = 0.0, wasted: float = 0.0, wasted_events: Optional[Counter] = None):
+        with self._lock:
+            self.outcomes[outcome] += 1
+            if outcome in ("used", "mismatched"):
+                self.saved.append(saved)
+            if outcome == "cancelled":
+                self.wasted.append(wasted)
+                self.wasted_events.update(wasted_events or {})
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "outcomes": dict(self.outcomes),
+                "saved_ms_total": round(sum(self.saved) * 1000, 1),
+                "saved_ms_mean": round(statistics.mean(self.saved) * 1000, 1) if self.saved else None,
+                "wasted_ms_total": round(sum(self.wasted) * 1000, 1),
+                "wasted_tokens": self.wasted_events["token"],
+                "wasted_tool_steps": self.wasted_events["step"],
+            }
+
+
+class SpeculativePipeline:
+    """Classify a message and stream the policy agent's answer to it concurrently.
+
+    Yields {"type": "intent", "intents": [...]} once the intent is known,
+    followed either by the policy agent's stream events or, for a trip
+    cancellation, by a single {"type": "cancel_trip"} event.
+
+    Speculation is skipped when it cannot help: the cache or local fast path
+    already knows the intent, or the local guess is itself a trip cancellation.
+    The speculative run uses the local guess for tool routing; when the LLM
+    disagrees with the guess the answer is still used and counted as
+    "mismatched" so the fast path can be tuned.
+    """
+
+    def __init__(self, manager, classifier, enabled: bool = True):
+        self.manager = manager
+        self.classifier = classifier
+        self.enabled = enabled
+        self.stats = SpeculationStats()
+
+    async def _classify(self, user_input: str) -> List[dict]:
+        """LLM classification for a message classify_locally() could not answer"""
+        try:
+            return await self.classifier.aget_intent(user_input, checked_locally=True)
+        except Exception as e:
+            print(f"⚠️ Intent classification failed, using the policy agent: {e}")
+            return []
+
+    async def _sequential(self, user_input: str, intents: List[dict], conversation_id: str) -> AsyncIterator[dict]:
+        yield {"type": "intent", "intents": intents}
+        if intents and intents[0].get("type") == CANCEL_TRIP_INTENT:
+            yield {"type": "cancel_trip"}
+            return
+        async for event in self.manager.stream_query(user_input, intents, conversation_id):
+            yield event
+
+    async def stream(self, user_input: str, conversation_id: str) -> AsyncIterator[dict]:
+        intents = self.classifier.classify_locally(user_input)
+        if intents is not None:
+            self.stats.record("not_needed")
+        elif not self.enabled:
+            intents = await self._classify(user_input)
+            self.stats.record("disabled")
+        else:
+            guess = self.classifier.guess_intent(user_input)
+            if guess and guess[0].get("type") == CANCEL_TRIP_INTENT:
+                intents = await self._classify(user_input)
+                self.stats.record("skipped")
+        if intents is not None:
+            async for event in self._sequential(user_input, intents, conversation_id):
+                yield event
+            return
+
+        async for event in self._speculate(user_input, guess, conversation_id):
+            yield event
+
+    async def _speculate(self, user_input: str, guess: List[dict], conversation_id: str) -> AsyncIterator[dict]:
+        start = time.perf_counter()
+        finished_at = None
+        events: asyncio.Queue = asyncio.Queue()
+        confirm = asyncio.get_running_loop().create_future()
+
+        async def pump():
+            nonlocal finished_at
+            try:
+                async for event in self.manager.stream_query(user_input, guess, conversation_id, confirm=confirm):
+                    if event["type"] == "done":
+                        # "done" only arrives after confirm; the answer was ready total_ms into the run
+                        finished_at = start + event.get("total_ms", event["ttft_ms"]) / 1000
+                    events.put_nowait(event)
+            finally:
+                if finished_at is None:
+                    finished_at = time.perf_counter()
+                events.put_nowait(None)
+
+        speculative = asyncio.create_task(pump())
+        try:
+            intents = await self._classify(user_input)
+            classified_at = time.perf_counter()
+            if intents and intents[0].get("type") == CANCEL_TRIP_INTENT:
+                # The run may already be done; it is waiting on confirm, so cancelling it
+                # keeps its answer out of the cache and the conversation history
+                speculative.cancel()
+                wasted_events = Counter()
+                while not events.empty():
+                    event = events.get_nowait()
+                    if event:
+                        wasted_events[event["type"]] += 1
+                self.stats.record("cancelled", wasted=classified_at - start, wasted_events=wasted_events)
+                print(f"🗑️ Speculative policy run cancelled after {(classified_at - start) * 1000:.0f} ms")
+                yield {"type": "intent", "intents": intents}
+                yield {"type": "cancel_trip"}
+                return
+
+            confirm.set_result(True)
+            yield {"type": "intent", "intents": intents}
+            while (event := await events.get()) is not None:
+                yield event
+            await speculative
+        finally:
+            if not speculative.done():
+                speculative.cancel()
+            if not confirm.done():
+                confirm.cancel()
+
+        # Sequentially the answer would have taken classifier + agent time; in parallel it
+        # took the longer of the two, so the saving is the shorter one
+        saved = min(classified_at, finished_at or time.perf_counter()) - start
+        matched = not intents or not guess or intents[0].get("type") == guess[0].get("type")
+        self.stats.record("used" if matched else "mismatched", saved=saved)
+        print(f"⚡ Speculative policy run used, classifier latency hidden: {saved * 1000:.0f} ms")
+
+    def get_stats(self) -> dict:
+        return {"enabled": self.enabled, **self.stats.get_stats()}
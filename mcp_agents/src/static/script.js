@@ -44,8 +44,12 @@ document.addEventListener('DOMContentLoaded', function() {
         
         showTypingIndicator();
         
-        // Send message to server
-        fetch('/api/chat', {
+        // Stream the answer from the server, rendering tokens as they arrive
+        const sentAt = performance.now();
+        let streamingContent = null;
+        let partial = '';
+        
+        fetch('/api/chat/stream', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
@@ -56,27 +60,41 @@ document.addEventListener('DOMContentLoaded', function() {
                 history: getCurrentConversation().messages
             })
         })
-        .then(handleResponse)
-        .then(data => {
-            removeTypingIndicator();
-            
-            if (data.error) {
-                addMessageToConversation({
-                    content: `Error: ${data.error}`,
-                    type: 'system',
-                    timestamp: new Date().toISOString()
-                });
-            } else {
+        .then(response => readEventStream(response, event => {
+            if (event.type === 'token' || event.type === 'step') {
+                if (!streamingContent) {
+                    removeTypingIndicator();
+                    streamingContent = createStreamingMessage();
+                    console.debug(`First event after ${Math.round(performance.now() - sentAt)} ms`);
+                }
+                if (event.type === 'token') {
+                    partial += event.content;
+                    streamingContent.innerHTML = formatResponse(partial);
+                } else {
+                    // Tokens so far were the model planning this tool call, not the answer
+                    partial = '';
+                    streamingContent.innerHTML = formatResponse(`🔧 Step ${event.step}: using ${event.tool}...`);
+                }
+                chatHistory.scrollTop = chatHistory.scrollHeight;
+            } else if (event.type === 'done') {
+                removeTypingIndicator();
                 addMessageToConversation({
-                    content: data.response,
+                    content: event.content,
                     type: 'assistant',
                     timestamp: new Date().toISOString()
                 });
                 
                 // Update conversation title if first assistant message
-                updateConversationTitle(data.response);
+                updateConversationTitle(event.content);
+            } else if (event.type === 'error') {
+                removeTypingIndicator();
+                addMessageToConversation({
+                    content: `Error: ${event.content}`,
+                    type: 'system',
+                    timestamp: new Date().toISOString()
+                });
             }
-        })
+        }))
         .catch(error => {
             removeTypingIndicator();
             addMessageToConversation({
@@ -318,6 +336,49 @@ document.addEventListener('DOMContentLoaded', function() {
         return response.json();
     }
     
+    async function readEventStream(response, onEvent) {
+        if (!response.ok) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+        }
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        
+        while (true) {
+            const { done, value } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+            
+            // Server-sent events are separated by a blank line
+            let boundary;
+            while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                const frame = buffer.slice(0, boundary);
+                buffer = buffer.slice(boundary + 2);
+                const data = frame.split('\n')
+                    .filter(line => line.startsWith('data:'))
+                    .map(line => line.slice(5).trim())
+                    .join('\n');
+                if (data) {
+                    onEvent(JSON.parse(data));
+                }
+            }
+        }
+    }
+    
+    function createStreamingMessage() {
+        // Live assistant bubble; replaced by the stored message once the stream is done
+        const group = document.createElement('div');
+        group.className = 'message-group';
+        group.innerHTML = `
+            <div class="message-container assistant">
+                <div class="avatar assistant">N</div>
+                <div class="message-content"></div>
+            </div>
+        `;
+        chatHistory.appendChild(group);
+        return group.querySelector('.message-content');
+    }
+    
     function formatResponse(text) {
         if (!text) return '';
         
@@ -0,0 +1,182 @@
+import asyncio
+import json
+import math
+import statistics
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import AsyncCallbackHandler
+
+from metrics import observe_llm
+from tracing import Span, tracer
+
+
+def sse_event(event: dict) -> str:
+    """Encode one stream event as a server-sent event frame"""
+    return f"data: {json.dumps(event)}\n\n"
+
+
+def token_usage(response) -> Tuple[int, int]:
+    """(prompt, completion) tokens of an LLMResult, from message usage metadata or the provider's token_usage"""
+    usages = [
+        generation.message.usage_metadata
+        for generations in response.generations
+        for generation in generations
+        if getattr(getattr(generation, "message", None), "usage_metadata", None)
+    ]
+    if usages:
+        return sum(u.get("input_tokens", 0) for u in usages), sum(u.get("output_tokens", 0) for u in usages)
+    usage = (response.llm_output or {}).get("token_usage") or {}
+    return usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
+
+
+class StreamingCallbackHandler(AsyncCallbackHandler):
+    """Counts LLM calls, tool steps and tokens of an agent run, optionally streaming them to a queue.
+
+    With a queue, emits {"type": "token"} for every generated token and
+    {"type": "step"} for every tool call the model decides to make. Tokens
+    produced before a step belong to that planning step, not the final answer.
+    """
+
+    def __init__(self, queue: Optional[asyncio.Queue] = None):
+        self.queue = queue
+        self.llm_calls = 0
+        self.steps = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    async def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+        if token and self.queue is not None:
+            self.queue.put_nowait({"type": "token", "content": token})
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    async def on_llm_end(self, response, **kwargs: Any) -> None:
+        self.llm_calls += 1
+        prompt_tokens, completion_tokens = token_usage(response)
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                for call in getattr(message, "tool_calls", None) or []:
+                    self.steps += 1
+                    if self.queue is None:
+                        continue
+                    self.queue.put_nowait({
+                        "type": "step",
+                        "step": self.steps,
+                        "tool": call.get("name"),
+                        "input": call.get("args"),
+                    })
+
+
+class TracingCallbackHandler(AsyncCallbackHandler):
+    """One span per LLM call (each agent step), a child of the span active when the call starts"""
+
+    def __init__(self):
+        self._spans: Dict[UUID, Span] = {}
+
+    async def on_llm_start(self, serialized: dict, prompts: List[str], *, run_id: UUID, **kwargs: Any) -> None:
+        params = kwargs.get("invocation_params") or {}
+        self._spans[run_id] = tracer.start_span(
+            "llm.call",
+            kind="client",
+            **{"llm.model": params.get("model") or params.get("model_name"), "llm.prompt_chars": sum(map(len, prompts))},
+        )
+
+    async def on_llm_end(self, response, *, run_id: UUID, **kwargs: Any) -> None:
+        span = self._spans.pop(run_id, None)
+        if span is None:
+            return
+        prompt_tokens, completion_tokens = token_usage(response)
+        tools = [
+            call.get("name")
+            for generations in response.generations
+            for generation in generations
+            for call in getattr(getattr(generation, "message", None), "tool_calls", None) or []
+        ]
+        span.set_attributes({
+            "llm.prompt_tokens": prompt_tokens,
+            "llm.completion_tokens": completion_tokens,
+            "llm.tool_calls": ",".join(tools),
+        })
+        span.end()
+
+    async def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        span = self._spans.pop(run_id, None)
+        if span is not None:
+            span.record_exception(error)
+            span.end()
+
+
+class MetricsCallbackHandler(AsyncCallbackHandler):
+    """Latency and token usage of every call made through an LLM, per model, for /metrics"""
+
+    def __init__(self, model: Optional[str] = None):
+        self.model = model
+        self._calls: Dict[UUID, Tuple[float, str]] = {}
+
+    async def on_llm_start(self, serialized: dict, prompts: List[str], *, run_id: UUID, **kwargs: Any) -> None:
+        params = kwargs.get("invocation_params") or {}
+        model = self.model or params.get("model") or params.get("model_name") or "unknown"
+        self._calls[run_id] = (time.perf_counter(), model)
+
+    async def on_llm_end(self, response, *, run_id: UUID, **kwargs: Any) -> None:
+        call = self._calls.pop(run_id, None)
+        if call is not None:
+            start, model = call
+            observe_llm(model, time.perf_counter() - start, *token_usage(response))
+
+    async def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        call = self._calls.pop(run_id, None)
+        if call is not None:
+            start, model = call
+            observe_llm(model, time.perf_counter() - start, error=True)
+
+
+class StreamStats:
+    """Rolling time-to-first-token and total latency of streamed responses"""
+
+    def __init__(self, window: int = 1000):
+        self.streams = 0
+        self.cached = 0
+        self.errors = 0
+        self.ttft = deque(maxlen=window)
+        self.total = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, ttft: Optional[float], total: float, cached: bool = False, error: bool = False):
+        with self._lock:
+            self.streams += 1
+            self.cached += cached
+            self.errors += error
+            if ttft is not None:
+                self.ttft.append(ttft)
+            self.total.append(total)
+
+    @staticmethod
+    def _summary(samples) -> dict:
+        if not samples:
+            return {"p50_ms": None, "p95_ms": None, "mean_ms": None}
+        ordered = sorted(samples)
+        return {
+            "p50_ms": round(statistics.median(ordered) * 1000, 1),
+            "p95_ms": round(ordered[math.ceil(0.95 * len(ordered)) - 1] * 1000, 1),
+            "mean_ms": round(statistics.mean(ordered) * 1000, 1),
+        }
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "streams": self.streams,
+                "cached": self.cached,
+                "errors": self.errors,
+                "time_to_first_token": self._summary(self.ttft),
+                "total_time": self._summary(self.total),
+            }
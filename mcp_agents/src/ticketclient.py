@@ -0,0 +1,130 @@
+import asyncio
+import random
+import time
+import uuid
+from typing import Optional
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+from tracing import inject, tracer
+
+RETRY_STATUS_CODES = {500, 502, 503, 504}
+
+
+def backoff_delay(attempt: int, base: float, cap: float = 5.0) -> float:
+    """Exponential backoff with full jitter"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class TicketServiceClient:
+    """Pooled keep-alive client for the ticket service (/mcp/db/*).
+
+    Retries connection errors and 5xx responses with jittered exponential
+    backoff. One instance should be shared per process.
+    """
+
+    def __init__(
+        self,
+        api_url: str,
+        api_key: Optional[str] = None,
+        timeout: float = 10.0,
+        connect_timeout: float = 3.0,
+        max_retries: int = 3,
+        backoff: float = 0.2,
+        pool_size: int = 20,
+    ):
+        self.api_url = api_url.rstrip("/")
+        self.timeout = (connect_timeout, timeout)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"Content-Type": "application/json"})
+        if api_key:
+            self.session.headers["Authorization"] = f"Bearer {api_key}"
+
+    def post(self, path: str, payload: dict, headers: Optional[dict] = None) -> requests.Response:
+        url = f"{self.api_url}{path}"
+        with tracer.span("ticket_api.post", kind="client", **{"http.method": "POST", "http.route": path}) as span:
+            headers = inject(headers)
+            for attempt in range(self.max_retries + 1):
+                span.set_attribute("http.attempts", attempt + 1)
+                try:
+                    resp = self.session.post(url, json=payload, headers=headers, timeout=self.timeout)
+                except (requests.ConnectionError, requests.Timeout):
+                    if attempt >= self.max_retries:
+                        raise
+                else:
+                    if resp.status_code not in RETRY_STATUS_CODES or attempt >= self.max_retries:
+                        span.set_attribute("http.status_code", resp.status_code)
+                        return resp
+                time.sleep(backoff_delay(attempt, self.backoff))
+
+    def cancel_ticket(self, ticket_id, user_id=None, idempotency_key: Optional[str] = None) -> requests.Response:
+        """Cancel a ticket; every retry reuses the same Idempotency-Key"""
+        headers = {"Idempotency-Key": idempotency_key or str(uuid.uuid4())}
+        return self.post("/mcp/db/cancel_ticket", {"ticket_id": ticket_id, "user_id": user_id}, headers)
+
+    def confirm_flight(self, ticket_id, user_id) -> requests.Response:
+        return self.post("/mcp/db/confirm_flight", {"ticket_id": ticket_id, "user_id": user_id})
+
+    def close(self):
+        self.session.close()
+
+
+class AsyncTicketServiceClient:
+    """Async counterpart of TicketServiceClient built on a pooled httpx.AsyncClient"""
+
+    def __init__(
+        self,
+        api_url: str,
+        api_key: Optional[str] = None,
+        timeout: float = 10.0,
+        connect_timeout: float = 3.0,
+        max_retries: int = 3,
+        backoff: float = 0.2,
+        pool_size: int = 20,
+    ):
+        self.api_url = api_url.rstrip("/")
+        self.max_retries = max_retries
+        self.backoff = backoff
+        headers = {"Content-Type": "application/json"}
+        if api_key:
+            headers["Authorization"] = f"Bearer {api_key}"
+        self.client = httpx.AsyncClient(
+            base_url=self.api_url,
+            headers=headers,
+            timeout=httpx.Timeout(timeout, connect=connect_timeout),
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+        )
+
+    async def post(self, path: str, payload: dict, headers: Optional[dict] = None) -> httpx.Response:
+        with tracer.span("ticket_api.post", kind="client", **{"http.method": "POST", "http.route": path}) as span:
+            headers = inject(headers)
+            for attempt in range(self.max_retries + 1):
+                span.set_attribute("http.attempts", attempt + 1)
+                try:
+                    resp = await self.client.post(path, json=payload, headers=headers)
+                except (httpx.ConnectError, httpx.TimeoutException, httpx.RemoteProtocolError):
+                    if attempt >= self.max_retries:
+                        raise
+                else:
+                    if resp.status_code not in RETRY_STATUS_CODES or attempt >= self.max_retries:
+                        span.set_attribute("http.status_code", resp.status_code)
+                        return resp
+                await asyncio.sleep(backoff_delay(attempt, self.backoff))
+
+    async def cancel_ticket(self, ticket_id, user_id=None, idempotency_key: Optional[str] = None) -> httpx.Response:
+        """Cancel a ticket; every retry reuses the same Idempotency-Key"""
+        headers = {"Idempotency-Key": idempotency_key or str(uuid.uuid4())}
+        return await self.post("/mcp/db/cancel_ticket", {"ticket_id": ticket_id, "user_id": user_id}, headers)
+
+    async def confirm_flight(self, ticket_id, user_id) -> httpx.Response:
+        return await self.post("/mcp/db/confirm_flight", {"ticket_id": ticket_id, "user_id": user_id})
+
+    async def close(self):
+        await self.client.aclose()
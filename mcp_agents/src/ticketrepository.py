@@ -0,0 +1,354 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+
+import httpx
+
+from metrics import observe_supabase
+from tracing import get_tracer
+
+tracer = get_tracer("ticket-service")
+
+TICKET_FLIGHT_SELECT = "ticket_id,flight_id,flights(*)"
+FLIGHT_COLUMNS = ("flight_id", "flight_name", "source", "destination", "takeoff_time", "company")
+
+
+def _in_filter(values: Iterable) -> str:
+    return "in.({})".format(",".join(str(v) for v in values))
+
+
+class TicketRepository:
+    """Data access used by the ticket service.
+
+    Ticket lookups that include the flight return the ticket row with the
+    flight embedded under "flights" (None when the flight row is missing),
+    matching the shape of a PostgREST embedded select.
+    """
+
+    backend = "base"
+
+    async def cancel_ticket(self, ticket_id: int) -> str:
+        """Atomically cancel one ticket; returns not_found, already_cancelled or cancelled"""
+        raise NotImplementedError
+
+    async def get_ticket_with_flight(self, ticket_id: int, user_id: int) -> Optional[dict]:
+        raise NotImplementedError
+
+    async def find_tickets(self, ticket_ids: List[int], user_id: Optional[int] = None) -> List[dict]:
+        """Return ticket_id and status for every listed ticket that exists"""
+        raise NotImplementedError
+
+    async def cancel_open_tickets(self, ticket_ids: List[int]) -> List[int]:
+        """Cancel every listed ticket that is not already cancelled; returns the IDs changed"""
+        raise NotImplementedError
+
+    async def find_tickets_with_flights(self, ticket_ids: List[int], user_id: int) -> List[dict]:
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+class SupabaseTicketRepository(TicketRepository):
+    """Supabase's PostgREST API over one pooled httpx.AsyncClient (HTTP/2 when available)"""
+
+    backend = "supabase"
+
+    def __init__(
+        self,
+        url: str,
+        key: str,
+        pool_size: int = 100,
+        keepalive: int = 20,
+        timeout: float = 10.0,
+        connect_timeout: float = 3.0,
+        http2: bool = True,
+    ):
+        self.rest_url = f"{url.rstrip('/')}/rest/v1"
+        self.client = httpx.AsyncClient(
+            base_url=self.rest_url,
+            headers={
+                "apikey": key,
+                "Authorization": f"Bearer {key}",
+                "Content-Type": "application/json",
+            },
+            timeout=httpx.Timeout(timeout, connect=connect_timeout),
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=keepalive),
+            http2=http2,
+        )
+
+    async def request(self, method: str, path: str, params=None, json=None, prefer: Optional[str] = None):
+        headers = {"Prefer": prefer} if prefer else None
+        start = time.perf_counter()
+        error = None
+        try:
+            with tracer.span("supabase.request", kind="client", **{"http.method": method, "db.table": path}) as span:
+                resp = await self.client.request(method, path, params=params, json=json, headers=headers)
+                span.set_attribute("http.status_code", resp.status_code)
+                if resp.is_error:
+                    error = str(resp.status_code)
+                resp.raise_for_status()
+                return resp.json() if resp.content else None
+        except httpx.HTTPError as e:
+            error = error or type(e).__name__
+            raise
+        finally:
+            observe_supabase(method, path, time.perf_counter() - start, error)
+
+    async def cancel_ticket(self, ticket_id: int) -> str:
+        # See sql/cancel_ticket_atomic.sql
+        return await self.request("POST", "/rpc/cancel_ticket_atomic", json={"p_ticket_id": ticket_id})
+
+    async def get_ticket_with_flight(self, ticket_id: int, user_id: int) -> Optional[dict]:
+        rows = await self.request("GET", "/tickets", params={
+            "select": TICKET_FLIGHT_SELECT,
+            "ticket_id": f"eq.{ticket_id}",
+            "user_id": f"eq.{user_id}",
+        })
+        return rows[0] if rows else None
+
+    async def find_tickets(self, ticket_ids: List[int], user_id: Optional[int] = None) -> List[dict]:
+        params = {"select": "ticket_id,status", "ticket_id": _in_filter(ticket_ids)}
+        if user_id is not None:
+            params["user_id"] = f"eq.{user_id}"
+        return await self.request("GET", "/tickets", params=params)
+
+    async def cancel_open_tickets(self, ticket_ids: List[int]) -> List[int]:
+        rows = await self.request(
+            "PATCH",
+            "/tickets",
+            # neq alone is SQL <>, which never matches a NULL status
+            params={
+                "ticket_id": _in_filter(ticket_ids),
+                "or": "(status.is.null,status.neq.cancelled)",
+                "select": "ticket_id",
+            },
+            json={"status": "cancelled"},
+            prefer="return=representation",
+        )
+        return [row["ticket_id"] for row in rows or []]
+
+    async def find_tickets_with_flights(self, ticket_ids: List[int], user_id: int) -> List[dict]:
+        return await self.request("GET", "/tickets", params={
+            "select": TICKET_FLIGHT_SELECT,
+            "ticket_id": _in_filter(ticket_ids),
+            "user_id": f"eq.{user_id}",
+        })
+
+    async def close(self):
+        await self.client.aclose()
+
+
+class InMemoryTicketRepository(TicketRepository):
+    """Tickets and flights held in dicts; for tests, local runs and offline load tests"""
+
+    backend = "memory"
+
+    def __init__(self, tickets: Iterable[dict] = (), flights: Iterable[dict] = ()):
+        self.tickets: Dict[int, dict] = {}
+        self.flights: Dict[int, dict] = {}
+        self._lock = threading.Lock()
+        self.load(tickets, flights)
+
+    def load(self, tickets: Iterable[dict] = (), flights: Iterable[dict] = ()):
+        with self._lock:
+            self.flights.update((f["flight_id"], dict(f)) for f in flights)
+            self.tickets.update((t["ticket_id"], dict(t)) for t in tickets)
+
+    def _with_flight(self, ticket: dict) -> dict:
+        flight = self.flights.get(ticket.get("flight_id"))
+        return {
+            "ticket_id": ticket["ticket_id"],
+            "flight_id": ticket.get("flight_id"),
+            "flights": dict(flight) if flight else None,
+        }
+
+    def _owned(self, ticket_ids: List[int], user_id: Optional[int]) -> List[dict]:
+        found = (self.tickets.get(tid) for tid in ticket_ids)
+        return [t for t in found if t is not None and (user_id is None or t.get("user_id") == user_id)]
+
+    async def cancel_ticket(self, ticket_id: int) -> str:
+        with self._lock:
+            ticket = self.tickets.get(ticket_id)
+            if ticket is None:
+                return "not_found"
+            if ticket.get("status") == "cancelled":
+                return "already_cancelled"
+            ticket["status"] = "cancelled"
+            return "cancelled"
+
+    async def get_ticket_with_flight(self, ticket_id: int, user_id: int) -> Optional[dict]:
+        with self._lock:
+            rows = self._owned([ticket_id], user_id)
+            return self._with_flight(rows[0]) if rows else None
+
+    async def find_tickets(self, ticket_ids: List[int], user_id: Optional[int] = None) -> List[dict]:
+        with self._lock:
+            return [{"ticket_id": t["ticket_id"], "status": t.get("status")} for t in self._owned(ticket_ids, user_id)]
+
+    async def cancel_open_tickets(self, ticket_ids: List[int]) -> List[int]:
+        with self._lock:
+            changed = []
+            for ticket in self._owned(ticket_ids, None):
+                if ticket.get("status") != "cancelled":
+                    ticket["status"] = "cancelled"
+                    changed.append(ticket["ticket_id"])
+            return changed
+
+    async def find_tickets_with_flights(self, ticket_ids: List[int], user_id: int) -> List[dict]:
+        with self._lock:
+            return [self._with_flight(t) for t in self._owned(ticket_ids, user_id)]
+
+
+class SQLiteTicketRepository(TicketRepository):
+    """Tickets and flights in a local SQLite file, indexed like the production tables.
+
+    ticket_id is the INTEGER PRIMARY KEY (the rowid index); (ticket_id, user_id)
+    covers the per-user lookups and flight_id the join to flights.
+    """
+
+    backend = "sqlite"
+
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5.0, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS flights ("
+            " flight_id INTEGER PRIMARY KEY, flight_name TEXT, source TEXT,"
+            " destination TEXT, takeoff_time TEXT, company TEXT);"
+            "CREATE TABLE IF NOT EXISTS tickets ("
+            " ticket_id INTEGER PRIMARY KEY, user_id INTEGER,"
+            " flight_id INTEGER REFERENCES flights (flight_id), status TEXT);"
+            "CREATE INDEX IF NOT EXISTS idx_tickets_ticket_user ON tickets (ticket_id, user_id);"
+            "CREATE INDEX IF NOT EXISTS idx_tickets_flight ON tickets (flight_id);"
+        )
+
+    def load(self, tickets: Iterable[dict] = (), flights: Iterable[dict] = ()):
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO flights ({', '.join(FLIGHT_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?)",
+                [tuple(f.get(c) for c in FLIGHT_COLUMNS) for f in flights],
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO tickets (ticket_id, user_id, flight_id, status) VALUES (?, ?, ?, ?)",
+                [(t["ticket_id"], t.get("user_id"), t.get("flight_id"), t.get("status")) for t in tickets],
+            )
+            self._conn.execute("COMMIT")
+
+    def _select_with_flights(self, where: str, params: tuple) -> List[dict]:
+        rows = self._conn.execute(
+            "SELECT t.ticket_id AS ticket_id, t.flight_id AS ticket_flight_id, "
+            + ", ".join(f"f.{c} AS {c}" for c in FLIGHT_COLUMNS)
+            + " FROM tickets t LEFT JOIN flights f ON f.flight_id = t.flight_id WHERE " + where,
+            params,
+        ).fetchall()
+        return [
+            {
+                "ticket_id": row["ticket_id"],
+                "flight_id": row["ticket_flight_id"],
+                "flights": {c: row[c] for c in FLIGHT_COLUMNS} if row["flight_id"] is not None else None,
+            }
+            for row in rows
+        ]
+
+    @staticmethod
+    def _placeholders(values: List[int]) -> str:
+        return ", ".join("?" for _ in values)
+
+    # sqlite3 calls block (BEGIN IMMEDIATE can wait up to the 5 s busy timeout), so the
+    # async methods run them in a worker thread to keep the event loop free
+    async def cancel_ticket(self, ticket_id: int) -> str:
+        return await asyncio.to_thread(self._cancel_ticket, ticket_id)
+
+    async def get_ticket_with_flight(self, ticket_id: int, user_id: int) -> Optional[dict]:
+        return await asyncio.to_thread(self._get_ticket_with_flight, ticket_id, user_id)
+
+    async def find_tickets(self, ticket_ids: List[int], user_id: Optional[int] = None) -> List[dict]:
+        return await asyncio.to_thread(self._find_tickets, ticket_ids, user_id)
+
+    async def cancel_open_tickets(self, ticket_ids: List[int]) -> List[int]:
+        return await asyncio.to_thread(self._cancel_open_tickets, ticket_ids)
+
+    async def find_tickets_with_flights(self, ticket_ids: List[int], user_id: int) -> List[dict]:
+        return await asyncio.to_thread(self._find_tickets_with_flights, ticket_ids, user_id)
+
+    async def close(self):
+        await asyncio.to_thread(self._close)
+
+    def _cancel_ticket(self, ticket_id: int) -> str:
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE tickets SET status = 'cancelled' WHERE ticket_id = ? AND status IS NOT 'cancelled'",
+                (ticket_id,),
+            )
+            if cur.rowcount:
+                return "cancelled"
+            exists = self._conn.execute("SELECT 1 FROM tickets WHERE ticket_id = ?", (ticket_id,)).fetchone()
+            return "already_cancelled" if exists else "not_found"
+
+    def _get_ticket_with_flight(self, ticket_id: int, user_id: int) -> Optional[dict]:
+        with self._lock:
+            rows = self._select_with_flights("t.ticket_id = ? AND t.user_id = ?", (ticket_id, user_id))
+        return rows[0] if rows else None
+
+    def _find_tickets(self, ticket_ids: List[int], user_id: Optional[int]) -> List[dict]:
+        query = f"SELECT ticket_id, status FROM tickets WHERE ticket_id IN ({self._placeholders(ticket_ids)})"
+        params = list(ticket_ids)
+        if user_id is not None:
+            query += " AND user_id = ?"
+            params.append(user_id)
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(query, params).fetchall()]
+
+    def _cancel_open_tickets(self, ticket_ids: List[int]) -> List[int]:
+        where = f"ticket_id IN ({self._placeholders(ticket_ids)}) AND status IS NOT 'cancelled'"
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                changed = [row[0] for row in self._conn.execute(f"SELECT ticket_id FROM tickets WHERE {where}", ticket_ids)]
+                self._conn.execute(f"UPDATE tickets SET status = 'cancelled' WHERE {where}", ticket_ids)
+                self._conn.execute("COMMIT")
+            except sqlite3.Error:
+                self._conn.execute("ROLLBACK")
+                raise
+        return changed
+
+    def _find_tickets_with_flights(self, ticket_ids: List[int], user_id: int) -> List[dict]:
+        with self._lock:
+            return self._select_with_flights(
+                f"t.ticket_id IN ({self._placeholders(ticket_ids)}) AND t.user_id = ?",
+                (*ticket_ids, user_id),
+            )
+
+    def _close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def create_ticket_repository(url: str, key: str = "", **supabase_options) -> TicketRepository:
+    """Build a ticket repository from a URL.
+
+    ``memory://`` gives an empty in-process store, ``sqlite:///path/to/tickets.db``
+    a local database and an ``https://`` Supabase project URL the live service.
+    """
+    scheme = urlparse(url).scheme if url else "memory"
+    if scheme in ("", "memory"):
+        return InMemoryTicketRepository()
+    if scheme == "sqlite":
+        path = url[len("sqlite:///"):] if url.startswith("sqlite:///") else url[len("sqlite://"):]
+        return SQLiteTicketRepository(path or "tickets.db")
+    if scheme in ("http", "https"):
+        return SupabaseTicketRepository(url, key, **supabase_options)
+    raise ValueError(f"Unsupported ticket repository URL: {url}")
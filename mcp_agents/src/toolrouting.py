@@ -0,0 +1,191 @@
+"""Per-intent tool routing for MCPAgent runs.
+
+Each intent gets a ToolProfile: the MCP servers leased from the pool, the
+tools the agent may call on them, a step budget and a wall-clock timeout.
+Exposing only the relevant tools keeps the tool schemas out of every prompt
+the agent sends, and the budgets stop one question from taking 15 steps.
+"""
+import json
+import math
+import statistics
+import threading
+from collections import defaultdict, deque
+from typing import Dict, List, Optional
+
+SEARCH_TOOLS = ["search", "fetch_content"]
+READ_PAGE_TOOLS = ["browser_navigate", "browser_snapshot", "browser_wait_for"]
+INTERACT_PAGE_TOOLS = ["browser_click", "browser_type", "browser_select_option", "browser_press_key", "browser_navigate_back"]
+
+
+class ToolProfile:
+    """MCP servers, tools and budgets an agent run gets for one intent.
+
+    servers=None leases every configured server and tools=None exposes every
+    tool of the leased servers.
+    """
+
+    def __init__(
+        self,
+        servers: Optional[List[str]] = None,
+        tools: Optional[List[str]] = None,
+        max_steps: int = 15,
+        timeout: float = 120.0,
+    ):
+        self.servers = servers
+        self.tools = tools
+        self.max_steps = max_steps
+        self.timeout = timeout
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ToolProfile":
+        return cls(
+            servers=data.get("servers"),
+            tools=data.get("tools"),
+            max_steps=data.get("max_steps", 15),
+            timeout=data.get("timeout", 120.0),
+        )
+
+    def to_dict(self) -> dict:
+        return {"servers": self.servers, "tools": self.tools, "max_steps": self.max_steps, "timeout": self.timeout}
+
+    def disallowed_tools(self, connectors) -> List[str]:
+        """Names of the leased connectors' tools that are not in this profile"""
+        if self.tools is None:
+            return []
+        allowed = set(self.tools)
+        disallowed = []
+        for connector in connectors:
+            try:
+                tools = connector.tools
+            except RuntimeError:
+                # Connector not initialized yet, so there is nothing to list
+                continue
+            disallowed.extend(tool.name for tool in tools if tool.name not in allowed)
+        return disallowed
+
+
+# Policy questions are answered by searching and reading pages; the status and
+# seat intents may also have to fill in a flight number on the airline's site.
+# No airline intent needs the airbnb server.
+DEFAULT_TOOL_PROFILES: Dict[str, ToolProfile] = {
+    "Cancellation Policy": ToolProfile(
+        servers=["duckduckgo-search", "playwright"], tools=SEARCH_TOOLS + READ_PAGE_TOOLS, max_steps=6, timeout=60.0
+    ),
+    "Pet Travel": ToolProfile(
+        servers=["duckduckgo-search", "playwright"], tools=SEARCH_TOOLS + READ_PAGE_TOOLS, max_steps=6, timeout=60.0
+    ),
+    "Flight Status": ToolProfile(
+        servers=["duckduckgo-search", "playwright"],
+        tools=SEARCH_TOOLS + READ_PAGE_TOOLS + INTERACT_PAGE_TOOLS,
+        max_steps=8,
+        timeout=90.0,
+    ),
+    "Seat Availability": ToolProfile(
+        servers=["duckduckgo-search", "playwright"],
+        tools=SEARCH_TOOLS + READ_PAGE_TOOLS + INTERACT_PAGE_TOOLS,
+        max_steps=10,
+        timeout=120.0,
+    ),
+}
+FALLBACK_TOOL_PROFILE = ToolProfile()
+
+
+class ToolRouter:
+    """Picks the ToolProfile for a classified query"""
+
+    def __init__(self, profiles: Optional[Dict[str, ToolProfile]] = None, fallback: Optional[ToolProfile] = None):
+        self.profiles = dict(DEFAULT_TOOL_PROFILES if profiles is None else profiles)
+        self.fallback = fallback or FALLBACK_TOOL_PROFILE
+
+    @classmethod
+    def from_file(cls, path: str) -> "ToolRouter":
+        """Default profiles overridden by a JSON file of {"<intent>": {servers, tools, max_steps, timeout}}.
+
+        Fields left out keep the built-in profile's value. The "default" key
+        overrides the profile used for unknown intents.
+        """
+        with open(path, "r") as f:
+            overrides = json.load(f)
+        fallback = ToolProfile.from_dict({**FALLBACK_TOOL_PROFILE.to_dict(), **overrides.pop("default", {})})
+        profiles = dict(DEFAULT_TOOL_PROFILES)
+        for intent, override in overrides.items():
+            base = profiles.get(intent, FALLBACK_TOOL_PROFILE).to_dict()
+            profiles[intent] = ToolProfile.from_dict({**base, **override})
+        return cls(profiles, fallback)
+
+    def route(self, intents: Optional[List[dict]], available_servers: List[str]):
+        """(intent name, profile) for the primary intent; unknown intents get the fallback profile"""
+        intent = intents[0].get("type", "Unknown") if intents else "Unknown"
+        profile = self.profiles.get(intent)
+        if profile is None:
+            return intent, self.fallback
+        if profile.servers is not None and not any(s in available_servers for s in profile.servers):
+            # None of the profile's servers are configured; let the agent use whatever is
+            print(f"⚠️ No MCP server for intent '{intent}' is configured, using every server")
+            return intent, ToolProfile(None, None, profile.max_steps, profile.timeout)
+        return intent, profile
+
+    def get_profiles(self) -> dict:
+        return {
+            **{intent: profile.to_dict() for intent, profile in self.profiles.items()},
+            "default": self.fallback.to_dict(),
+        }
+
+
+class IntentRunStats:
+    """Rolling steps, tokens and wall time of agent runs per intent, for tuning the budgets"""
+
+    def __init__(self, window: int = 500):
+        self.window = window
+        self.runs: Dict[str, int] = defaultdict(int)
+        self.timeouts: Dict[str, int] = defaultdict(int)
+        self.budget_exhausted: Dict[str, int] = defaultdict(int)
+        self.steps: Dict[str, deque] = defaultdict(lambda: deque(maxlen=self.window))
+        self.tool_calls: Dict[str, deque] = defaultdict(lambda: deque(maxlen=self.window))
+        self.tokens: Dict[str, deque] = defaultdict(lambda: deque(maxlen=self.window))
+        self.wall_time: Dict[str, deque] = defaultdict(lambda: deque(maxlen=self.window))
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        intent: str,
+        steps: int,
+        tool_calls: int,
+        tokens: int,
+        wall_time: float,
+        max_steps: int,
+        timed_out: bool = False,
+    ):
+        """Record one run; steps are agent iterations (LLM calls), which is what max_steps bounds"""
+        with self._lock:
+            self.runs[intent] += 1
+            self.timeouts[intent] += timed_out
+            self.budget_exhausted[intent] += steps >= max_steps
+            self.steps[intent].append(steps)
+            self.tool_calls[intent].append(tool_calls)
+            self.tokens[intent].append(tokens)
+            self.wall_time[intent].append(wall_time)
+
+    @staticmethod
+    def _percentile(ordered: list, q: float):
+        return ordered[math.ceil(q * len(ordered)) - 1]
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = {}
+            for intent, runs in self.runs.items():
+                steps = sorted(self.steps[intent])
+                wall = sorted(self.wall_time[intent])
+                stats[intent] = {
+                    "runs": runs,
+                    "timeouts": self.timeouts[intent],
+                    "step_budget_exhausted": self.budget_exhausted[intent],
+                    "steps_mean": round(statistics.mean(steps), 2),
+                    "steps_p95": self._percentile(steps, 0.95),
+                    "steps_max": steps[-1],
+                    "tool_calls_mean": round(statistics.mean(self.tool_calls[intent]), 2),
+                    "tokens_mean": round(statistics.mean(self.tokens[intent])),
+                    "wall_p50_ms": round(statistics.median(wall) * 1000, 1),
+                    "wall_p95_ms": round(self._percentile(wall, 0.95) * 1000, 1),
+                }
+            return stats
@@ -0,0 +1,317 @@
+"""Span-based latency tracing that works offline.
+
+Spans carry W3C trace context (``traceparent``) and are exported in the
+OpenTelemetry span data model (trace/span IDs, parent span, kind, start/end
+time in Unix nanoseconds, attributes, events, status), one JSON object per
+line, so a trace file can be fed to any OTLP-JSON tooling later.
+
+Exporters are chosen with TRACING_EXPORTER: ``console``, ``file`` (JSON lines
+to TRACING_FILE) or both (``console,file``). Tracing is off when it is empty.
+
+    python tracing.py show traces.jsonl             # slowest traces as trees
+    python tracing.py show traces.jsonl --trace <id>
+"""
+import argparse
+import asyncio
+import contextvars
+import functools
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from config.settings import settings
+
+TRACEPARENT_HEADER = "traceparent"
+TRACEPARENT_RE = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+
+class SpanContext:
+    """The IDs that link a span to its trace and parent, also parsed from a remote traceparent"""
+
+    __slots__ = ("trace_id", "span_id", "sampled")
+
+    def __init__(self, trace_id: str, span_id: str, sampled: bool = True):
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.sampled = sampled
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    @classmethod
+    def from_traceparent(cls, value: Optional[str]) -> Optional["SpanContext"]:
+        match = TRACEPARENT_RE.match((value or "").strip().lower())
+        if not match or set(match.group(1)) == {"0"} or set(match.group(2)) == {"0"}:
+            return None
+        return cls(match.group(1), match.group(2), sampled=int(match.group(3), 16) & 1 == 1)
+
+
+class Span:
+    """One timed operation; end() exports it if its trace is sampled"""
+
+    def __init__(self, tracer: "Tracer", name: str, context: SpanContext, parent_id: Optional[str], kind: str, attributes: dict):
+        self.tracer = tracer
+        self.name = name
+        self.context = context
+        self.parent_id = parent_id
+        self.kind = kind
+        self.attributes = dict(attributes)
+        self.events: List[dict] = []
+        self.status = "UNSET"
+        self.status_message = ""
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+
+    @property
+    def duration_ms(self) -> Optional[float]:
+        return None if self.end_ns is None else (self.end_ns - self.start_ns) / 1e6
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    def set_attributes(self, attributes: dict):
+        self.attributes.update(attributes)
+
+    def add_event(self, name: str, **attributes):
+        self.events.append({"name": name, "timeUnixNano": time.time_ns(), "attributes": attributes})
+
+    def record_exception(self, exc: BaseException):
+        self.status = "ERROR"
+        self.status_message = f"{type(exc).__name__}: {exc}"
+        self.add_event("exception", **{"exception.type": type(exc).__name__, "exception.message": str(exc)})
+
+    def end(self):
+        if self.end_ns is not None:
+            return
+        self.end_ns = time.time_ns()
+        if self.status == "UNSET":
+            self.status = "OK"
+        if self.context.sampled:
+            self.tracer.export(self)
+
+    def to_dict(self) -> dict:
+        return {
+            "traceId": self.context.trace_id,
+            "spanId": self.context.span_id,
+            "parentSpanId": self.parent_id or "",
+            "name": self.name,
+            "kind": f"SPAN_KIND_{self.kind.upper()}",
+            "startTimeUnixNano": self.start_ns,
+            "endTimeUnixNano": self.end_ns,
+            "attributes": self.attributes,
+            "events": self.events,
+            "status": {"code": f"STATUS_CODE_{self.status}", "message": self.status_message},
+            "resource": {"service.name": self.tracer.service_name},
+        }
+
+
+class ConsoleExporter:
+    """One line per finished span"""
+
+    def export(self, span: Span):
+        attributes = " ".join(f"{k}={v}" for k, v in span.attributes.items())
+        status = " ❌" if span.status == "ERROR" else ""
+        print(f"🔭 {span.context.trace_id[:8]} {span.name} {span.duration_ms:.1f}ms {attributes}{status}")
+
+
+class FileExporter:
+    """Spans appended as JSON lines; safe to share between threads and tracers"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, span: Span):
+        line = json.dumps(span.to_dict(), default=str)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+class Tracer:
+    """Creates spans for one service; the active span is tracked per asyncio task / thread"""
+
+    def __init__(self, service_name: str, exporters: Optional[list] = None, sample_rate: float = 1.0):
+        self.service_name = service_name
+        self.exporters = exporters or []
+        self.sample_rate = sample_rate
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.exporters)
+
+    def export(self, span: Span):
+        for exporter in self.exporters:
+            try:
+                exporter.export(span)
+            except Exception as e:
+                print(f"⚠️ Span export failed: {e}")
+
+    def start_span(self, name: str, parent=None, kind: str = "internal", **attributes) -> Span:
+        """Start a span without making it current (for callbacks that end it later).
+
+        parent is a Span or a SpanContext; by default it is the current span.
+        """
+        parent = parent if parent is not None else current_span()
+        parent_context = parent.context if isinstance(parent, Span) else parent
+        span_id = f"{random.getrandbits(64):016x}"
+        if parent_context is None:
+            context = SpanContext(f"{random.getrandbits(128):032x}", span_id, random.random() < self.sample_rate)
+        else:
+            context = SpanContext(parent_context.trace_id, span_id, parent_context.sampled)
+        return Span(self, name, context, parent_context.span_id if parent_context else None, kind, attributes)
+
+    @contextmanager
+    def span(self, name: str, parent=None, kind: str = "internal", **attributes) -> Iterator[Span]:
+        """Time a block as the current span; exceptions mark it as failed"""
+        span = self.start_span(name, parent=parent, kind=kind, **attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            if not isinstance(e, (GeneratorExit, asyncio.CancelledError)):
+                span.record_exception(e)
+            else:
+                span.set_attribute("cancelled", True)
+            raise
+        finally:
+            span.end()
+            try:
+                _current_span.reset(token)
+            except ValueError:
+                # An async generator closed from another task; the token belongs to the original context
+                pass
+
+    def traced(self, name: Optional[str] = None, **attributes):
+        """Decorator wrapping a sync or async function in a span"""
+        def decorator(func):
+            span_name = name or func.__qualname__
+            if asyncio.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    with self.span(span_name, **attributes):
+                        return await func(*args, **kwargs)
+                return async_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(span_name, **attributes):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+
+def inject(headers: Optional[dict] = None) -> dict:
+    """Add the current span's traceparent to outgoing HTTP headers"""
+    headers = dict(headers or {})
+    span = current_span()
+    if span is not None:
+        headers[TRACEPARENT_HEADER] = span.context.traceparent
+    return headers
+
+
+def extract(headers) -> Optional[SpanContext]:
+    """Remote parent from incoming HTTP headers, if they carry a valid traceparent"""
+    return SpanContext.from_traceparent(headers.get(TRACEPARENT_HEADER))
+
+
+def create_exporters(spec: str, path: str) -> list:
+    """Exporters for a spec such as "console", "file" or "console,file" """
+    exporters = []
+    for name in (s.strip() for s in spec.split(",") if s.strip()):
+        if name == "console":
+            exporters.append(ConsoleExporter())
+        elif name == "file":
+            exporters.append(_file_exporter(path))
+        else:
+            raise ValueError(f"Unsupported tracing exporter: {name}")
+    return exporters
+
+
+_file_exporters: Dict[str, FileExporter] = {}
+_tracers: Dict[str, Tracer] = {}
+
+
+def _file_exporter(path: str) -> FileExporter:
+    path = os.path.abspath(path)
+    if path not in _file_exporters:
+        _file_exporters[path] = FileExporter(path)
+    return _file_exporters[path]
+
+
+def get_tracer(service_name: Optional[str] = None) -> Tracer:
+    """Tracer for a service, configured from settings (one per service name per process)"""
+    service_name = service_name or settings.TRACING_SERVICE_NAME
+    if service_name not in _tracers:
+        _tracers[service_name] = Tracer(
+            service_name,
+            create_exporters(settings.TRACING_EXPORTER, settings.TRACING_FILE),
+            sample_rate=settings.TRACING_SAMPLE_RATE,
+        )
+    return _tracers[service_name]
+
+
+tracer = get_tracer()
+
+
+def _print_tree(spans: List[dict]):
+    children: Dict[str, List[dict]] = {}
+    ids = {s["spanId"] for s in spans}
+    for s in spans:
+        parent = s["parentSpanId"] if s["parentSpanId"] in ids else ""
+        children.setdefault(parent, []).append(s)
+    trace_start = min(s["startTimeUnixNano"] for s in spans)
+
+    def walk(parent: str, depth: int):
+        for s in sorted(children.get(parent, []), key=lambda s: s["startTimeUnixNano"]):
+            offset = (s["startTimeUnixNano"] - trace_start) / 1e6
+            duration = (s["endTimeUnixNano"] - s["startTimeUnixNano"]) / 1e6
+            error = " ❌" if s["status"]["code"].endswith("ERROR") else ""
+            service = s.get("resource", {}).get("service.name", "")
+            print(f"{'  ' * depth}{s['name']:<{max(1, 44 - 2 * depth)}} +{offset:9.1f}ms {duration:9.1f}ms  [{service}]{error}")
+            walk(s["spanId"], depth + 1)
+
+    walk("", 0)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    show = sub.add_parser("show", help="Print traces from a JSON-lines span file as trees")
+    show.add_argument("path")
+    show.add_argument("--trace", help="Only this trace ID (prefix)")
+    show.add_argument("--top", type=int, default=5, help="Number of slowest traces to print")
+    args = parser.parse_args()
+
+    traces: Dict[str, List[dict]] = {}
+    with open(args.path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                span = json.loads(line)
+                traces.setdefault(span["traceId"], []).append(span)
+    if args.trace:
+        traces = {k: v for k, v in traces.items() if k.startswith(args.trace)}
+
+    def wall_ms(spans):
+        return (max(s["endTimeUnixNano"] for s in spans) - min(s["startTimeUnixNano"] for s in spans)) / 1e6
+
+    for trace_id, spans in sorted(traces.items(), key=lambda kv: wall_ms(kv[1]), reverse=True)[:args.top]:
+        print(f"\ntrace {trace_id}  {wall_ms(spans):.1f} ms, {len(spans)} spans")
+        _print_tree(spans)
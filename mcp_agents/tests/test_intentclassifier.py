@@ -0,0 +1,49 @@
+import asyncio
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+os.environ.setdefault("GROQ_API_KEY", "test")
+
+from intentclassifier import IntentClassifierAgent
+
+POLICY = json.dumps({"detected_intents": [{"type": "Cancellation Policy"}]})
+CANCEL = json.dumps({"detected_intents": [{"type": "Cancel Trip"}]})
+
+
+def make_classifier(responses):
+    """Classifier that skips the local tiers and answers LLM calls from ``responses`` in order"""
+    classifier = IntentClassifierAgent()
+    classifier.local_classifier = None
+    replies = iter(responses)
+    classifier.agent = lambda prompt: next(replies)
+
+    async def async_agent(prompt):
+        return next(replies)
+
+    classifier.async_agent = async_agent
+    return classifier
+
+
+def test_cached_question_does_not_answer_the_command():
+    classifier = make_classifier([POLICY, CANCEL])
+    assert classifier.get_intent("Can I cancel my flight?")[0]["type"] == "Cancellation Policy"
+    assert classifier.get_intent("cancel my flight")[0]["type"] == "Cancel Trip"
+    assert classifier.get_intent("Can I cancel my flight")[0]["type"] == "Cancellation Policy"
+
+
+def test_cached_question_does_not_answer_the_command_async():
+    classifier = make_classifier([POLICY, CANCEL])
+
+    async def run():
+        try:
+            question = await classifier.aget_intent("Will you cancel my flight?")
+            command = await classifier.aget_intent("cancel my flight")
+            return question, command
+        finally:
+            await classifier.aclose()
+
+    question, command = asyncio.run(run())
+    assert question[0]["type"] == "Cancellation Policy"
+    assert command[0]["type"] == "Cancel Trip"